@@ -0,0 +1,312 @@
+"""
+Backup Store
+
+Content-addressed store for .vimrc backups, shared by setup_vim.py and
+select_theme.py. Each distinct content is stored once under
+objects/<xx>/<sha256>, and an index records every backup as
+(timestamp, digest, reason). The most recent entry is mirrored in a small
+LATEST file so it can be looked up without reading the whole index.
+
+Layout (under ~/.vim/vimrc_backups/):
+    index.json    all backup entries, oldest first
+    LATEST        the most recent entry
+    objects/      deduplicated backup contents
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from drift_index import hash_bytes
+from fileutil import atomic_write, make_private_dirs
+
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Retention applied after every backup unless overridden
+DEFAULT_RETENTION: Dict[str, int] = {
+    'keep_last': 10,
+    'keep_daily': 7,
+    'keep_weekly': 4,
+}
+
+INDEX_VERSION = 1
+
+
+def dump_index(entries: List[Dict[str, Any]]) -> bytes:
+    """Serialize backup entries in the index.json format."""
+    return json.dumps({'version': INDEX_VERSION, 'entries': entries}, indent=1).encode('utf-8')
+
+
+class BackupStore:
+    """Deduplicated, indexed backups of a single configuration file."""
+
+    def __init__(self, store_dir: Path, retention: Optional[Dict[str, int]] = None):
+        """
+        Initialize the backup store.
+
+        Args:
+            store_dir: Directory holding the index and objects
+            retention: Retention policy (keep_last, keep_daily, keep_weekly)
+        """
+        self.store_dir = Path(store_dir)
+        self.objects_dir = self.store_dir / 'objects'
+        self.index_path = self.store_dir / 'index.json'
+        self.latest_path = self.store_dir / 'LATEST'
+        self.retention = dict(DEFAULT_RETENTION)
+        if retention:
+            self.retention.update(retention)
+
+    def object_path(self, digest: str) -> Path:
+        """Return the path a digest's content is stored at."""
+        return self.objects_dir / digest[:2] / digest
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return all backup entries, oldest first."""
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        return data.get('entries', [])
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Return the most recent backup entry without reading the full index."""
+        try:
+            with open(self.latest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            entries = self.entries()
+            return entries[-1] if entries else None
+
+    def _write_index(self, entries: List[Dict[str, Any]]):
+        """Persist the index and the LATEST pointer."""
+        atomic_write(self.index_path, dump_index(entries), mode=0o600)
+        if entries:
+            atomic_write(self.latest_path, json.dumps(entries[-1]).encode('utf-8'), mode=0o600)
+        elif self.latest_path.exists():
+            self.latest_path.unlink()
+
+    def add(self, source: Path, reason: str) -> Dict[str, Any]:
+        """
+        Back up a file.
+
+        The content is stored only if no backup with the same digest exists,
+        and no new entry is recorded if it matches the most recent backup.
+
+        Args:
+            source: File to back up
+            reason: Why the backup was taken (e.g. 'drift', 'theme')
+
+        Returns:
+            The index entry describing the backup
+        """
+        data = Path(source).read_bytes()
+        digest = hash_bytes(data)
+
+        latest = self.latest()
+        if latest and latest['digest'] == digest and self.object_path(digest).exists():
+            return latest
+
+        obj = self.object_path(digest)
+        if not obj.exists():
+            make_private_dirs(obj.parent)
+            atomic_write(obj, data, mode=0o600)
+
+        entry, entries = self.record(self.entries(), digest, reason, len(data))
+        self._write_index(entries)
+        self._collect_garbage(entries)
+        return entry
+
+    def record(self, entries: List[Dict[str, Any]], digest: str, reason: str,
+               size: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Append a backup entry to an index and apply the retention policy.
+
+        Nothing is read or written; remote_fleet.py uses this to update the
+        store of a remote host.
+
+        Args:
+            entries: Current index entries, oldest first
+            digest: SHA256 of the backed-up content
+            reason: Why the backup was taken
+            size: Size of the content in bytes
+
+        Returns:
+            Tuple of (the new entry, the entries to keep)
+        """
+        entry = {
+            'timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
+            'digest': digest,
+            'reason': reason,
+            'size': size,
+        }
+        return entry, self._retain(entries + [entry])
+
+    def find(self, ref: str = 'latest') -> Optional[Dict[str, Any]]:
+        """
+        Look up a backup by reference.
+
+        Args:
+            ref: 'latest' (the newest backup not taken by restore() itself),
+                a digest prefix (6+ hex chars) or a timestamp prefix
+                (e.g. '20250101' for the newest backup of that day)
+
+        Returns:
+            Matching entry, or None if nothing matches
+
+        Raises:
+            ValueError: If a digest prefix matches more than one content
+        """
+        if ref == 'latest':
+            # Pre-restore snapshots are skipped so a repeated restore stays put
+            latest = self.latest()
+            if latest is None or latest['reason'] != 'pre-restore':
+                return latest
+            entries = [e for e in self.entries() if e['reason'] != 'pre-restore']
+            return entries[-1] if entries else None
+
+        entries = self.entries()
+        by_time = [e for e in entries if e['timestamp'].startswith(ref)]
+        if by_time:
+            return by_time[-1]
+
+        if len(ref) >= 6:
+            by_digest = [e for e in entries if e['digest'].startswith(ref.lower())]
+            if len({e['digest'] for e in by_digest}) > 1:
+                raise ValueError(f"Backup reference '{ref}' is ambiguous")
+            if by_digest:
+                return by_digest[-1]
+
+        return None
+
+    def restore(self, ref: str, dest: Path) -> Dict[str, Any]:
+        """
+        Restore a backup over a file.
+
+        The file being replaced is backed up first (reason 'pre-restore')
+        unless its content is already in the store.
+
+        Args:
+            ref: Backup reference accepted by find()
+            dest: File to overwrite
+
+        Returns:
+            The restored entry
+
+        Raises:
+            LookupError: If no backup matches the reference
+        """
+        entry = self.find(ref)
+        if entry is None:
+            raise LookupError(f"No backup matches '{ref}'")
+
+        dest = Path(dest)
+        if dest.exists():
+            current = hash_bytes(dest.read_bytes())
+            if not self.object_path(current).exists():
+                self.add(dest, 'pre-restore')
+
+        atomic_write(dest, self.object_path(entry['digest']).read_bytes())
+        return entry
+
+    def _retain(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply the retention policy, returning the entries to keep (oldest first)."""
+        keep_last = self.retention['keep_last']
+        keep_daily = self.retention['keep_daily']
+        keep_weekly = self.retention['keep_weekly']
+
+        newest_first = list(reversed(entries))
+        kept = set(range(min(keep_last, len(newest_first))))
+
+        days: List[str] = []
+        weeks: List[tuple] = []
+        for i, entry in enumerate(newest_first):
+            when = datetime.strptime(entry['timestamp'], TIMESTAMP_FORMAT)
+            day = entry['timestamp'][:8]
+            if day not in days and len(days) < keep_daily:
+                days.append(day)
+                kept.add(i)
+            week = when.isocalendar()[:2]
+            if week not in weeks and len(weeks) < keep_weekly:
+                weeks.append(week)
+                kept.add(i)
+
+        return [e for i, e in reversed(list(enumerate(newest_first))) if i in kept]
+
+    def _collect_garbage(self, entries: List[Dict[str, Any]]) -> int:
+        """Delete stored objects no longer referenced by any entry."""
+        referenced = {e['digest'] for e in entries}
+        removed = 0
+        if not self.objects_dir.exists():
+            return removed
+
+        with os.scandir(self.objects_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as objects:
+                    for obj in objects:
+                        if obj.name not in referenced:
+                            os.unlink(obj.path)
+                            removed += 1
+        return removed
+
+    def prune(self) -> int:
+        """
+        Apply the retention policy now.
+
+        Returns:
+            Number of index entries removed
+        """
+        entries = self.entries()
+        kept = self._retain(entries)
+        if len(kept) != len(entries):
+            self._write_index(kept)
+        self._collect_garbage(kept)
+        return len(entries) - len(kept)
+
+    def import_legacy(self, home_dir: Path) -> int:
+        """
+        Move old-style ~/.vimrc.backup.* files into the store.
+
+        Every legacy file becomes an index entry; the retention policy is not
+        applied here, so nothing is discarded until the next add() or prune().
+
+        Args:
+            home_dir: Home directory containing the legacy backups
+
+        Returns:
+            Number of legacy files imported
+        """
+        home_dir = Path(home_dir)
+        legacy = list(home_dir.glob('.vimrc.backup.*'))
+        # Older select_theme.py versions wrote their backup under this name
+        legacy += list(home_dir.glob('.vimrc.vimrc.backup.theme'))
+        legacy.sort(key=lambda p: p.stat().st_mtime)
+        if not legacy:
+            return 0
+
+        entries = self.entries()
+        for path in legacy:
+            data = path.read_bytes()
+            digest = hash_bytes(data)
+            obj = self.object_path(digest)
+            if not obj.exists():
+                make_private_dirs(obj.parent)
+                atomic_write(obj, data, mode=0o600)
+            suffix = path.name.rsplit('.', 1)[-1]
+            entries.append({
+                'timestamp': datetime.fromtimestamp(path.stat().st_mtime).strftime(TIMESTAMP_FORMAT),
+                'digest': digest,
+                'reason': 'theme' if suffix == 'theme' else 'legacy',
+                'size': len(data),
+            })
+
+        entries.sort(key=lambda e: e['timestamp'])
+        self._write_index(entries)
+        for path in legacy:
+            path.unlink()
+        return len(legacy)
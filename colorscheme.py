@@ -0,0 +1,303 @@
+"""
+Colorscheme Model
+
+Parses vim colorscheme files (colors/*.vim) into a structured model:
+header title and description, g:colors_name, background, the palette
+documented in comments, and every highlight group with its gui/cterm
+colors, attributes and links.
+
+Parsed schemes are kept in an on-disk index. Entries are revalidated by
+stat signature and, when that moved, by content digest, so unchanged
+themes are never reparsed.
+"""
+
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from drift_index import hash_bytes
+from fileutil import atomic_write, make_private_dirs
+
+
+INDEX_VERSION = 1
+
+# Highlight keys stored as explicit HighlightGroup fields
+_COLOR_KEYS = ('guifg', 'guibg', 'guisp', 'ctermfg', 'ctermbg', 'gui', 'cterm')
+
+_HI_RE = re.compile(r'^\s*(hi[a-z]*)!?\s+(.*)$')
+_ATTR_RE = re.compile(r"(\w+)=('[^']*'|\S+)")
+_COLORS_NAME_RE = re.compile(r'''^\s*let\s+g:colors_name\s*=\s*["']([^"']+)["']''')
+_BACKGROUND_RE = re.compile(r'^\s*set\s+(?:background|bg)=(\w+)')
+_PALETTE_RE = re.compile(r'^"\s*([A-Za-z][\w ]*?)\s*:\s*(#[0-9a-fA-F]{6}\b.*)$')
+_HEX_RE = re.compile(r'#[0-9a-fA-F]{6}\b')
+
+
+@dataclass
+class HighlightGroup:
+    """A single highlight group definition."""
+
+    name: str
+    guifg: Optional[str] = None
+    guibg: Optional[str] = None
+    guisp: Optional[str] = None
+    ctermfg: Optional[str] = None
+    ctermbg: Optional[str] = None
+    gui: Optional[str] = None
+    cterm: Optional[str] = None
+    link: Optional[str] = None
+    extra: Dict[str, str] = field(default_factory=dict)
+    line: int = 0
+
+
+@dataclass
+class ColorScheme:
+    """A parsed colorscheme file."""
+
+    name: str
+    colors_name: Optional[str] = None
+    title: str = ''
+    description: str = ''
+    background: Optional[str] = None
+    palette: Dict[str, List[str]] = field(default_factory=dict)
+    groups: Dict[str, HighlightGroup] = field(default_factory=dict)
+
+    def group(self, name: str) -> Optional[HighlightGroup]:
+        """Return a group, following links to the group that defines its colors."""
+        seen = set()
+        group = self.groups.get(name)
+        while group is not None and group.link and group.name not in seen:
+            seen.add(group.name)
+            group = self.groups.get(group.link)
+        return group
+
+    def to_dict(self) -> Dict:
+        """Return a JSON-serializable representation."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ColorScheme':
+        """Rebuild a scheme from to_dict() output."""
+        groups = {name: HighlightGroup(**g) for name, g in data.get('groups', {}).items()}
+        return cls(**{**data, 'groups': groups})
+
+
+def parse_highlight(args: str, lineno: int = 0) -> Optional[HighlightGroup]:
+    """
+    Parse the arguments of a :highlight command.
+
+    Args:
+        args: Everything after 'hi'/'highlight' (and an optional '!')
+        lineno: Source line number recorded on the group
+
+    Returns:
+        The group defined or linked, or None for commands that define nothing
+        (e.g. 'hi clear')
+    """
+    tokens = args.split()
+    if tokens and tokens[0] in ('default', 'def'):
+        tokens = tokens[1:]
+    if not tokens or tokens[0] == 'clear':
+        return None
+
+    if tokens[0] == 'link':
+        if len(tokens) < 3:
+            return None
+        link = None if tokens[2] == 'NONE' else tokens[2]
+        return HighlightGroup(name=tokens[1], link=link, line=lineno)
+
+    group = HighlightGroup(name=tokens[0], line=lineno)
+    for key, value in _ATTR_RE.findall(' '.join(tokens[1:])):
+        key = key.lower()
+        value = value.strip("'")
+        if key in _COLOR_KEYS:
+            setattr(group, key, value)
+        else:
+            group.extra[key] = value
+    return group
+
+
+def _merge_group(existing: Optional[HighlightGroup], new: HighlightGroup) -> HighlightGroup:
+    """Combine a repeated definition the way vim does: later attributes win."""
+    if existing is None or new.link is not None:
+        return new
+    for key in _COLOR_KEYS:
+        value = getattr(new, key)
+        if value is not None:
+            setattr(existing, key, value)
+    existing.extra.update(new.extra)
+    existing.link = None
+    existing.line = new.line
+    return existing
+
+
+def parse_colorscheme(text: str, name: str) -> ColorScheme:
+    """
+    Parse colorscheme source.
+
+    Args:
+        text: Contents of the .vim file
+        name: Theme name (the file stem)
+
+    Returns:
+        Parsed colorscheme
+    """
+    scheme = ColorScheme(name=name)
+    header: List[str] = []
+    in_header = True
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        stripped = line.strip()
+
+        # The header is the leading comment block, up to the first blank line
+        if in_header and not (stripped.startswith('"') or (not stripped and not header)):
+            in_header = False
+
+        if stripped.startswith('"'):
+            comment = stripped.lstrip('"').strip()
+            if in_header:
+                if comment and not set(comment) <= set('=-'):
+                    header.append(comment)
+                continue
+            palette = _PALETTE_RE.match(stripped)
+            if palette:
+                scheme.palette[palette.group(1)] = _HEX_RE.findall(palette.group(2))
+            continue
+
+        hi = _HI_RE.match(line)
+        if hi and 'highlight'.startswith(hi.group(1)):
+            group = parse_highlight(hi.group(2), lineno)
+            if group is not None:
+                scheme.groups[group.name] = _merge_group(scheme.groups.get(group.name), group)
+            continue
+
+        colors_name = _COLORS_NAME_RE.match(line)
+        if colors_name:
+            scheme.colors_name = colors_name.group(1)
+            continue
+
+        background = _BACKGROUND_RE.match(line)
+        if background:
+            scheme.background = background.group(1)
+
+    if header:
+        # Headers read "<Title> - <summary>" followed by a one-line description
+        title, _, summary = header[0].partition(' - ')
+        scheme.title = title.strip()
+        scheme.description = header[1] if len(header) > 1 else summary.strip()
+    if not scheme.title:
+        scheme.title = name.title()
+
+    return scheme
+
+
+def load_colorscheme(path: Path) -> ColorScheme:
+    """Parse a colorscheme file."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_colorscheme(f.read(), path.stem)
+
+
+class ThemeIndex:
+    """On-disk cache of parsed colorschemes for a colors directory."""
+
+    def __init__(self, index_path: Path, colors_dir: Path):
+        """
+        Initialize the index.
+
+        Args:
+            index_path: File the index is persisted to
+            colors_dir: Directory containing the colorscheme files
+        """
+        self.index_path = Path(index_path)
+        self.colors_dir = Path(colors_dir)
+        self.parsed = 0
+        self._schemes: Optional[Dict[str, ColorScheme]] = None
+        self._digests: Dict[str, str] = {}
+
+    def _read(self) -> Dict:
+        """Read the persisted index, returning an empty one if unusable."""
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if (data.get('version') == INDEX_VERSION
+                    and data.get('colors_dir') == str(self.colors_dir)):
+                return data
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {'files': {}}
+
+    def _list_files(self, data: Dict) -> Tuple[List[str], int]:
+        """List theme files, skipping the directory scan if its mtime is unchanged."""
+        try:
+            dir_mtime = os.stat(self.colors_dir).st_mtime_ns
+        except FileNotFoundError:
+            return [], 0
+        if data.get('dir_mtime_ns') == dir_mtime:
+            return list(data['files']), dir_mtime
+        names = [entry.name[:-4] for entry in os.scandir(self.colors_dir)
+                 if entry.name.endswith('.vim') and entry.is_file()]
+        return names, dir_mtime
+
+    def schemes(self) -> Dict[str, ColorScheme]:
+        """
+        Return all parsed colorschemes, reparsing only files that changed.
+
+        Returns:
+            Mapping of theme name to parsed colorscheme
+        """
+        if self._schemes is not None:
+            return self._schemes
+
+        data = self._read()
+        cached_files = data.get('files', {})
+        names, dir_mtime = self._list_files(data)
+        files: Dict[str, Dict] = {}
+        dirty = dir_mtime != data.get('dir_mtime_ns') or set(names) != set(cached_files)
+
+        for name in names:
+            path = self.colors_dir / f'{name}.vim'
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                dirty = True
+                continue
+            signature = [st.st_ino, st.st_size, st.st_mtime_ns]
+            cached = cached_files.get(name)
+            if cached is not None and cached['signature'] == signature:
+                files[name] = cached
+                continue
+
+            raw = path.read_bytes()
+            digest = hash_bytes(raw)
+            if cached is not None and cached['digest'] == digest:
+                model = cached['scheme']
+            else:
+                model = parse_colorscheme(raw.decode('utf-8', 'replace'), name).to_dict()
+                self.parsed += 1
+            files[name] = {'signature': signature, 'digest': digest, 'scheme': model}
+            dirty = True
+
+        self._schemes = {name: ColorScheme.from_dict(entry['scheme'])
+                         for name, entry in sorted(files.items())}
+        self._digests = {name: entry['digest'] for name, entry in files.items()}
+        if dirty:
+            self._save({'version': INDEX_VERSION, 'colors_dir': str(self.colors_dir),
+                        'dir_mtime_ns': dir_mtime, 'files': files})
+        return self._schemes
+
+    def digests(self) -> Dict[str, str]:
+        """Return the content digest of every indexed theme file."""
+        self.schemes()
+        return dict(self._digests)
+
+    def _save(self, data: Dict):
+        """Persist the index; failures only cost a reparse next time."""
+        try:
+            make_private_dirs(self.index_path.parent)
+            atomic_write(self.index_path, json.dumps(data).encode('utf-8'),
+                         mode=0o600, fsync=False)
+        except OSError:
+            pass
@@ -0,0 +1,471 @@
+"""
+Configuration Watcher
+
+Long-running drift detection for `setup_vim.py --watch`. The watcher
+follows ~/.vimrc, ~/.vimrc.local, ~/.vim/colors and the files of the
+profile (its template, profile files and overlays), and re-evaluates only
+what a change can affect:
+
+    - profile files or ~/.vimrc: re-render and compare ~/.vimrc with it
+    - ~/.vimrc.local: report which template settings it overrides
+    - ~/.vim/colors: check installed themes against the install manifest
+
+On Linux, changes are delivered by inotify (through ctypes, no extra
+dependency). The parent directories are watched rather than the files
+themselves, so editors that save by writing a new file and renaming it
+over the old one are followed, and a directory that does not exist yet is
+picked up once it is created. Where inotify is unavailable, or on network
+filesystems whose remote changes it cannot see (`--poll`), the paths are
+polled by stat signature instead.
+
+Bursts of events (an editor's write/rename/chmod, a `git checkout`) are
+debounced into a single evaluation. With auto-apply enabled, drift is
+remediated the way setup_vim.py would: ~/.vimrc is backed up and
+rewritten, and edited or deleted theme files are reinstalled.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from colorscheme import ThemeIndex
+from drift_index import hash_bytes
+from drift_report import build_report
+from theme_install import ThemeInstaller
+
+
+WATCH_KEYS = ('template', 'vimrc', 'local', 'colors')
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 2.0
+
+# A burst that keeps going is evaluated after at most this many debounce windows
+MAX_DEBOUNCE_WINDOWS = 10
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Writes are reported once, on close (IN_CLOSE_WRITE), not per write(2)
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT = struct.Struct('iIII')
+
+
+@dataclass(frozen=True)
+class WatchSpec:
+    """Files in one directory that belong to a watch key."""
+
+    key: str
+    directory: Path
+    names: Optional[FrozenSet[str]] = None  # None: every visible *.vim file
+
+    def matches(self, name: str) -> bool:
+        """Return True if a directory entry belongs to this spec."""
+        if self.names is not None:
+            return name in self.names
+        return name.endswith('.vim') and not name.startswith('.')
+
+
+class InotifySource:
+    """Change source backed by Linux inotify."""
+
+    name = 'inotify'
+
+    def __init__(self, specs: List[WatchSpec]):
+        """
+        Start watching.
+
+        Args:
+            specs: Paths to watch
+
+        Raises:
+            OSError: If inotify is unavailable or a watch cannot be added
+        """
+        libc_name = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._init1 = libc.inotify_init1
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+        except (OSError, AttributeError, TypeError):
+            raise OSError(errno.ENOSYS, 'inotify is not available on this platform')
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self._init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f'inotify_init1: {os.strerror(err)}')
+
+        self.specs = specs
+        self._watches: Dict[int, List[WatchSpec]] = {}
+        self._parents: Set[int] = set()
+        try:
+            self._arm()
+        except OSError:
+            self.close()
+            raise
+
+    def _arm(self) -> Set[str]:
+        """
+        (Re)create watches for every spec.
+
+        A spec whose directory is missing watches its closest existing
+        ancestor until the directory appears.
+
+        Returns:
+            Keys of specs that are now watched directly but were not before
+        """
+        before = {spec.key for specs in self._watches.values() for spec in specs}
+        watches: Dict[int, List[WatchSpec]] = {}
+        parents: Set[int] = set()
+
+        for spec in self.specs:
+            target = spec.directory
+            while not target.is_dir() and target != target.parent:
+                target = target.parent
+            wd = self._add_watch(self.fd, os.fsencode(target), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f'inotify_add_watch {target}: {os.strerror(err)}')
+            specs = watches.setdefault(wd, [])
+            if target == spec.directory:
+                specs.append(spec)
+            else:
+                parents.add(wd)
+
+        for wd in set(self._watches) - set(watches):
+            self._rm_watch(self.fd, wd)
+        self._watches, self._parents = watches, parents
+        return {spec.key for specs in watches.values() for spec in specs} - before
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            Keys of the specs that changed (empty on timeout)
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: Set[str] = set()
+        rearm = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                raw = buf[offset + _EVENT.size:offset + _EVENT.size + length]
+                name = os.fsdecode(raw.rstrip(b'\0'))
+                offset += _EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(spec.key for spec in self.specs)
+                    continue
+                specs = self._watches.get(wd, [])
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    changed.update(spec.key for spec in specs)
+                    rearm = True
+                    continue
+                if wd in self._parents and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    rearm = True
+                changed.update(spec.key for spec in specs if spec.matches(name))
+
+        if rearm:
+            changed |= self._arm()
+        return changed
+
+    def close(self):
+        """Release the inotify descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingSource:
+    """Change source that compares stat signatures at a fixed interval."""
+
+    name = 'polling'
+
+    def __init__(self, specs: List[WatchSpec], interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Take the initial snapshot.
+
+        Args:
+            specs: Paths to watch
+            interval: Seconds between scans
+        """
+        self.specs = specs
+        self.interval = interval
+        self._snapshots = {spec: self._snapshot(spec) for spec in specs}
+
+    @staticmethod
+    def _snapshot(spec: WatchSpec) -> Tuple:
+        """Return the stat signatures of the files a spec covers."""
+        if spec.names is not None:
+            candidates = sorted(spec.names)
+        else:
+            try:
+                candidates = sorted(entry.name for entry in os.scandir(spec.directory)
+                                    if spec.matches(entry.name))
+            except OSError:
+                return ()
+        signatures = []
+        for name in candidates:
+            try:
+                st = os.stat(spec.directory / name)
+            except OSError:
+                continue
+            signatures.append((name, st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(signatures)
+
+    def _scan(self) -> Set[str]:
+        """Return the keys whose snapshot changed since the last scan."""
+        changed = set()
+        for spec in self.specs:
+            snapshot = self._snapshot(spec)
+            if snapshot != self._snapshots[spec]:
+                self._snapshots[spec] = snapshot
+                changed.add(spec.key)
+        return changed
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            Keys of the specs that changed (empty on timeout)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else deadline - time.monotonic()
+            time.sleep(max(0.0, min(self.interval, remaining)))
+            changed = self._scan()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        """Nothing to release."""
+
+
+class ConfigWatcher:
+    """Re-evaluates drift whenever a watched path changes."""
+
+    def __init__(self, manager, profile: str = 'default', auto_apply: bool = False,
+                 debounce: float = DEFAULT_DEBOUNCE, poll_interval: Optional[float] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            manager: VimConfigManager for the home directory being watched
+            profile: Configuration profile the home is expected to follow
+            auto_apply: If True, remediate drift instead of only reporting it
+            debounce: Seconds without events before a burst is evaluated
+            poll_interval: If set, poll at this interval instead of using inotify
+        """
+        self.manager = manager
+        self.profile = profile
+        self.auto_apply = auto_apply
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.template_path = manager.get_template_path(profile)
+        self.profile_files = manager.profiles.resolve(profile).files
+        self.colors_dir = manager.vim_dir / 'colors'
+        self.installer = ThemeInstaller(manager.repo_root / 'colors', self.colors_dir)
+        self.theme_index = ThemeIndex(manager.cache_dir / 'theme_index.json',
+                                      manager.repo_root / 'colors')
+        self.evaluations = 0
+        self._expected: Optional[str] = None
+        self._status: Dict[str, str] = {}
+
+    def log(self, message: str):
+        """Print a timestamped message."""
+        print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def _report(self, key: str, status: str):
+        """Log a status line, but only when it differs from the last one for key."""
+        if self._status.get(key) != status:
+            self._status[key] = status
+            self.log(status)
+
+    def specs(self) -> List[WatchSpec]:
+        """Return the paths to watch."""
+        home = self.manager.home_dir
+        # The template, the profile files and overlays of the chain
+        directories: Dict[Path, Set[str]] = {}
+        for path in self.profile_files:
+            directories.setdefault(path.parent, set()).add(path.name)
+        return [
+            *(WatchSpec('template', directory, frozenset(names))
+              for directory, names in directories.items()),
+            WatchSpec('vimrc', home, frozenset([self.manager.vimrc_path.name])),
+            WatchSpec('local', home, frozenset([self.manager.local_vimrc.name])),
+            WatchSpec('colors', self.colors_dir),
+        ]
+
+    def open_source(self):
+        """Return an inotify source, or a polling source if requested or needed."""
+        specs = self.specs()
+        if self.poll_interval is not None:
+            return PollingSource(specs, self.poll_interval)
+        try:
+            return InotifySource(specs)
+        except OSError as e:
+            self.log(f"inotify unavailable ({e.strerror or e}) - "
+                     f"polling every {DEFAULT_POLL_INTERVAL:g}s")
+            return PollingSource(specs, DEFAULT_POLL_INTERVAL)
+
+    def expected_config(self) -> str:
+        """Render the configuration ~/.vimrc should hold."""
+        manager = self.manager
+        content = manager.render_profile(self.profile, manager.get_config_options(self.profile))
+        return manager.carry_over_theme(content)
+
+    def evaluate(self, changed: Set[str]):
+        """
+        Re-evaluate the parts of the configuration a change affects.
+
+        Args:
+            changed: Watch keys that changed
+        """
+        self.evaluations += 1
+        if 'template' in changed and self._expected is not None:
+            self.log(f"Profile '{self.profile}' ({self.template_path.name} or an overlay) changed")
+        if changed & {'template', 'vimrc'} or self._expected is None:
+            self.check_config()
+        if changed & {'template', 'local'}:
+            self.check_local()
+        if 'colors' in changed:
+            self.check_colors()
+
+    def check_config(self):
+        """Compare ~/.vimrc with the rendered template and remediate if enabled."""
+        manager = self.manager
+        self._expected = expected = self.expected_config()
+        if manager.vimrc_path.exists():
+            current = manager.calculate_file_hash(manager.vimrc_path)
+            manager.save_drift_index()
+            if current == hash_bytes(expected.encode('utf-8')):
+                self._report('vimrc', "~/.vimrc is in sync with the template")
+                return
+            actual = manager.vimrc_path.read_text(errors='replace')
+            changes = len(build_report(expected, actual)['changes'])
+            summary = f"~/.vimrc has drifted ({changes} setting(s) differ)"
+        else:
+            summary = "~/.vimrc is missing"
+
+        if not self.auto_apply:
+            self._report('vimrc', f"{summary} - run setup_vim.py to re-apply")
+            return
+
+        self.log(f"{summary} - re-applying")
+        if manager.vimrc_path.exists():
+            manager.backup_existing_config(reason='watch')
+        manager.ensure_vim_directories()
+        result = manager.apply_config(expected)
+        self._report('vimrc', f"~/.vimrc re-applied ({result})")
+
+    def check_local(self):
+        """Report the template settings ~/.vimrc.local overrides."""
+        local = self.manager.local_vimrc
+        if not local.exists():
+            self._report('local', "~/.vimrc.local: not present")
+            return
+        if self._expected is None:
+            self._expected = self.expected_config()
+        overrides = build_report(self._expected, self._expected,
+                                 local.read_text(errors='replace'))['local_overrides']
+        keys = ', '.join(entry['key'] for entry in overrides[:5])
+        more = f', ... (+{len(overrides) - 5})' if len(overrides) > 5 else ''
+        detail = f": {keys}{more}" if overrides else ""
+        self._report('local', f"~/.vimrc.local overrides {len(overrides)} template "
+                              f"setting(s){detail}")
+
+    def check_colors(self):
+        """Check installed themes against the install manifest."""
+        changed = self.installer.changed()
+        if not changed:
+            self._report('colors', "~/.vim/colors matches the installed themes")
+            return
+        names = ', '.join(changed)
+        if not self.auto_apply:
+            self._report('colors', f"Installed theme file(s) modified or removed: {names}")
+            return
+
+        # Only files installed from source are restored here; compiled
+        # installs are rebuilt by select_theme.py
+        manifest = self.installer.load_manifest()
+        digests = self.theme_index.digests()
+        restore = {name[:-4]: digests[name[:-4]] for name in changed
+                   if digests.get(name[:-4]) == manifest[name]['digest']}
+        skipped = [name for name in changed if name[:-4] not in restore]
+        if restore and not self.manager.dry_run:
+            result = self.installer.install(restore, prune=False)
+            self.log(f"Reinstalled theme file(s): {', '.join(result['installed'])}")
+        elif restore:
+            self.log(f"[DRY RUN] Would reinstall theme file(s): "
+                     f"{', '.join(name + '.vim' for name in sorted(restore))}")
+        if skipped:
+            self.log(f"Not restored (compiled or no longer in the repository): "
+                     f"{', '.join(skipped)} - run select_theme.py to reinstall")
+        self._status.pop('colors', None)
+
+    def run(self, max_events: Optional[int] = None):
+        """
+        Watch until interrupted.
+
+        Args:
+            max_events: Stop after this many evaluations of changes (for scripting)
+        """
+        source = self.open_source()
+        self.log(f"Watching {self.manager.home_dir} and {self.template_path.name} "
+                 f"({source.name}{', auto-apply' if self.auto_apply else ''})")
+        try:
+            self.evaluate(set(WATCH_KEYS))
+            handled = 0
+            while max_events is None or handled < max_events:
+                changed = source.wait(None)
+                started = time.monotonic()
+                while changed:
+                    more = source.wait(self.debounce)
+                    if not more:
+                        break
+                    changed |= more
+                    if time.monotonic() - started >= self.debounce * MAX_DEBOUNCE_WINDOWS:
+                        break
+                if changed:
+                    self.evaluate(changed)
+                    handled += 1
+        finally:
+            source.close()
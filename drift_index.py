@@ -0,0 +1,149 @@
+"""
+Drift Index
+
+Persistent cache of file digests used by the drift check. Each entry is
+keyed by path and validated against the file's stat signature
+(inode, size, mtime_ns), so unchanged files are never re-read. Files whose
+signature moved are rehashed, and entries for vanished paths are evicted
+when the index is saved.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fileutil import atomic_write, make_private_dirs
+
+
+# Files at least this large are hashed through mmap instead of a single read
+MMAP_THRESHOLD = 1 << 20
+
+# Files modified this recently are hashed but not cached: a second write
+# within the same mtime tick could otherwise go unnoticed
+RACY_WINDOW_NS = 2 * 10**9
+
+INDEX_VERSION = 1
+
+
+def stat_signature(st: os.stat_result) -> Tuple[int, int, int]:
+    """Return the (inode, size, mtime_ns) signature for a stat result."""
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Calculate the SHA256 hex digest of in-memory content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(filepath: Path) -> str:
+    """
+    Calculate the SHA256 hex digest of a file.
+
+    Small files are read in one call; large files are mapped into memory
+    so the digest runs over the page cache without Python-level looping.
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class DriftIndex:
+    """Stat-validated digest cache persisted as JSON."""
+
+    def __init__(self, index_path: Path):
+        """
+        Initialize the index.
+
+        Args:
+            index_path: File the index is loaded from and saved to
+        """
+        self.index_path = Path(index_path)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[Dict[str, List]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, List]:
+        """Load entries from disk on first use."""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.index_path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self._entries = data.get('entries', {})
+            except (OSError, ValueError, AttributeError):
+                # A missing or corrupt index is simply rebuilt
+                pass
+        return self._entries
+
+    def digest(self, filepath: Path) -> Optional[str]:
+        """
+        Return the SHA256 digest of a file, rehashing only if it changed.
+
+        Args:
+            filepath: File to hash
+
+        Returns:
+            Hex digest, or None if the file does not exist
+        """
+        entries = self._load()
+        key = os.path.abspath(filepath)
+
+        try:
+            st = os.stat(key)
+        except FileNotFoundError:
+            if entries.pop(key, None) is not None:
+                self._dirty = True
+            return None
+
+        signature = list(stat_signature(st))
+        cached = entries.get(key)
+        if cached is not None and cached[:3] == signature:
+            self.hits += 1
+            return cached[3]
+
+        self.misses += 1
+        digest = hash_file(Path(key))
+        if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+            entries[key] = signature + [digest]
+            self._dirty = True
+        elif cached is not None:
+            del entries[key]
+            self._dirty = True
+        return digest
+
+    def prune(self) -> int:
+        """
+        Evict entries whose paths no longer exist.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self._load()
+        vanished = [path for path in entries if not os.path.exists(path)]
+        for path in vanished:
+            del entries[path]
+        if vanished:
+            self._dirty = True
+        return len(vanished)
+
+    def save(self):
+        """Prune vanished paths and write the index atomically if it changed."""
+        if self._entries is None:
+            return
+        self.prune()
+        if not self._dirty:
+            return
+
+        make_private_dirs(self.index_path.parent)
+        data = json.dumps({'version': INDEX_VERSION, 'entries': self._entries})
+        atomic_write(self.index_path, data.encode('utf-8'), mode=0o600, fsync=False)
+        self._dirty = False
@@ -0,0 +1,193 @@
+"""
+Semantic Drift Report
+
+Compares ~/.vimrc with the configuration generated from the template at
+the level of individual settings rather than text lines. Both files are
+parsed with the vimrc model and split into sections (the `" --- Name ---`
+headers). Each section is hashed and the section hashes are hashed into a
+root, so identical files are recognized from the root alone and unchanged
+sections are skipped by a single hash comparison. Only sections whose
+hashes differ are broken down into set/let/map/autocmd/colorscheme
+entries, which are reported as added, removed or changed, together with
+any value ~/.vimrc.local assigns to the same entry. Options are compared
+under their full names, so `set ts=2` and `set tabstop=2` are one entry.
+
+Reports are plain dictionaries meant to be emitted as JSON, one object per
+host, so drift can be aggregated across a fleet.
+"""
+
+import socket
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from drift_index import hash_bytes
+from vimrc_model import VimrcModel
+
+
+REPORT_VERSION = 1
+
+EntryKey = Tuple[str, str]
+
+
+def section_hashes(model: VimrcModel) -> Dict[str, Dict[str, Any]]:
+    """
+    Hash every section of a vimrc.
+
+    Args:
+        model: Parsed vimrc
+
+    Returns:
+        Section name -> {'hash', 'start', 'end'}; a repeated header name gets
+        a '#n' suffix so every section keeps its own entry
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    for name, start, end in model.section_ranges():
+        text = ''.join(line for line in model.lines[start:end + 1] if line is not None)
+        key = name
+        counter = 2
+        while key in sections:
+            key = f'{name}#{counter}'
+            counter += 1
+        sections[key] = {'hash': hash_bytes(text.encode('utf-8')), 'start': start, 'end': end}
+    return sections
+
+
+def root_hash(sections: Dict[str, Dict[str, Any]]) -> str:
+    """Combine section hashes, in file order, into one root hash."""
+    leaves = ''.join(f"{name}\0{info['hash']}\n" for name, info in sections.items())
+    return hash_bytes(leaves.encode('utf-8'))
+
+
+def _json_value(value: Any) -> Any:
+    """Return an entry value in its JSON form."""
+    return value if isinstance(value, (bool, str)) or value is None else str(value)
+
+
+@lru_cache(maxsize=16)
+def _parse(text: str) -> Tuple[VimrcModel, Dict[str, Dict[str, Any]], str]:
+    """Parse and hash a configuration; generated configs repeat across a fleet."""
+    model = VimrcModel(text)
+    sections = section_hashes(model)
+    return model, sections, root_hash(sections)
+
+
+def build_report(expected: str, actual: str, local: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare a generated configuration with the installed one.
+
+    Args:
+        expected: Configuration generated from the template
+        actual: Contents of ~/.vimrc
+        local: Contents of ~/.vimrc.local, if present
+
+    Returns:
+        Report with 'drift', root hashes, section summary, the list of entry
+        changes and the entries ~/.vimrc.local overrides
+    """
+    expected_model, expected_sections, expected_root = _parse(expected)
+    if actual == expected:
+        actual_model, actual_sections, actual_root = expected_model, expected_sections, expected_root
+    else:
+        actual_model = VimrcModel(actual)
+        actual_sections = section_hashes(actual_model)
+        actual_root = root_hash(actual_sections)
+
+    local_entries: Dict[EntryKey, Tuple[int, Any]] = VimrcModel(local).entries() if local else {}
+
+    report: Dict[str, Any] = {
+        'version': REPORT_VERSION,
+        'drift': expected_root != actual_root,
+        'root': {'expected': expected_root, 'actual': actual_root},
+        'sections': {'unchanged': 0, 'changed': [], 'added': [], 'removed': []},
+        'changes': [],
+        'local_overrides': [],
+    }
+
+    if report['drift']:
+        changes: List[Dict[str, Any]] = report['changes']
+        for name, info in expected_sections.items():
+            other = actual_sections.get(name)
+            if other is None:
+                report['sections']['removed'].append(name)
+            elif other['hash'] == info['hash']:
+                report['sections']['unchanged'] += 1
+                continue
+            else:
+                report['sections']['changed'].append(name)
+            changes.extend(_diff_section(name, expected_model, info, actual_model, other))
+
+        for name, info in actual_sections.items():
+            if name not in expected_sections:
+                report['sections']['added'].append(name)
+                changes.extend(_diff_section(name, expected_model, None, actual_model, info))
+
+        for change in changes:
+            local_entry = local_entries.get((change['kind'], change['key']))
+            change['local_override'] = (_json_value(local_entry[1])
+                                        if local_entry is not None else None)
+    else:
+        report['sections']['unchanged'] = len(expected_sections)
+
+    expected_entries = expected_model.entries()
+    for key, (index, value) in sorted(local_entries.items()):
+        if key in expected_entries:
+            report['local_overrides'].append({
+                'kind': key[0],
+                'key': key[1],
+                'value': _json_value(value),
+                'template': _json_value(expected_entries[key][1]),
+                'local_line': index + 1,
+            })
+    return report
+
+
+def _diff_section(name: str, expected_model: VimrcModel, expected: Optional[Dict[str, Any]],
+                  actual_model: VimrcModel, actual: Optional[Dict[str, Any]]
+                  ) -> List[Dict[str, Any]]:
+    """List the entries added, removed or changed within one section."""
+    before = expected_model.entries(expected['start'], expected['end']) if expected else {}
+    after = actual_model.entries(actual['start'], actual['end']) if actual else {}
+    changes = []
+
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        if old is not None and new is not None and old[1] == new[1]:
+            continue
+        change = 'changed' if old and new else 'removed' if old else 'added'
+        changes.append({
+            'section': name,
+            'kind': key[0],
+            'key': key[1],
+            'change': change,
+            'expected': _json_value(old[1]) if old else None,
+            'actual': _json_value(new[1]) if new else None,
+            'expected_line': old[0] + 1 if old else None,
+            'actual_line': new[0] + 1 if new else None,
+        })
+    return changes
+
+
+def report_for_home(expected: str, home_dir: Path) -> Dict[str, Any]:
+    """
+    Build the drift report for one home directory.
+
+    Args:
+        expected: Configuration generated from the template
+        home_dir: Home directory holding .vimrc and .vimrc.local
+
+    Returns:
+        Report with host and home added; a missing ~/.vimrc is reported as
+        drift with every section removed
+    """
+    home_dir = Path(home_dir)
+    vimrc = home_dir / '.vimrc'
+    local = home_dir / '.vimrc.local'
+    actual = vimrc.read_text(errors='replace') if vimrc.exists() else ''
+    local_text = local.read_text(errors='replace') if local.exists() else None
+
+    report = build_report(expected, actual, local_text)
+    report['host'] = socket.gethostname()
+    report['home'] = str(home_dir)
+    report['vimrc_exists'] = vimrc.exists()
+    return report
@@ -0,0 +1,612 @@
+"""
+File Preview
+
+Shows a real source file in a theme's colors (select_theme.py
+--preview-file). The file is read and tokenized lazily: line offsets are
+indexed only as far as the viewport has been paged, lines are split into
+(highlight group, text) tokens in chunks of CHUNK_LINES, and only the
+visible rows are rendered. A multi-megabyte file previews as quickly as a
+small one and memory stays bounded by the chunk cache.
+
+Tokens are theme-independent, so switching themes restyles the cached
+chunks without tokenizing again. Lexer state (open block comments and
+multi-line strings) is remembered at every chunk boundary, so an evicted
+chunk is retokenized on its own. Jumping far ahead only carries that
+state through the chunks in between: each is decoded in one piece and
+passed over by a single regex match, without splitting or tokenizing lines.
+"""
+
+import re
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from colorscheme import ColorScheme
+from theme_render import FrameBuilder, Segment, ThemeStyles, detect_color_mode
+
+CHUNK_LINES = 128
+MAX_CHUNKS = 32
+TAB_WIDTH = 4
+INDEX_BLOCK = 1 << 16
+
+_TODO_RE = re.compile(r'\b(TODO|FIXME|XXX|NOTE)\b')
+_NUMBER_RE = re.compile(r'\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b')
+_WORD_RE = re.compile(r'[A-Za-z_][\w]*')
+
+
+@dataclass(frozen=True)
+class Language:
+    """What the tokenizer needs to know about a file type."""
+
+    name: str
+    keywords: FrozenSet[str] = frozenset()
+    types: FrozenSet[str] = frozenset()
+    constants: FrozenSet[str] = frozenset()
+    line_comment: Tuple[str, ...] = ()
+    block_comment: Optional[Tuple[str, str]] = None
+    strings: Tuple[str, ...] = ('"', "'")
+    multiline_strings: Tuple[str, ...] = ()
+    preproc: Optional[str] = None
+    # Commands whose arguments are expressions, where the comment marker
+    # opens a string instead (vim's `let x = "..."` versus `set nu " ...`)
+    expression_commands: FrozenSet[str] = frozenset()
+
+
+def _words(text: str) -> FrozenSet[str]:
+    """Return the whitespace-separated words of text as a set."""
+    return frozenset(text.split())
+
+
+_C_TYPES = _words('int long short char float double void bool unsigned signed size_t '
+                  'struct enum union const static auto')
+
+LANGUAGES: Dict[str, Language] = {
+    'python': Language(
+        'python',
+        keywords=_words('and as assert async await break class continue def del elif else '
+                        'except finally for from global if import in is lambda nonlocal not '
+                        'or pass raise return try while with yield match case'),
+        types=_words('int str float bool bytes list dict set tuple object type'),
+        constants=_words('True False None self cls'),
+        line_comment=('#',), multiline_strings=('"""', "'''"), preproc=r'@[\w.]+',
+    ),
+    'shell': Language(
+        'shell',
+        keywords=_words('if then else elif fi for while until do done case esac in function '
+                        'return exit local export readonly set unset source'),
+        line_comment=('#',),
+    ),
+    'vim': Language(
+        'vim',
+        keywords=_words('if else elseif endif for endfor while endwhile function endfunction '
+                        'return let set setlocal call execute try catch endtry finally '
+                        'augroup autocmd syntax highlight hi colorscheme map nnoremap '
+                        'inoremap vnoremap noremap command'),
+        line_comment=('"',), strings=("'",),
+        expression_commands=_words('let if elseif while for return call echo execute'),
+    ),
+    'c': Language(
+        'c',
+        keywords=_words('if else for while do switch case default break continue return goto '
+                        'sizeof typedef extern inline volatile register'),
+        types=_C_TYPES, constants=_words('NULL true false'),
+        line_comment=('//',), block_comment=('/*', '*/'), preproc=r'^\s*#\s*\w+',
+    ),
+    'javascript': Language(
+        'javascript',
+        keywords=_words('if else for while do switch case default break continue return '
+                        'function class extends new delete typeof instanceof in of try catch '
+                        'finally throw const let var async await yield import export from'),
+        types=_words('string number boolean any void never unknown interface type enum'),
+        constants=_words('true false null undefined this'),
+        line_comment=('//',), block_comment=('/*', '*/'), multiline_strings=('`',),
+    ),
+    'go': Language(
+        'go',
+        keywords=_words('break case chan const continue default defer else fallthrough for '
+                        'func go goto if import interface map package range return select '
+                        'struct switch type var'),
+        types=_words('int int8 int16 int32 int64 uint uint8 uint16 uint32 uint64 float32 '
+                     'float64 string bool byte rune error any'),
+        constants=_words('true false nil iota'),
+        line_comment=('//',), block_comment=('/*', '*/'), multiline_strings=('`',),
+    ),
+    'rust': Language(
+        'rust',
+        keywords=_words('as break const continue crate else enum extern fn for if impl in let '
+                        'loop match mod move mut pub ref return self Self static struct super '
+                        'trait type unsafe use where while async await dyn'),
+        types=_words('i8 i16 i32 i64 i128 isize u8 u16 u32 u64 u128 usize f32 f64 bool char '
+                     'str String Vec Option Result Box'),
+        constants=_words('true false None Some Ok Err'),
+        line_comment=('//',), block_comment=('/*', '*/'), preproc=r'#!?\[[^\]]*\]',
+    ),
+    'text': Language('text', strings=()),
+}
+
+_EXTENSIONS = {
+    '.py': 'python', '.pyi': 'python', '.sh': 'shell', '.bash': 'shell', '.zsh': 'shell',
+    '.vim': 'vim', '.c': 'c', '.h': 'c', '.cc': 'c', '.cpp': 'c', '.hpp': 'c', '.java': 'c',
+    '.js': 'javascript', '.jsx': 'javascript', '.ts': 'javascript', '.tsx': 'javascript',
+    '.mjs': 'javascript', '.go': 'go', '.rs': 'rust',
+}
+_FILENAMES = {'.vimrc': 'vim', 'vimrc': 'vim', '.bashrc': 'shell', '.zshrc': 'shell',
+              'Makefile': 'shell'}
+
+
+def detect_language(path: Path, first_line: str = '') -> Language:
+    """Pick a language from the file name, extension or shebang line."""
+    name = _FILENAMES.get(path.name) or _EXTENSIONS.get(path.suffix.lower())
+    if name is None and first_line.startswith('#!'):
+        if 'python' in first_line:
+            name = 'python'
+        elif re.search(r'\b(ba|z|k)?sh\b', first_line):
+            name = 'shell'
+    if name is None and path.name.endswith('.template') and 'vimrc' in path.name:
+        name = 'vim'
+    return LANGUAGES[name or 'text']
+
+
+class Tokenizer:
+    """Splits lines into (highlight group, text) tokens for one language."""
+
+    def __init__(self, language: Language):
+        """Build the token pattern for a language."""
+        self.language = language
+        alternatives = []
+        if language.line_comment:
+            markers = '|'.join(re.escape(marker) for marker in language.line_comment)
+            alternatives.append(f'(?P<comment>(?:{markers}).*)')
+        if language.block_comment:
+            alternatives.append(f'(?P<block>{re.escape(language.block_comment[0])})')
+        if language.multiline_strings:
+            delimiters = '|'.join(re.escape(d) for d in language.multiline_strings)
+            alternatives.append(f'(?P<mstring>{delimiters})')
+        if language.strings:
+            quotes = ''.join(re.escape(q) for q in language.strings)
+            alternatives.append(f'(?P<string>[{quotes}])')
+        # Only comments and strings decide the state carried to the next line
+        self._open_re = re.compile('|'.join(alternatives)) if alternatives else None
+        # Whether a line can leave state for the next one
+        self.stateful = bool(language.block_comment or language.multiline_strings)
+        self._skip_re = self._skip_pattern() if self.stateful else None
+        if language.preproc:
+            alternatives.append(f'(?P<preproc>{language.preproc})')
+        alternatives.append(f'(?P<number>{_NUMBER_RE.pattern})')
+        alternatives.append(f'(?P<word>{_WORD_RE.pattern})')
+        self._token_re = re.compile('|'.join(alternatives))
+
+    def _skip_pattern(self) -> 're.Pattern[str]':
+        """
+        Build the pattern carry() uses to pass over lines in one match.
+
+        It consumes plain text, line comments, closed block comments and
+        strings (with backslash escapes, as _find_close honours them) and
+        stops at the end of the text or at a block comment or multi-line
+        string that does not close.
+        """
+        language = self.language
+
+        def until(delimiter: str, multiline: bool) -> str:
+            # Runs of plain characters, each run after the first led by an
+            # escape or a partial delimiter, so no text matches two ways
+            first, rest = re.escape(delimiter[0]), re.escape(delimiter[1:])
+            if multiline:
+                plain, special = rf'[^\\{first}]*', [r'\\[\s\S]']
+            else:
+                plain, special = rf'[^\\{first}\n]*', [r'\\[^\n]']
+            if rest:
+                special.append(f'{first}(?!{rest})')
+            return f"{plain}(?:(?:{'|'.join(special)}){plain})*"
+
+        openers = []
+        if language.block_comment:
+            openers.append(language.block_comment[0])
+        openers.extend(language.multiline_strings)
+        guard = '(?!' + '|'.join(re.escape(opener) for opener in openers) + ')'
+        starts = set(openers) | set(language.line_comment) | set(language.strings)
+
+        firsts = sorted({start[0] for start in starts})
+        alternatives = ['[^' + ''.join(re.escape(first) for first in firsts) + ']+']
+        if language.line_comment:
+            markers = '|'.join(re.escape(marker) for marker in language.line_comment)
+            alternatives.append(rf'(?:{markers})[^\n]*')
+        if language.block_comment:
+            opener, close = language.block_comment
+            alternatives.append(re.escape(opener) + until(close, True) + re.escape(close))
+        for delimiter in language.multiline_strings:
+            alternatives.append(re.escape(delimiter) + until(delimiter, True) + re.escape(delimiter))
+        for quote in language.strings:
+            # A string that does not close ends with its line
+            alternatives.append(f'{guard}{re.escape(quote)}{until(quote, False)}{re.escape(quote)}?')
+        alternatives.append(rf'{guard}[\s\S]')
+        return re.compile('(?:' + '|'.join(alternatives) + ')*')
+
+    @staticmethod
+    def _find_close(line: str, start: int, delimiter: str) -> int:
+        """Return the index just past the closing delimiter, or -1 if the line ends first."""
+        i = start
+        while True:
+            i = line.find(delimiter, i)
+            if i < 0:
+                return -1
+            escape = i
+            while escape > 0 and line[escape - 1] == '\\':
+                escape -= 1
+            if (i - escape) % 2 == 0:
+                return i + len(delimiter)
+            i += 1
+
+    @staticmethod
+    def _comment(text: str) -> List[Segment]:
+        """Split a comment, marking TODO-style words."""
+        segments: List[Segment] = []
+        position = 0
+        for match in _TODO_RE.finditer(text):
+            if match.start() > position:
+                segments.append(('Comment', text[position:match.start()]))
+            segments.append(('Todo', match.group()))
+            position = match.end()
+        if position < len(text):
+            segments.append(('Comment', text[position:]))
+        return segments
+
+    def carry(self, text: str, state: Optional[str] = None) -> Optional[str]:
+        """
+        Return the state after a run of lines without building their tokens.
+
+        Used to skip ahead: the lines are passed over as one string
+        (FileSource.text()) by a single match of a pattern that only knows
+        comments and strings, which is many times cheaper than tokenizing
+        line by line.
+        """
+        if self._skip_re is None:
+            return None
+        position = 0
+        if state is not None:
+            position = self._find_close(text, 0, state)
+            if position < 0:
+                return state
+        position = self._skip_re.match(text, position).end()
+        if position == len(text):
+            return None
+        # Stopped at a block comment or multi-line string left open
+        match = self._open_re.match(text, position)
+        return self.language.block_comment[1] if match.lastgroup == 'block' else match.group()
+
+    def line(self, text: str, state: Optional[str] = None) -> Tuple[List[Segment], Optional[str]]:
+        """
+        Tokenize one line.
+
+        Args:
+            text: Line without its newline
+            state: Open construct carried over from the previous line (the
+                delimiter that closes it), or None
+
+        Returns:
+            (segments, state at the end of the line)
+        """
+        segments, state = self._tokenize(text, state)
+        # Merge neighbouring segments of the same group
+        merged: List[Segment] = []
+        for group, part in segments:
+            if merged and merged[-1][0] == group:
+                merged[-1] = (group, merged[-1][1] + part)
+            elif part:
+                merged.append((group, part))
+        return merged, state
+
+    def _tokenize(self, text: str, state: Optional[str]) -> Tuple[List[Segment], Optional[str]]:
+        """Tokenize one line without merging segments (see line())."""
+        language = self.language
+        segments: List[Segment] = []
+        position = 0
+
+        if state is not None:
+            end = self._find_close(text, 0, state)
+            group = 'Comment' if language.block_comment and state == language.block_comment[1] \
+                else 'String'
+            if end < 0:
+                return ([(group, text)] if text else []), state
+            segments.append((group, text[:end]))
+            position = end
+
+        words = text.split(None, 1)
+        expression = bool(words) and words[0] in language.expression_commands
+
+        while position < len(text):
+            match = self._token_re.search(text, position)
+            if match is None:
+                segments.append(('Normal', text[position:]))
+                break
+            if match.start() > position:
+                segments.append(('Normal', text[position:match.start()]))
+            kind = match.lastgroup
+            token = match.group()
+            position = match.end()
+
+            if kind == 'comment':
+                if expression and match.start() > 0:
+                    end = self._find_close(text, match.start() + 1, token[0])
+                    end = len(text) if end < 0 else end
+                    segments.append(('String', text[match.start():end]))
+                    position = end
+                    continue
+                segments.extend(self._comment(token))
+            elif kind == 'block':
+                close = language.block_comment[1]
+                end = self._find_close(text, position, close)
+                if end < 0:
+                    segments.append(('Comment', text[match.start():]))
+                    return segments, close
+                segments.extend(self._comment(text[match.start():end]))
+                position = end
+            elif kind in ('mstring', 'string'):
+                end = self._find_close(text, position, token)
+                if end < 0:
+                    segments.append(('String', text[match.start():]))
+                    return segments, token if kind == 'mstring' else None
+                segments.append(('String', text[match.start():end]))
+                position = end
+            elif kind == 'preproc':
+                segments.append(('PreProc', token))
+            elif kind == 'number':
+                segments.append(('Number', token))
+            elif token in language.keywords:
+                segments.append(('Statement', token))
+            elif token in language.types:
+                segments.append(('Type', token))
+            elif token in language.constants:
+                segments.append(('Constant', token))
+            elif text[position:position + 1] == '(':
+                segments.append(('Function', token))
+            else:
+                segments.append(('Normal', token))
+
+        return segments, None
+
+
+class FileSource:
+    """Random access to the lines of a file, indexing offsets only as needed."""
+
+    def __init__(self, path: Path):
+        """
+        Open a file for line access.
+
+        Raises:
+            OSError: If the file cannot be opened
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._offsets = array('Q', [0])
+        self._indexed_to = 0
+        self.complete = False
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+    def _index_until(self, line_count: int):
+        """Extend the line index until it covers line_count lines or the end of file."""
+        while not self.complete and len(self._offsets) <= line_count:
+            self._file.seek(self._indexed_to)
+            block = self._file.read(INDEX_BLOCK)
+            if not block:
+                self.complete = True
+                if self._offsets[-1] != self._indexed_to:
+                    self._offsets.append(self._indexed_to)  # last line has no newline
+                break
+            # Each newline starts a line: offsets are running sums of the
+            # line lengths (newline included), summed without a Python loop
+            lengths = map((1).__add__, map(len, block.split(b'\n')[:-1]))
+            self._offsets.extend(islice(accumulate(lengths, initial=self._indexed_to), 1, None))
+            self._indexed_to += len(block)
+
+    def line_count(self) -> Optional[int]:
+        """Number of lines if the whole file has been indexed, else None."""
+        return len(self._offsets) - 1 if self.complete else None
+
+    def count_lines(self) -> int:
+        """Index the whole file and return its number of lines."""
+        while not self.complete:
+            self._index_until(len(self._offsets) + 100000)
+        return len(self._offsets) - 1
+
+    def text(self, start: int, count: int) -> str:
+        """
+        Return up to count lines starting at line start (0-based) as read.
+
+        The lines are decoded in one go and not split: each keeps its
+        newline (the last one may lack it) and tabs are left unexpanded.
+        """
+        self._index_until(start + count)
+        end = min(start + count, len(self._offsets) - 1)
+        if start >= end:
+            return ''
+        self._file.seek(self._offsets[start])
+        return self._file.read(self._offsets[end] - self._offsets[start]).decode('utf-8', 'replace')
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """Return up to count lines starting at line start (0-based)."""
+        text = self.text(start, count)
+        if not text:
+            return []
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        return [line.rstrip('\r').expandtabs(TAB_WIDTH) for line in lines]
+
+
+class FilePreview:
+    """Tokenized, cached view of a file that renders one viewport at a time."""
+
+    def __init__(self, path: Path, language: Optional[Language] = None):
+        """
+        Initialize the preview.
+
+        Args:
+            path: File to preview
+            language: Tokenizer language (detected from the file if omitted)
+        """
+        self.source = FileSource(path)
+        first = self.source.lines(0, 1)
+        self.language = language or detect_language(Path(path), first[0] if first else '')
+        self.tokenizer = Tokenizer(self.language)
+        self._chunks: 'OrderedDict[int, List[List[Segment]]]' = OrderedDict()
+        self._states: List[Optional[str]] = [None]
+        self.tokenized_chunks = 0
+
+    def close(self):
+        """Close the file."""
+        self.source.close()
+
+    def _chunk(self, index: int) -> List[List[Segment]]:
+        """Return the tokens of a chunk, tokenizing (and evicting) as needed."""
+        cached = self._chunks.get(index)
+        if cached is not None:
+            self._chunks.move_to_end(index)
+            return cached
+        # States are only known up to the furthest chunk reached so far
+        for earlier in range(len(self._states) - 1, index):
+            if self.tokenizer.stateful:
+                text = self.source.text(earlier * CHUNK_LINES, CHUNK_LINES)
+                self._states.append(self.tokenizer.carry(text, self._states[earlier]))
+            else:
+                self._states.append(None)
+
+        state = self._states[index]
+        rows = []
+        for text in self.source.lines(index * CHUNK_LINES, CHUNK_LINES):
+            segments, state = self.tokenizer.line(text, state)
+            rows.append(segments)
+        self.tokenized_chunks += 1
+        if len(self._states) == index + 1:
+            self._states.append(state)
+        self._chunks[index] = rows
+        while len(self._chunks) > MAX_CHUNKS:
+            self._chunks.popitem(last=False)
+        return rows
+
+    def rows(self, start: int, count: int) -> List[List[Segment]]:
+        """Return the tokens of count lines starting at line start (0-based)."""
+        rows: List[List[Segment]] = []
+        line = start
+        while len(rows) < count:
+            chunk = self._chunk(line // CHUNK_LINES)
+            offset = line % CHUNK_LINES
+            if offset >= len(chunk):
+                break
+            taken = chunk[offset:offset + count - len(rows)]
+            rows.extend(taken)
+            line += len(taken)
+        return rows
+
+    def render(self, scheme: ColorScheme, start: int, height: int, width: int,
+               title: str = '', mode: Optional[str] = None) -> str:
+        """
+        Render the lines of one viewport in a theme's colors.
+
+        Args:
+            scheme: Parsed colorscheme
+            start: First line shown (0-based)
+            height: Total rows of the frame, borders included
+            width: Frame width
+            title: Text of the header row
+            mode: 'truecolor' or '256' (detected from the terminal if omitted)
+        """
+        styles = ThemeStyles(scheme, mode or detect_color_mode())
+        frame = FrameBuilder(styles, width)
+        body = max(1, height - 4)
+        rows = self.rows(start, body)
+
+        total = self.source.line_count()
+        position = f"{start + 1}-{start + len(rows)}/{total if total is not None else '?'}"
+        header = f" {title}".ljust(width - 2 - len(position) - 1) + position + ' '
+        frame.rule('╔', '╗')
+        frame.row([('Title', header)])
+        frame.rule('╠', '╣')
+        number_width = max(4, len(str(start + body)))
+        for offset in range(body):
+            if offset < len(rows):
+                frame.row([('LineNr', f' {start + offset + 1:>{number_width}} ')] + rows[offset])
+            else:
+                frame.row([('NonText', ' ~')])
+        frame.rule('╚', '╝')
+        return frame.text()
+
+
+class FilePager:
+    """Pages through a file preview and cycles themes on a terminal."""
+
+    def __init__(self, preview: FilePreview, themes: List[str],
+                 scheme: Callable[[str], ColorScheme], theme: str):
+        """
+        Initialize the pager.
+
+        Args:
+            preview: File to show
+            themes: Themes to cycle through with the left/right keys
+            scheme: Returns the parsed colorscheme of a theme
+            theme: Theme shown first
+        """
+        self.preview = preview
+        self.themes = themes
+        self.scheme = scheme
+        self.index = themes.index(theme) if theme in themes else 0
+        self.top = 0
+        self.page = 20
+
+    @property
+    def theme(self) -> str:
+        """The theme being shown."""
+        return self.themes[self.index]
+
+    def handle(self, key: str) -> Optional[str]:
+        """Apply one key; returns 'select' or 'cancel' to close the pager."""
+        if key in ('q', 'escape', 'interrupt'):
+            return 'cancel'
+        if key == 'enter':
+            return 'select'
+        if key in ('down', 'j'):
+            self.top += 1
+        elif key in ('up', 'k'):
+            self.top -= 1
+        elif key in ('page-down', ' ', 'f'):
+            self.top += self.page
+        elif key in ('page-up', 'b'):
+            self.top -= self.page
+        elif key in ('home', 'g'):
+            self.top = 0
+        elif key in ('end', 'G'):
+            self.top = self.preview.source.count_lines() - self.page
+        elif key in ('n', 'l', 'right', '\t'):
+            self.index = (self.index + 1) % len(self.themes)
+        elif key in ('p', 'h', 'left'):
+            self.index = (self.index - 1) % len(self.themes)
+        self.top = max(0, self.top)
+        return None
+
+    def compose(self, width: int, height: int):
+        """Render the viewport for the terminal size."""
+        from theme_picker import parse_ansi
+
+        self.page = max(1, height - 5)
+        # Do not page past the end once it is known
+        if self.preview.rows(self.top, 1) == [] and self.top > 0:
+            total = self.preview.source.count_lines()
+            self.top = max(0, total - self.page)
+        title = (f"{self.preview.source.path.name} · {self.theme}   "
+                 f"←/→ theme · space/b page · Enter apply · q quit")
+        text = self.preview.render(self.scheme(self.theme), self.top, height - 1, width, title)
+        rows = parse_ansi(text, width)
+        return [row + [('', ' ')] * (width - len(row)) for row in rows[:height]]
+
+    def run(self) -> Optional[str]:
+        """Run on the terminal; returns the theme to apply, or None."""
+        from theme_picker import run_terminal
+
+        action, _ = run_terminal(self.compose, self.handle)
+        return self.theme if action == 'select' else None
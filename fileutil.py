@@ -0,0 +1,101 @@
+"""
+File Utilities
+
+Small filesystem helpers shared by the configuration scripts.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+def atomic_write(path: Path, data: bytes, mode: Optional[int] = None, fsync: bool = True):
+    """
+    Write a file atomically.
+
+    The data goes to a temporary file in the same directory which is then
+    renamed over the destination, so readers see either the old or the new
+    content and never a truncated file. A symlinked destination (e.g.
+    ~/.vimrc pointing into a dotfiles repository) is written through: the
+    file it points to is replaced and the link is kept. The owner of the
+    file being replaced is kept as well.
+
+    Args:
+        path: Destination file
+        data: Content to write
+        mode: Permission bits for the new file (defaults to those of the file
+            being replaced, or 0o644)
+        fsync: If True, flush file and directory to stable storage
+    """
+    path = Path(os.path.realpath(path))
+    try:
+        current: Optional[os.stat_result] = path.stat()
+    except FileNotFoundError:
+        current = None
+    if mode is None:
+        mode = current.st_mode & 0o7777 if current is not None else 0o644
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if current is not None:
+            _copy_owner(tmp_path, current)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    if fsync:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _copy_owner(path: str, st: os.stat_result):
+    """Give a file the owner and group in st (as far as this process may)."""
+    tmp = os.stat(path)
+    if (tmp.st_uid, tmp.st_gid) == (st.st_uid, st.st_gid):
+        return
+    try:
+        os.chown(path, st.st_uid, st.st_gid)
+    except PermissionError:
+        # Unprivileged: another user's file cannot be given away
+        pass
+
+
+def make_private_dirs(path: Path):
+    """
+    Create a directory and any missing parents, each with mode 0700.
+
+    Path.mkdir(parents=True, mode=...) applies the mode to the last directory
+    only, so a cache written before ensure_vim_directories would otherwise
+    leave ~/.vim created with the umask default.
+
+    Args:
+        path: Directory to create
+
+    Raises:
+        FileExistsError: If a component exists and is not a directory
+    """
+    path = Path(path)
+    missing = []
+    while not path.is_dir():
+        missing.append(path)
+        path = path.parent
+    for directory in reversed(missing):
+        try:
+            directory.mkdir(mode=0o700)
+        except FileExistsError:
+            if not directory.is_dir():
+                raise
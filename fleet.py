@@ -0,0 +1,339 @@
+"""
+Fleet Provisioning
+
+Applies the vim configuration to many home directories in one run.
+Targets are read from a manifest, the configuration is rendered once per
+distinct (profile, options) combination (or served from the render cache),
+and the per-home work (drift check, backup, directory creation and write)
+is spread over a process pool. Fleets usually run as root, so everything
+created under a home is then given to the owner of the home directory.
+
+Manifest format (one target per line, '#' starts a comment):
+    /home/alice
+    {"home": "/home/bob", "options": {"tab_width": 2}}
+    {"home": "/home/carol", "profile": "backend"}
+
+Options of a target override those of its profile (see profiles/).
+
+A JSON array of the same objects is also accepted.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import instrumentation
+from drift_index import hash_bytes
+from drift_report import report_for_home
+from profiles import ProfileStore
+from setup_vim import DEFAULT_OPTIONS, VimConfigManager, merge_options
+
+
+# Rendered configurations shared with worker processes, indexed by render id.
+# Populated once per worker by _init_worker so jobs only carry a small index.
+_RENDERED: List[Tuple[str, str]] = []
+
+
+def load_manifest(manifest_path: Path) -> List[Dict[str, Any]]:
+    """
+    Load fleet targets from a manifest file.
+
+    Args:
+        manifest_path: Path to the manifest (JSON array or one target per line)
+
+    Returns:
+        List of targets with 'home', 'profile' and fully merged 'options'
+
+    Raises:
+        ValueError: If an entry is malformed, uses an unknown option or
+            names a profile that cannot be resolved
+    """
+    with open(manifest_path, 'r') as f:
+        text = f.read()
+    profiles = ProfileStore(known_options=DEFAULT_OPTIONS)
+
+    if text.lstrip().startswith('['):
+        entries = [(i + 1, entry) for i, entry in enumerate(json.loads(text))]
+    else:
+        entries = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line) if line.startswith('{') else {'home': line}
+            entries.append((lineno, entry))
+
+    targets = []
+    for lineno, entry in entries:
+        if isinstance(entry, str):
+            entry = {'home': entry}
+        if not isinstance(entry, dict) or not entry.get('home'):
+            raise ValueError(f"{manifest_path}:{lineno}: target needs a 'home' entry")
+
+        profile = entry.get('profile', 'default')
+        try:
+            options = merge_options(profiles.resolve(profile).options, entry.get('options'))
+        except ValueError as e:
+            raise ValueError(f"{manifest_path}:{lineno}: {e}")
+
+        targets.append({
+            'home': str(Path(entry['home']).expanduser()),
+            'profile': profile,
+            'options': options,
+        })
+
+    return targets
+
+
+def render_targets(targets: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, str]], List[int]]:
+    """
+    Render the configuration once per distinct (profile, options) combination.
+
+    Combinations rendered by an earlier run with the same profile files,
+    options and platform are read from the render cache instead.
+
+    Args:
+        targets: Targets as returned by load_manifest
+
+    Returns:
+        Tuple of (rendered (content, sha256) pairs, render id for each target)
+    """
+    manager = VimConfigManager(quiet=True)
+    rendered: List[Tuple[str, str]] = []
+    render_ids: Dict[str, int] = {}
+    target_keys: List[str] = []
+
+    # Collect each distinct option set once, grouped by profile
+    pending: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for target in targets:
+        key = json.dumps([target['profile'], target['options']], sort_keys=True)
+        if key not in render_ids:
+            render_ids[key] = -1
+            pending.setdefault(target['profile'], []).append((key, target['options']))
+        target_keys.append(key)
+
+    # Render every option set of a profile from one compiled template
+    for profile, option_sets in pending.items():
+        contents = manager.render_profiles(profile, [opts for _, opts in option_sets])
+        for (key, _), content in zip(option_sets, contents):
+            render_ids[key] = len(rendered)
+            rendered.append((content, hash_bytes(content.encode('utf-8'))))
+
+    return rendered, [render_ids[key] for key in target_keys]
+
+
+def _init_worker(rendered: List[Tuple[str, str]],
+                 trace_phases: Optional[Dict[str, Tuple[str, ...]]] = None):
+    """Receive the rendered configurations once per worker process."""
+    global _RENDERED
+    _RENDERED = rendered
+    if trace_phases is not None:
+        instrumentation.enable(trace_phases, worker=True)
+
+
+def match_home_owner(manager: VimConfigManager, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Give the files provisioning creates in a home to the owner of the home.
+
+    Covers ~/.vimrc, ~/.vim and its backup, swap, undo, cache and
+    vimrc_backups directories, and everything under cache and vimrc_backups.
+    Other files in ~/.vim are the user's and are not walked.
+
+    Args:
+        manager: Manager of the home directory
+        dry_run: If True, only count the paths that would change owner
+
+    Returns:
+        Dictionary with the home's 'uid' and 'gid' and the number of paths
+        'changed' (or that would change, in a dry run)
+    """
+    home = os.stat(manager.home_dir)
+    owner = (home.st_uid, home.st_gid)
+    paths = [manager.vimrc_path, manager.vim_dir, manager.backup_dir, manager.swap_dir,
+             manager.undo_dir]
+    for tree in (manager.cache_dir, manager.backup_store.store_dir):
+        paths.append(tree)
+        for root, dirs, files in os.walk(tree):
+            paths.extend(Path(root) / name for name in dirs + files)
+
+    changed = 0
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            continue
+        if (st.st_uid, st.st_gid) == owner:
+            continue
+        if not dry_run:
+            os.chown(path, *owner, follow_symlinks=False)
+        changed += 1
+    return {'uid': owner[0], 'gid': owner[1], 'changed': changed}
+
+
+def provision_target(job: Tuple[str, int, bool]) -> Dict[str, Any]:
+    """
+    Bring a single home directory in line with its rendered configuration.
+
+    Args:
+        job: Tuple of (home directory, render id, dry run)
+
+    Returns:
+        Result summary with 'home', 'status', 'owner' (see match_home_owner)
+        and, where relevant, 'write' (outcome of apply_config), 'backup' or
+        'error'
+    """
+    home, render_id, dry_run = job
+    result: Dict[str, Any] = {'home': home}
+
+    manager = None
+    try:
+        if not os.path.isdir(home):
+            raise FileNotFoundError(f"home directory does not exist: {home}")
+
+        content, digest = _RENDERED[render_id]
+        manager = VimConfigManager(home_dir=Path(home), dry_run=dry_run, quiet=True)
+        exists = manager.vimrc_path.exists()
+
+        current_digest = manager.calculate_file_hash(manager.vimrc_path) if exists else None
+        if not dry_run:
+            manager.save_drift_index()
+
+        # Keep the theme chosen with select_theme.py; a home that already
+        # matches the render as it is needs no parsing
+        if exists and current_digest != digest:
+            content = manager.carry_over_theme(content)
+            digest = hash_bytes(content.encode('utf-8'))
+
+        if current_digest == digest:
+            result['status'] = 'unchanged'
+            return result
+
+        if exists:
+            backup_path = manager.backup_existing_config()
+            result['backup'] = str(backup_path)
+
+        manager.ensure_vim_directories()
+        result['write'] = manager.apply_config(content)
+        result['status'] = 'updated' if exists else 'created'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        # Also after an unchanged check (the drift index) or a failure midway
+        if manager is not None:
+            try:
+                result['owner'] = match_home_owner(manager, dry_run)
+            except OSError as e:
+                result['status'] = 'error'
+                result['error'] = f"cannot give files to the home's owner: {e}"
+
+    return result
+
+
+def run_fleet(targets: List[Dict[str, Any]], jobs: Optional[int] = None,
+              dry_run: bool = False) -> Iterable[Dict[str, Any]]:
+    """
+    Provision all targets in a process pool.
+
+    Args:
+        targets: Targets as returned by load_manifest
+        jobs: Number of worker processes (defaults to the CPU count)
+        dry_run: If True, report what would change without changing anything
+
+    Yields:
+        Per-target result summaries, in manifest order
+    """
+    rendered, render_ids = render_targets(targets)
+    work = [(t['home'], rid, dry_run) for t, rid in zip(targets, render_ids)]
+    yield from _map_targets(provision_target, work, rendered, jobs)
+
+
+def report_target(job: Tuple[str, int]) -> Dict[str, Any]:
+    """
+    Build the semantic drift report for one home directory (runs in a worker).
+
+    Args:
+        job: (home directory, render id)
+
+    Returns:
+        Drift report, or a report carrying 'error' if the home could not be read
+    """
+    home, render_id = job
+    try:
+        manager = VimConfigManager(home_dir=Path(home), quiet=True)
+        return report_for_home(manager.carry_over_theme(_RENDERED[render_id][0]), Path(home))
+    except Exception as e:
+        return {'home': home, 'error': str(e)}
+
+
+def run_fleet_reports(targets: List[Dict[str, Any]],
+                      jobs: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+    """
+    Build drift reports for all targets in a process pool.
+
+    Args:
+        targets: Targets as returned by load_manifest
+        jobs: Number of worker processes (defaults to the CPU count)
+
+    Yields:
+        Per-target drift reports, in manifest order
+    """
+    rendered, render_ids = render_targets(targets)
+    work = [(t['home'], rid) for t, rid in zip(targets, render_ids)]
+    yield from _map_targets(report_target, work, rendered, jobs)
+
+
+def _map_targets(func, work: List[Tuple], rendered: List[Tuple[str, str]],
+                 jobs: Optional[int]) -> Iterable[Dict[str, Any]]:
+    """Run func over the work items, sharing the rendered configs with every worker."""
+    if not work:
+        return
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(work)))
+    chunksize = max(1, len(work) // (workers * 8))
+    trace_phases = instrumentation.enabled_phases()
+    if trace_phases is not None:
+        func = partial(instrumentation.traced_job, func)
+
+    if workers == 1:
+        _init_worker(rendered)
+        yield from map(func, work)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rendered, trace_phases)) as executor:
+        yield from instrumentation.collect(executor.map(func, work, chunksize=chunksize))
+
+
+def print_fleet_summary(results: List[Dict[str, Any]], verbose: bool = True):
+    """
+    Print per-target results followed by totals.
+
+    Args:
+        results: Result summaries from run_fleet
+        verbose: If False, only list targets that changed or failed
+    """
+    counts: Dict[str, int] = {}
+    for result in results:
+        status = result['status']
+        counts[status] = counts.get(status, 0) + 1
+        if not verbose and status == 'unchanged':
+            continue
+        detail = ''
+        if 'error' in result:
+            detail = f"  ({result['error']})"
+        elif result.get('backup'):
+            detail = f"  (backup: {result['backup']})"
+        print(f"  [{status:>9}] {result['home']}{detail}")
+
+    print("\n" + "=" * 50)
+    print(f"Fleet targets: {len(results)}")
+    for status in ('created', 'updated', 'unchanged', 'error'):
+        if counts.get(status):
+            print(f"  {status}: {counts[status]}")
+    chowned = sum(result.get('owner', {}).get('changed', 0) for result in results)
+    if chowned:
+        print(f"Paths given to their home's owner: {chowned}")
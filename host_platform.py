@@ -0,0 +1,125 @@
+"""
+Host Platform Detection
+
+Detects, at generation time, the facts the vimrc used to probe on every
+vim start: the operating system (previously `system("uname -s")`), the
+clipboard register to use, and whether the installed vim was built with
++clipboard. The facts are rendered into the template as constants, and a
+fingerprint of them is written into the generated file so a config moved
+to, or left behind on, a different platform is detected and regenerated.
+"""
+
+import hashlib
+import platform
+import re
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+
+# Clipboard register per operating system ('*' on macOS, '+' on X11/Wayland)
+CLIPBOARD_SETTINGS: Dict[str, str] = {
+    'Darwin': 'unnamed',
+    'Linux': 'unnamedplus',
+    'FreeBSD': 'unnamedplus',
+    'OpenBSD': 'unnamedplus',
+    'NetBSD': 'unnamedplus',
+}
+
+_FINGERPRINT_RE = re.compile(r'host fingerprint ([0-9a-f]{12})\b')
+_FEATURE_RE = re.compile(r'([+-])(clipboard|xterm_clipboard)\b')
+
+
+def detect_vim_features(vim: str = 'vim') -> Dict[str, Optional[bool]]:
+    """
+    Read clipboard support from `vim --version`.
+
+    Args:
+        vim: vim executable
+
+    Returns:
+        Dictionary with 'clipboard' set to True/False, or None if vim could
+        not be queried
+    """
+    if shutil.which(vim) is None:
+        return {'clipboard': None}
+    try:
+        output = subprocess.run([vim, '--version'], capture_output=True, text=True,
+                                timeout=10, stdin=subprocess.DEVNULL).stdout
+    except (OSError, subprocess.SubprocessError):
+        return {'clipboard': None}
+
+    features = dict((name, sign == '+') for sign, name in _FEATURE_RE.findall(output))
+    if 'clipboard' not in features:
+        return {'clipboard': None}
+    return {'clipboard': features['clipboard']}
+
+
+@lru_cache(maxsize=None)
+def detect_platform(vim: str = 'vim') -> Dict[str, Any]:
+    """
+    Detect the platform facts baked into generated configurations.
+
+    Detection runs once per process.
+
+    Args:
+        vim: vim executable whose features are inspected
+
+    Returns:
+        Dictionary with 'system', 'clipboard' (register setting or '' when
+        not applicable) and 'vim_clipboard' (False only if vim is known to
+        lack +clipboard)
+    """
+    return platform_facts(platform.system(), detect_vim_features(vim)['clipboard'])
+
+
+def platform_facts(system: str, vim_clipboard: Optional[bool]) -> Dict[str, Any]:
+    """
+    Build the platform facts of a host from its system name and vim features.
+
+    Args:
+        system: Operating system, as reported by `uname -s`
+        vim_clipboard: Whether vim has +clipboard (None if unknown)
+
+    Returns:
+        Facts as returned by detect_platform
+    """
+    return {
+        'system': system,
+        'clipboard': CLIPBOARD_SETTINGS.get(system, ''),
+        'vim_clipboard': vim_clipboard is not False,
+    }
+
+
+def platform_fingerprint(facts: Dict[str, Any]) -> str:
+    """Return a short stable digest of platform facts."""
+    canonical = ';'.join(f'{key}={facts[key]}' for key in sorted(facts))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+def platform_options(vim: str = 'vim') -> Dict[str, Any]:
+    """
+    Return the template options describing the current host.
+
+    Returns:
+        Options 'platform', 'clipboard', 'vim_clipboard' and
+        'platform_fingerprint'
+    """
+    return facts_options(detect_platform(vim))
+
+
+def facts_options(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the template options describing a host with the given platform facts."""
+    return {
+        'platform': facts['system'],
+        'clipboard': facts['clipboard'],
+        'vim_clipboard': facts['vim_clipboard'],
+        'platform_fingerprint': platform_fingerprint(facts),
+    }
+
+
+def read_fingerprint(content: str) -> Optional[str]:
+    """Return the host fingerprint recorded in a generated vimrc, if any."""
+    match = _FINGERPRINT_RE.search(content)
+    return match.group(1) if match else None
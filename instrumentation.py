@@ -0,0 +1,421 @@
+"""
+Phase Instrumentation
+
+Times the phases of setup_vim.py and select_theme.py (drift check, backup,
+directory creation, rendering, writes, theme installation, ...) and counts
+the bytes and files each phase reads and writes. The result is written as
+a trace: JSON lines (one object per phase call, then a summary) or the
+Chrome trace format, which chrome://tracing and Perfetto display as a
+timeline.
+
+Nothing is instrumented until enable() is called: the phase methods and
+the file helpers (fileutil.atomic_write, drift_index.hash_file, the
+pathlib read/write helpers, theme installation and template loading) are
+wrapped at that point, so a run without --trace executes the original,
+unwrapped code.
+
+Fleet workers enable instrumentation from their pool initializer and
+return their phase events with each result; the parent merges them into
+one trace with a row per worker process.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+COUNTERS = ('bytes_read', 'bytes_written', 'files_read', 'files_written')
+
+# Phases timed in each script, as 'module:Class' (or 'module') -> callables
+PHASES: Dict[str, Tuple[str, ...]] = {
+    'setup_vim:VimConfigManager': (
+        'setup', 'get_config_options', 'generate_config', 'generate_configs',
+        'carry_over_theme', 'check_platform', 'check_drift', 'backup_existing_config',
+        'ensure_vim_directories', 'apply_config', 'check_local_config',
+    ),
+    'select_theme:ThemeSelector': (
+        'run', 'get_available_themes', 'get_current_theme', 'install_theme_files',
+        'format_theme_list', 'set_theme',
+    ),
+    'fleet': ('load_manifest', 'render_targets'),
+}
+
+# Key fleet workers use to hand their events back with a result
+TRACE_KEY = '_trace'
+
+_RECORDER: Optional['Recorder'] = None
+_ENABLED_PHASES: Optional[Dict[str, Tuple[str, ...]]] = None
+
+
+class Recorder:
+    """Collects timed phase events and I/O counters for one process."""
+
+    def __init__(self, worker: bool = False):
+        """
+        Initialize the recorder.
+
+        Args:
+            worker: True in a pool worker, whose events are returned to the
+                parent instead of being written
+        """
+        self.worker = worker
+        self.origin_ns = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self.totals: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self._local = threading.local()
+
+    def _stack(self) -> List[Dict[str, int]]:
+        """Return the counters of the spans open in the current thread."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, category: str = '', **args: Any) -> Iterator[None]:
+        """
+        Time a phase.
+
+        Counters are inclusive: I/O counted inside a nested phase is also
+        counted for every phase enclosing it.
+
+        Args:
+            name: Phase name
+            category: Grouping shown by trace viewers (e.g. the class name)
+            args: Extra values recorded with the event
+        """
+        stack = self._stack()
+        counters = dict.fromkeys(COUNTERS, 0)
+        stack.append(counters)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            stack.pop()
+            self.events.append({
+                'name': name,
+                'cat': category,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'ts': start // 1000,  # Monotonic clock, shared with worker processes
+                'dur': (end - start) // 1000,
+                'depth': len(stack),
+                'args': dict(args, **counters),
+            })
+
+    def count(self, **amounts: int):
+        """Add I/O amounts (see COUNTERS) to the totals and every open phase."""
+        stack = self._stack()
+        for key, amount in amounts.items():
+            self.totals[key] += amount
+            for counters in stack:
+                counters[key] += amount
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return and forget the events recorded so far."""
+        events, self.events = self.events, []
+        return events
+
+    def merge(self, events: List[Dict[str, Any]]):
+        """Add events recorded by a worker process."""
+        self.events.extend(events)
+        for event in events:
+            if event['depth'] == 0:
+                for key in COUNTERS:
+                    self.totals[key] += event['args'].get(key, 0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return wall time, per-phase call counts and durations, and I/O totals."""
+        phases: Dict[str, Dict[str, Any]] = {}
+        for event in self.events:
+            stats = phases.setdefault(event['name'], {'calls': 0, 'total_ms': 0.0})
+            stats['calls'] += 1
+            stats['total_ms'] += event['dur'] / 1000
+        for stats in phases.values():
+            stats['total_ms'] = round(stats['total_ms'], 3)
+        return {
+            'wall_ms': round((time.perf_counter_ns() - self.origin_ns) / 1e6, 3),
+            'phases': phases,
+            **self.totals,
+        }
+
+    def write(self, path: Path, fmt: str = 'jsonl'):
+        """
+        Write the trace.
+
+        Args:
+            path: Output file
+            fmt: 'jsonl' (one object per phase call, then a summary) or
+                'chrome' (Chrome trace event format)
+        """
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}'")
+        origin = self.origin_ns // 1000
+        events = [dict(e, ts=e['ts'] - origin)
+                  for e in sorted(self.events, key=lambda e: (e['ts'], -e['dur']))]
+        with open(path, 'w') as f:
+            if fmt == 'chrome':
+                trace = [{'name': e['name'], 'cat': e['cat'] or 'phase', 'ph': 'X',
+                          'ts': e['ts'], 'dur': e['dur'], 'pid': e['pid'], 'tid': e['tid'],
+                          'args': e['args']} for e in events]
+                json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms',
+                           'otherData': self.summary()}, f)
+                return
+            for e in events:
+                f.write(json.dumps({
+                    'phase': e['name'],
+                    'category': e['cat'],
+                    'pid': e['pid'],
+                    'start_ms': e['ts'] / 1000,
+                    'duration_ms': e['dur'] / 1000,
+                    'depth': e['depth'],
+                    **e['args'],
+                }, sort_keys=True) + '\n')
+            f.write(json.dumps({'summary': self.summary()}, sort_keys=True) + '\n')
+
+
+def active() -> Optional[Recorder]:
+    """Return the recorder if instrumentation is enabled."""
+    return _RECORDER
+
+
+def enabled_phases() -> Optional[Dict[str, Tuple[str, ...]]]:
+    """Return the phase specification passed to enable(), for pool initializers."""
+    return _ENABLED_PHASES
+
+
+# -- Wrapping ------------------------------------------------------------------
+
+def _modules_named(name: str) -> List[Any]:
+    """Return the loaded module called name, including a script run as __main__."""
+    modules = []
+    if name in sys.modules:
+        modules.append(sys.modules[name])
+    main = sys.modules.get('__main__')
+    main_file = getattr(main, '__file__', None)
+    if main_file and Path(main_file).stem == name and main not in modules:
+        modules.append(main)
+    return modules
+
+
+def _wrap(owner: Any, attr: str, make_wrapper: Callable[[Callable], Callable]):
+    """Replace owner.attr (a module or class attribute) with a wrapper, once."""
+    if isinstance(owner, type):
+        original = next((klass.__dict__[attr] for klass in owner.__mro__
+                         if attr in klass.__dict__), None)
+    else:
+        original = owner.__dict__.get(attr)
+    if original is None or getattr(original, '__instrumented__', False):
+        return
+    is_classmethod = isinstance(original, classmethod)
+    func = original.__func__ if is_classmethod else original
+    wrapper = make_wrapper(func)
+    wrapper.__instrumented__ = True
+    setattr(owner, attr, classmethod(wrapper) if is_classmethod else wrapper)
+
+
+def _rebind(module_name: str, attr: str, make_wrapper: Callable[[Callable], Callable]):
+    """Wrap a module-level function, including copies bound by `from x import f`."""
+    module = sys.modules.get(module_name)
+    original = getattr(module, attr, None)
+    if original is None or getattr(original, '__instrumented__', False):
+        return
+    wrapper = make_wrapper(original)
+    wrapper.__instrumented__ = True
+    for loaded in list(sys.modules.values()):
+        namespace = getattr(loaded, '__dict__', None)
+        if namespace is not None and namespace.get(attr) is original:
+            setattr(loaded, attr, wrapper)
+
+
+def _phase(name: str, category: str) -> Callable[[Callable], Callable]:
+    """Return a wrapper factory timing calls as a phase."""
+    def make_wrapper(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _RECORDER
+            if recorder is None:
+                return func(*args, **kwargs)
+            with recorder.span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return make_wrapper
+
+
+def _counting(before: Optional[Callable] = None,
+              after: Optional[Callable] = None) -> Callable[[Callable], Callable]:
+    """
+    Return a wrapper factory counting I/O.
+
+    before(*args, **kwargs) and after(result, *args, **kwargs) return a dict
+    of counter amounts, measured before and after the call.
+    """
+    def make_wrapper(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _RECORDER
+            if recorder is None:
+                return func(*args, **kwargs)
+            if before is not None:
+                recorder.count(**before(*args, **kwargs))
+            result = func(*args, **kwargs)
+            if after is not None:
+                recorder.count(**after(result, *args, **kwargs))
+            return result
+        return wrapper
+    return make_wrapper
+
+
+def _size(path: Any) -> int:
+    """Return a file's size, or 0 if it cannot be read."""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def _instrument_io():
+    """Count bytes and files at the file helpers the scripts use."""
+    _rebind('fileutil', 'atomic_write', _counting(
+        before=lambda path, data, *a, **k: {'bytes_written': len(data), 'files_written': 1}))
+    _rebind('drift_index', 'hash_file', _counting(
+        before=lambda path, *a, **k: {'bytes_read': _size(path), 'files_read': 1}))
+    _rebind('vimrc_template', 'load_template', _template_read)
+
+    _wrap(Path, 'read_bytes', _counting(
+        after=lambda data, self: {'bytes_read': len(data), 'files_read': 1}))
+    _wrap(Path, 'read_text', _counting(
+        after=lambda text, self, *a, **k: {'bytes_read': len(text), 'files_read': 1}))
+    _wrap(Path, 'write_bytes', _counting(
+        after=lambda n, self, data: {'bytes_written': n, 'files_written': 1}))
+    _wrap(Path, 'write_text', _counting(
+        after=lambda n, self, *a, **k: {'bytes_written': n, 'files_written': 1}))
+
+    model = sys.modules.get('vimrc_model')
+    if model is not None:
+        _wrap(model.VimrcModel, 'from_file', _counting(
+            before=lambda cls, path: {'bytes_read': _size(path), 'files_read': 1}))
+    install = sys.modules.get('theme_install')
+    if install is not None:
+        _wrap(install.ThemeInstaller, '_place', _counting(after=_placed))
+
+
+def _template_read(func: Callable) -> Callable:
+    """Wrap load_template to count the template file when it is (re)compiled."""
+    @functools.wraps(func)
+    def wrapper(template_path):
+        recorder = _RECORDER
+        if recorder is None:
+            return func(template_path)
+        cache = sys.modules['vimrc_template']._CACHE
+        key = os.path.abspath(template_path)
+        before = cache.get(key)
+        result = func(template_path)
+        if cache.get(key) is not before:
+            recorder.count(bytes_read=_size(key), files_read=1)
+        return result
+    return wrapper
+
+
+def _placed(mode: str, installer: Any, source: Path, dest: Path) -> Dict[str, int]:
+    """Count a theme file placed by ThemeInstaller (links copy no bytes)."""
+    size = _size(source) if mode == 'copy' else 0
+    return {'bytes_read': size, 'bytes_written': size, 'files_read': 1, 'files_written': 1}
+
+
+def enable(phases: Optional[Dict[str, Tuple[str, ...]]] = None,
+           worker: bool = False) -> Recorder:
+    """
+    Start instrumenting this process.
+
+    Only modules already imported are instrumented; call this after the
+    script's imports (fleet workers call it from their initializer).
+
+    Args:
+        phases: Phase specification (defaults to PHASES)
+        worker: True in a pool worker
+
+    Returns:
+        The recorder collecting this process's events
+    """
+    global _RECORDER, _ENABLED_PHASES
+    phases = PHASES if phases is None else phases
+    for spec, names in phases.items():
+        module_name, _, class_name = spec.partition(':')
+        for module in _modules_named(module_name):
+            if class_name:
+                cls = getattr(module, class_name, None)
+                if cls is None:
+                    continue
+                for name in names:
+                    _wrap(cls, name, _phase(name, class_name))
+            else:
+                for name in names:
+                    _wrap(module, name, _phase(name, module_name))
+    _instrument_io()
+    _RECORDER = Recorder(worker=worker)
+    _ENABLED_PHASES = phases
+    return _RECORDER
+
+
+def trace_to(path: Path, fmt: str = 'jsonl',
+             phases: Optional[Dict[str, Tuple[str, ...]]] = None) -> Recorder:
+    """
+    Enable instrumentation and write the trace when the process exits.
+
+    Args:
+        path: Trace file
+        fmt: 'jsonl' or 'chrome'
+        phases: Phase specification (defaults to PHASES)
+
+    Returns:
+        The recorder
+    """
+    recorder = enable(phases)
+
+    def write_trace():
+        try:
+            recorder.write(path, fmt)
+            print(f"Trace written to {path}", file=sys.stderr)
+        except OSError as e:
+            print(f"Warning: could not write trace to {path}: {e}", file=sys.stderr)
+
+    atexit.register(write_trace)
+    return recorder
+
+
+def traced_job(func: Callable[[Any], Dict[str, Any]], job: Any) -> Dict[str, Any]:
+    """
+    Run one pool job as a phase.
+
+    In a worker process the events recorded for the job are attached to
+    its result under TRACE_KEY, for collect() to merge in the parent.
+    """
+    recorder = _RECORDER
+    if recorder is None:
+        return func(job)
+    label = job[0] if isinstance(job, tuple) and job else job
+    with recorder.span(func.__name__, 'job', job=str(label)):
+        result = func(job)
+    if recorder.worker:
+        result = dict(result, **{TRACE_KEY: recorder.drain()})
+    return result
+
+
+def collect(results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Merge worker events attached to results into this process's recorder."""
+    for result in results:
+        events = result.pop(TRACE_KEY, None)
+        if events is not None and _RECORDER is not None:
+            _RECORDER.merge(events)
+        yield result
@@ -0,0 +1,302 @@
+"""
+Configuration Profiles
+
+Profiles layer team settings over a base template. Each profile is a JSON
+file in profiles/ that either names a template (a root profile) or extends
+another profile:
+
+    {
+        "description": "Backend services: 100-column guide, Go and Python tweaks",
+        "extends": "default",
+        "options": {"tab_width": 4},
+        "overlay": "backend.vim"
+    }
+
+Options are merged down the chain, ancestors first. Overlays are vim script
+in the template syntax; those of every profile in the chain are spliced, in
+chain order, where the template has a {{>overlays}} line.
+
+Rendered configurations are cached by content. The cache key combines the
+digest of every file in the chain (profile files, template and overlays),
+the digest of the options and the host platform fingerprint, so a render is
+reused across runs and homes until one of its own ancestors changes; edits
+to unrelated profiles leave it valid.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from drift_index import hash_bytes, hash_file, stat_signature
+from fileutil import atomic_write, make_private_dirs
+from vimrc_template import CompiledTemplate
+
+
+PROFILES_DIR = Path(__file__).parent.absolute() / 'profiles'
+
+# Rendered configurations kept in the cache before the oldest are pruned
+DEFAULT_CACHE_ENTRIES = 256
+
+# Longest allowed chain of 'extends'
+MAX_DEPTH = 16
+
+_NAME_RE = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+_PROFILE_KEYS = {'description', 'extends', 'template', 'options', 'overlay'}
+
+# File digests keyed by absolute path, validated by stat signature
+_DIGESTS: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+
+
+class ProfileError(ValueError):
+    """Raised when a profile is missing, malformed or its chain is broken."""
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA256 digest of a file, rehashing it only if its stat signature moved."""
+    key = os.path.abspath(path)
+    signature = stat_signature(os.stat(key))
+    cached = _DIGESTS.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    digest = hash_file(Path(key))
+    _DIGESTS[key] = (signature, digest)
+    return digest
+
+
+@dataclass
+class Profile:
+    """One profile file."""
+
+    name: str
+    path: Path
+    description: str = ''
+    extends: Optional[str] = None
+    template: Optional[Path] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+    overlay: Optional[Path] = None
+
+
+@dataclass
+class ResolvedProfile:
+    """A profile with its ancestors: what a render of it depends on."""
+
+    name: str
+    chain: List[Profile]  # root first
+    template: Path
+    options: Dict[str, Any]
+    overlays: List[Path]
+
+    @property
+    def files(self) -> List[Path]:
+        """Every file the rendered configuration depends on."""
+        return [p.path for p in self.chain] + [self.template] + self.overlays
+
+    def digests(self) -> List[str]:
+        """Digests of the files, in the order of files."""
+        return [file_digest(path) for path in self.files]
+
+
+class ProfileStore:
+    """Loads and resolves the profiles of a directory."""
+
+    def __init__(self, profiles_dir: Path = PROFILES_DIR,
+                 known_options: Optional[Iterable[str]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            profiles_dir: Directory holding <name>.json profile files
+            known_options: Option names profiles may set (None: any)
+        """
+        self.profiles_dir = Path(profiles_dir)
+        self.known_options = set(known_options) if known_options is not None else None
+        self._resolved: Dict[str, Tuple[List[Tuple[int, int, int]], ResolvedProfile]] = {}
+        self._compiled: Dict[Tuple[str, ...], CompiledTemplate] = {}
+
+    def names(self) -> List[str]:
+        """Return the names of all profiles."""
+        try:
+            return sorted(path.stem for path in self.profiles_dir.glob('*.json'))
+        except OSError:
+            return []
+
+    def load(self, name: str) -> Profile:
+        """
+        Load one profile file.
+
+        Raises:
+            ProfileError: If the profile does not exist or is malformed
+        """
+        if not _NAME_RE.fullmatch(name):
+            raise ProfileError(f"invalid profile name '{name}'")
+        path = self.profiles_dir / f'{name}.json'
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            known = ', '.join(self.names()) or 'none'
+            raise ProfileError(f"unknown profile '{name}' (available: {known})")
+        except (OSError, ValueError) as e:
+            raise ProfileError(f"{path}: {e}")
+
+        if not isinstance(data, dict):
+            raise ProfileError(f"{path}: a profile is a JSON object")
+        unknown = set(data) - _PROFILE_KEYS
+        if unknown:
+            raise ProfileError(f"{path}: unknown key(s): {', '.join(sorted(unknown))}")
+        if ('extends' in data) == ('template' in data):
+            raise ProfileError(f"{path}: a profile needs either 'extends' or 'template'")
+        options = data.get('options', {})
+        if not isinstance(options, dict):
+            raise ProfileError(f"{path}: 'options' must be an object")
+        if self.known_options is not None:
+            unknown = set(options) - self.known_options
+            if unknown:
+                raise ProfileError(f"{path}: unknown option(s): {', '.join(sorted(unknown))}")
+
+        def relative(key: str) -> Optional[Path]:
+            return (self.profiles_dir / data[key]).resolve() if data.get(key) else None
+
+        return Profile(name=name, path=path, description=data.get('description', ''),
+                       extends=data.get('extends'), template=relative('template'),
+                       options=options, overlay=relative('overlay'))
+
+    def resolve(self, name: str) -> ResolvedProfile:
+        """
+        Resolve a profile and its ancestors.
+
+        Resolutions are reused while none of the files in the chain changed.
+
+        Raises:
+            ProfileError: If a profile in the chain is missing or malformed,
+                the chain is circular, or a template or overlay is missing
+        """
+        cached = self._resolved.get(name)
+        if cached is not None:
+            try:
+                if [stat_signature(os.stat(path)) for path in cached[1].files] == cached[0]:
+                    return cached[1]
+            except OSError:
+                pass
+
+        chain: List[Profile] = []
+        current: Optional[str] = name
+        while current is not None:
+            if any(p.name == current for p in chain):
+                cycle = ' -> '.join([p.name for p in chain] + [current])
+                raise ProfileError(f"circular profile inheritance: {cycle}")
+            if len(chain) >= MAX_DEPTH:
+                raise ProfileError(f"profile '{name}' extends more than {MAX_DEPTH} levels deep")
+            profile = self.load(current)
+            chain.append(profile)
+            current = profile.extends
+        chain.reverse()
+
+        options: Dict[str, Any] = {}
+        for profile in chain:
+            options.update(profile.options)
+        resolved = ResolvedProfile(
+            name=name,
+            chain=chain,
+            template=chain[0].template,
+            options=options,
+            overlays=[p.overlay for p in chain if p.overlay is not None],
+        )
+        try:
+            signatures = [stat_signature(os.stat(path)) for path in resolved.files]
+        except FileNotFoundError as e:
+            raise ProfileError(f"profile '{name}': file not found: {e.filename}")
+        self._resolved[name] = (signatures, resolved)
+        return resolved
+
+    def compile(self, resolved: ResolvedProfile) -> CompiledTemplate:
+        """Return the template of a resolved profile with its overlays spliced in."""
+        key = tuple(resolved.digests())
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            overlays = []
+            for profile in resolved.chain:
+                if profile.overlay is not None:
+                    with open(profile.overlay, 'r') as f:
+                        text = f.read()
+                    overlays.append(f'\n" --- Profile: {profile.name} ---\n{text}')
+            with open(resolved.template, 'r') as f:
+                source = f.read()
+            compiled = CompiledTemplate(source, name=resolved.template.name,
+                                        partials={'overlays': ''.join(overlays)})
+            self._compiled[key] = compiled
+        return compiled
+
+
+class RenderCache:
+    """Content-addressed store of rendered configurations."""
+
+    def __init__(self, cache_dir: Path, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding one <key>.vim file per rendered configuration
+            max_entries: Entries kept; the least recently written are pruned
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(digests: List[str], options: Dict[str, Any]) -> str:
+        """
+        Return the cache key of a render.
+
+        Args:
+            digests: Digests of the files of the profile being rendered
+                (ResolvedProfile.digests())
+            options: Complete options, platform facts included
+        """
+        options_digest = hash_bytes(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+        parts = [digests, options_digest, options.get('platform_fingerprint')]
+        return hash_bytes(json.dumps(parts).encode('utf-8'))
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached configuration, or None."""
+        try:
+            with open(self.cache_dir / f'{key}.vim', 'r') as f:
+                content = f.read()
+        except (FileNotFoundError, UnicodeDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return content
+
+    def put(self, key: str, content: str):
+        """
+        Store a configuration and prune the oldest entries beyond the limit.
+
+        Raises:
+            OSError: If the cache directory cannot be written
+        """
+        make_private_dirs(self.cache_dir)
+        atomic_write(self.cache_dir / f'{key}.vim', content.encode('utf-8'), fsync=False)
+        self.prune()
+
+    def prune(self) -> int:
+        """Remove the least recently written entries beyond max_entries; returns the count."""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.vim')]
+        except FileNotFoundError:
+            return 0
+        if len(entries) <= self.max_entries:
+            return 0
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        removed = 0
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.unlink(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
@@ -0,0 +1,8 @@
+set textwidth=100             " Wrap comments at 100 columns
+set colorcolumn=+1            " Mark the column after textwidth
+if has("autocmd")
+    autocmd FileType go setlocal noexpandtab tabstop={{tab_width}} shiftwidth={{tab_width}}
+    autocmd FileType python setlocal textwidth=88
+    autocmd FileType yaml,json setlocal tabstop=2 shiftwidth=2 softtabstop=2
+    autocmd FileType make setlocal noexpandtab
+endif
@@ -0,0 +1,10 @@
+set nowrap                    " Keep table rows on one line
+set sidescroll=1              " Scroll sideways one column at a time
+set synmaxcol=500             " Stop highlighting very long lines
+if has("autocmd")
+    autocmd FileType sql setlocal tabstop=2 shiftwidth=2 softtabstop=2
+    autocmd FileType csv,tsv setlocal noexpandtab cursorcolumn
+    " Large extracts: no swap or undo history, no syntax
+    autocmd BufReadPre * if getfsize(expand("<afile>")) > 50000000 |
+        \ setlocal noswapfile noundofile syntax=off | endif
+endif
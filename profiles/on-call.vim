@@ -0,0 +1,5 @@
+set noswapfile                " No swap files on shared hosts
+set noundofile                " No undo history written to disk
+set viminfo=                  " No command or search history written to disk
+set nomodeline                " Ignore modelines in files being inspected
+set nowrap                    " Keep log lines on one line
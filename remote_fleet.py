@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+Remote Fleet Orchestrator
+
+Pushes the vim configuration to remote hosts concurrently with asyncio.
+Each host runs the same pipeline as setup_vim.py and select_theme.py:
+
+    probe -> render -> drift check -> backup -> apply -> set theme
+
+One round trip probes the host: its operating system (`uname -s`), whether
+its vim has +clipboard, the sha256 of ~/.vimrc (and of the selected theme
+file) and its backup index. The configuration is rendered locally for the
+host's platform, once per distinct platform, profile and options. Hosts
+that are not given a theme keep the one their ~/.vimrc names, so for them
+the probe also fetches ~/.vimrc.
+
+Hosts whose files already match receive no bytes. Changed hosts get their
+~/.vimrc backed up into the host's backup store (~/.vim/vimrc_backups, the
+store setup_vim.py --restore reads), the vim directories created, and the
+new files written atomically.
+
+Hosts are reached through a transport. Both transports run the same small
+POSIX shell scripts:
+
+    ssh     one multiplexed connection per host (ControlMaster), reused by
+            every step and retry
+    local   each "host" is a local directory used as HOME; stands in for
+            real hosts in tests and dry runs of a rollout
+
+Concurrency is bounded, every attempt has a per-host timeout, and
+connection failures and timeouts are retried with exponential backoff.
+
+Hosts file format (one host per line, '#' starts a comment):
+    dev1.example.com
+    {"host": "alice@dev2", "options": {"tab_width": 2}, "theme": "nord"}
+    {"host": "dev3", "profile": "minimal"}
+
+Usage:
+    python remote_fleet.py hosts.txt --theme nord
+    python remote_fleet.py hosts.txt --concurrency 32 --timeout 20 --retries 3
+    python remote_fleet.py homes.txt --transport local --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from backup_store import BackupStore, dump_index
+from drift_index import hash_bytes
+from fleet import print_fleet_summary
+from host_platform import facts_options, platform_facts
+from profiles import ProfileStore
+from setup_vim import DEFAULT_OPTIONS, VimConfigManager, carry_theme, merge_options
+from vimrc_model import VimrcModel
+
+
+TRANSPORTS = ('ssh', 'local')
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+
+# Exit status ssh uses for its own (connection) errors
+SSH_ERROR = 255
+
+# Backup store of a host, relative to its home directory
+BACKUP_STORE = '.vim/vimrc_backups'
+
+# Remote scripts; each runs with sh -c in $HOME and takes its inputs as arguments
+_SHA256 = r'''
+sha256() {
+    { sha256sum "$1" 2>/dev/null || shasum -a 256 "$1"; } | cut -d' ' -f1
+}
+'''
+
+# Prints the system, vim's clipboard feature (+, - or ?), "<sha256> <size>"
+# or "-" for each file, then the backup index and optionally ~/.vimrc, each
+# as "<size>" followed by the content, or "-"
+_PROBE_SCRIPT = _SHA256 + r'''
+cd "$HOME" || exit 1
+uname -s
+if command -v vim >/dev/null 2>&1; then
+    case " $(vim --version 2>/dev/null | tr '\n' ' ') " in
+        *' +clipboard '*) echo + ;;
+        *' -clipboard '*) echo - ;;
+        *) echo '?' ;;
+    esac
+else
+    echo '?'
+fi
+emit() {
+    if [ -f "$1" ]; then
+        wc -c < "$1" | tr -d ' '
+        cat "$1"
+    else
+        echo -
+    fi
+}
+fetch=$1
+shift
+for f in "$@"; do
+    if [ -f "$f" ]; then
+        echo "$(sha256 "$f") $(wc -c < "$f" | tr -d ' ')"
+    else
+        echo -
+    fi
+done
+emit .vim/vimrc_backups/index.json
+if [ -n "$fetch" ]; then
+    emit .vimrc
+fi
+'''
+
+# Creates the vim directories; given a digest, stores ~/.vimrc under it in
+# the backup store, installs the index from stdin and LATEST from $2, and
+# deletes the objects named by the remaining arguments
+_PREPARE_SCRIPT = _SHA256 + r'''
+cd "$HOME" || exit 1
+(umask 077 && mkdir -p .vim/backup .vim/swap .vim/undo .vim/colors) || exit 1
+[ -n "$1" ] || exit 0
+if [ "$(sha256 .vimrc)" != "$1" ]; then
+    echo "~/.vimrc changed during the run" >&2
+    exit 1
+fi
+put() {
+    tmp="$1.tmp.$$"
+    if cat > "$tmp" && chmod 600 "$tmp" && mv -f "$tmp" "$1"; then
+        return 0
+    fi
+    rm -f "$tmp"
+    return 1
+}
+store=.vim/vimrc_backups
+obj="$store/objects/$(printf '%.2s' "$1")/$1"
+(umask 077 && mkdir -p "${obj%/*}") || exit 1
+if [ ! -f "$obj" ]; then
+    put "$obj" < .vimrc || exit 1
+fi
+put "$store/index.json" || exit 1
+printf '%s' "$2" | put "$store/LATEST" || exit 1
+shift 2
+for digest in "$@"; do
+    rm -f "$store/objects/$(printf '%.2s' "$digest")/$digest"
+done
+'''
+
+_WRITE_SCRIPT = r'''
+cd "$HOME" || exit 1
+tmp="$1.tmp.$$"
+if cat > "$tmp" && chmod "$2" "$tmp" && mv -f "$tmp" "$1"; then
+    exit 0
+fi
+rm -f "$tmp"
+exit 1
+'''
+
+
+class TransportError(Exception):
+    """A remote command failed."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Transport(ABC):
+    """
+    Runs shell scripts in a host's home directory.
+
+    Subclasses implement _spawn; the file operations the pipeline needs are
+    built on it here.
+    """
+
+    def __init__(self, host: str):
+        """
+        Initialize the transport.
+
+        Args:
+            host: Host this transport reaches
+        """
+        self.host = host
+        self.round_trips = 0
+
+    @abstractmethod
+    async def _spawn(self, argv: Sequence[str], stdin: bool) -> asyncio.subprocess.Process:
+        """Start `sh -c script args...` on the host."""
+
+    def _is_connection_error(self, returncode: int) -> bool:
+        """Return True if an exit status means the host could not be reached."""
+        return False
+
+    async def run(self, script: str, args: Sequence[str] = (), data: Optional[bytes] = None) -> bytes:
+        """
+        Run a script on the host.
+
+        Args:
+            script: POSIX shell script (run in $HOME)
+            args: Positional arguments for the script
+            data: Bytes fed to the script's stdin
+
+        Returns:
+            The script's stdout
+
+        Raises:
+            TransportError: If the script fails or the host is unreachable
+        """
+        self.round_trips += 1
+        proc = await self._spawn(['sh', '-c', script, 'sh', *args], stdin=data is not None)
+        try:
+            stdout, stderr = await proc.communicate(data)
+        except asyncio.CancelledError:
+            # Timed out: do not leave the process (or the connection) behind
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        if proc.returncode != 0:
+            message = stderr.decode('utf-8', 'replace').strip() or f'exit status {proc.returncode}'
+            raise TransportError(message, retryable=self._is_connection_error(proc.returncode))
+        return stdout
+
+    async def probe(self, paths: Sequence[str], fetch_vimrc: bool = False) -> Dict[str, Any]:
+        """
+        Read the platform facts, file digests and backup index of the host.
+
+        Args:
+            paths: Files relative to $HOME to hash
+            fetch_vimrc: Also return the content of ~/.vimrc
+
+        Returns:
+            Dictionary with 'facts' (as host_platform.detect_platform),
+            'digests' ({path: sha256 or None}), 'sizes' ({path: bytes}),
+            'backups' (backup index entries) and 'vimrc' (content or None)
+
+        Raises:
+            TransportError: If the host cannot be probed or the output is malformed
+        """
+        output = await self.run(_PROBE_SCRIPT, ['1' if fetch_vimrc else '', *paths])
+        pos = 0
+
+        def line() -> str:
+            nonlocal pos
+            end = output.find(b'\n', pos)
+            if end < 0:
+                raise TransportError(f'truncated probe output from {self.host}')
+            text = output[pos:end].decode('utf-8', 'replace')
+            pos = end + 1
+            return text
+
+        def blob() -> Optional[bytes]:
+            nonlocal pos
+            size = line()
+            if size == '-':
+                return None
+            if not size.isdigit() or pos + int(size) > len(output):
+                raise TransportError(f'malformed probe output from {self.host}')
+            data = output[pos:pos + int(size)]
+            pos += int(size)
+            return data
+
+        system = line()
+        feature = line()
+        digests: Dict[str, Optional[str]] = {}
+        sizes: Dict[str, int] = {}
+        for path in paths:
+            fields = line().split()
+            if fields == ['-']:
+                digests[path] = None
+            elif len(fields) == 2 and fields[1].isdigit():
+                digests[path], sizes[path] = fields[0], int(fields[1])
+            else:
+                raise TransportError(f'malformed probe output from {self.host}')
+        index = blob()
+        try:
+            backups = json.loads(index).get('entries', []) if index else []
+        except (ValueError, AttributeError):
+            raise TransportError(f'unreadable backup index on {self.host}')
+        return {
+            'facts': platform_facts(system, {'+': True, '-': False}.get(feature)),
+            'digests': digests,
+            'sizes': sizes,
+            'backups': backups,
+            'vimrc': blob() if fetch_vimrc else None,
+        }
+
+    async def prepare(self, backup_digest: Optional[str] = None,
+                      entries: Sequence[Dict[str, Any]] = (), obsolete: Sequence[str] = ()):
+        """
+        Create the vim directories and, optionally, back up ~/.vimrc.
+
+        Args:
+            backup_digest: sha256 of the ~/.vimrc to store (None: no backup)
+            entries: The host's new backup index, the backup included
+            obsolete: Digests of stored objects no longer referenced
+        """
+        if backup_digest is None:
+            await self.run(_PREPARE_SCRIPT, [''])
+            return
+        await self.run(_PREPARE_SCRIPT, [backup_digest, json.dumps(entries[-1]), *obsolete],
+                       dump_index(list(entries)))
+
+    async def write(self, path: str, data: bytes, mode: int = 0o644):
+        """Write a file relative to $HOME atomically."""
+        await self.run(_WRITE_SCRIPT, [path, format(mode, 'o')], data)
+
+    async def close(self):
+        """Release the connection."""
+
+
+class LocalTransport(Transport):
+    """Treats a local directory as the host's home directory."""
+
+    async def _spawn(self, argv: Sequence[str], stdin: bool) -> asyncio.subprocess.Process:
+        if not os.path.isdir(self.host):
+            raise TransportError(f'home directory does not exist: {self.host}')
+        env = dict(os.environ, HOME=os.path.abspath(self.host))
+        return await asyncio.create_subprocess_exec(
+            *argv, env=env,
+            stdin=asyncio.subprocess.PIPE if stdin else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+
+class SSHTransport(Transport):
+    """Reaches a host over one multiplexed ssh connection."""
+
+    def __init__(self, host: str, control_dir: str, connect_timeout: float = 10.0,
+                 options: Sequence[str] = ()):
+        """
+        Initialize the transport.
+
+        Args:
+            host: ssh destination ([user@]host)
+            control_dir: Directory for the ControlMaster socket
+            connect_timeout: Seconds ssh may take to connect
+            options: Extra ssh -o options
+        """
+        super().__init__(host)
+        self.ssh_options = [
+            '-o', 'BatchMode=yes',
+            '-o', f'ConnectTimeout={max(1, int(connect_timeout))}',
+            '-o', 'ControlMaster=auto',
+            '-o', f'ControlPath={os.path.join(control_dir, "%C")}',
+            '-o', 'ControlPersist=60',
+        ]
+        for option in options:
+            self.ssh_options += ['-o', option]
+        self._connected = False
+
+    async def _spawn(self, argv: Sequence[str], stdin: bool) -> asyncio.subprocess.Process:
+        self._connected = True
+        return await asyncio.create_subprocess_exec(
+            'ssh', *self.ssh_options, self.host, '--', shlex.join(argv),
+            stdin=asyncio.subprocess.PIPE if stdin else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+    def _is_connection_error(self, returncode: int) -> bool:
+        return returncode == SSH_ERROR
+
+    async def close(self):
+        """Stop the master connection."""
+        if not self._connected:
+            return
+        proc = await asyncio.create_subprocess_exec(
+            'ssh', *self.ssh_options, '-O', 'exit', self.host,
+            stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL)
+        await proc.wait()
+        self._connected = False
+
+
+def load_hosts(hosts_path: Path) -> List[Dict[str, Any]]:
+    """
+    Load hosts from a hosts file.
+
+    Args:
+        hosts_path: Path to the hosts file (JSON array or one host per line)
+
+    Returns:
+        Hosts with 'host', 'profile', fully merged 'options' and 'theme'
+
+    Raises:
+        ValueError: If an entry is malformed, uses an unknown option or
+            names a profile that cannot be resolved
+    """
+    with open(hosts_path, 'r') as f:
+        text = f.read()
+
+    if text.lstrip().startswith('['):
+        entries = [(i + 1, entry) for i, entry in enumerate(json.loads(text))]
+    else:
+        entries = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entries.append((lineno, json.loads(line) if line.startswith('{') else {'host': line}))
+
+    profiles = ProfileStore(known_options=DEFAULT_OPTIONS)
+    hosts = []
+    for lineno, entry in entries:
+        if isinstance(entry, str):
+            entry = {'host': entry}
+        if not isinstance(entry, dict) or not entry.get('host'):
+            raise ValueError(f"{hosts_path}:{lineno}: entry needs a 'host'")
+        profile = entry.get('profile', 'default')
+        try:
+            options = merge_options(profiles.resolve(profile).options, entry.get('options'))
+        except ValueError as e:
+            raise ValueError(f"{hosts_path}:{lineno}: {e}")
+        hosts.append({
+            'host': entry['host'],
+            'profile': profile,
+            'options': options,
+            'theme': entry.get('theme'),
+        })
+    return hosts
+
+
+class RemoteFleet:
+    """Runs the provisioning pipeline against many hosts concurrently."""
+
+    def __init__(self, transport_factory: Callable[[str], Transport],
+                 concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = 0.5, dry_run: bool = False):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            transport_factory: Creates the transport for a host
+            concurrency: Hosts provisioned at once
+            timeout: Seconds one attempt at a host may take
+            retries: Additional attempts after a connection failure or timeout
+            backoff: Delay before the first retry (doubles for each retry)
+            dry_run: If True, only check drift and report what would be pushed
+        """
+        self.transport_factory = transport_factory
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.dry_run = dry_run
+        self.repo_root = Path(__file__).parent.absolute()
+        self.manager = VimConfigManager(quiet=True)
+        # Only used to apply the retention policy to the hosts' backup indexes
+        self.backups = BackupStore(Path(BACKUP_STORE))
+        self._renders: Dict[str, str] = {}
+
+    def plan(self, hosts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Prepare the provisioning of every host.
+
+        Returns:
+            One plan per host with 'host', 'profile', 'options', 'theme' and,
+            if a theme is set, 'theme_path' (relative to $HOME) and 'theme_file'
+
+        Raises:
+            ValueError: If a host names an unknown theme
+        """
+        theme_files: Dict[str, bytes] = {}
+        plans = []
+        for host in hosts:
+            plan = dict(host)
+            theme = host['theme']
+            if theme:
+                if theme not in theme_files:
+                    theme_path = self.repo_root / 'colors' / f'{theme}.vim'
+                    if not theme_path.exists():
+                        raise ValueError(f"unknown theme '{theme}' for host {host['host']}")
+                    theme_files[theme] = theme_path.read_bytes()
+                plan['theme_path'] = f'.vim/colors/{theme}.vim'
+                plan['theme_file'] = theme_files[theme]
+            plans.append(plan)
+        return plans
+
+    def render(self, plan: Dict[str, Any], facts: Dict[str, Any],
+               current: Optional[str] = None) -> bytes:
+        """
+        Render the configuration of a host.
+
+        Each distinct (profile, options, platform) combination is rendered
+        once. The host's theme, if any, is made the primary colorscheme;
+        otherwise the theme of its current configuration is carried over.
+
+        Args:
+            plan: Host plan as returned by plan()
+            facts: The host's platform facts, as probed
+            current: The host's current ~/.vimrc, if it has one
+
+        Returns:
+            The configuration to install
+        """
+        options = {**plan['options'], **facts_options(facts)}
+        key = json.dumps([plan['profile'], options, plan['theme']], sort_keys=True)
+        text = self._renders.get(key)
+        if text is None:
+            text = self.manager.render_profile(plan['profile'], options)
+            if plan['theme']:
+                model = VimrcModel(text)
+                model.set_colorscheme(plan['theme'])
+                text = model.text()
+            self._renders[key] = text
+        if not plan['theme'] and current is not None:
+            text, _ = carry_theme(text, current)
+        return text.encode('utf-8')
+
+    async def _pipeline(self, transport: Transport, plan: Dict[str, Any],
+                        result: Dict[str, Any]):
+        """Probe, drift check, backup, apply and theme install for one host."""
+        paths = ['.vimrc'] + ([plan['theme_path']] if plan['theme'] else [])
+        remote = await transport.probe(paths, fetch_vimrc=not plan['theme'])
+        current = remote['vimrc'].decode('utf-8', 'replace') if remote['vimrc'] else None
+        files = {'.vimrc': self.render(plan, remote['facts'], current)}
+        if plan['theme']:
+            files[plan['theme_path']] = plan['theme_file']
+
+        result['platform'] = remote['facts']['system']
+        stale = [path for path, data in files.items()
+                 if remote['digests'][path] != hash_bytes(data)]
+        exists = remote['digests']['.vimrc'] is not None
+        if not stale:
+            result['status'] = 'unchanged'
+            return
+
+        result['status'] = 'updated' if exists else 'created'
+        result['files'] = stale
+        if self.dry_run:
+            result['would_push'] = sum(len(files[path]) for path in stale)
+            return
+
+        # Back up into the host's store, as BackupStore.add would locally
+        digest = remote['digests']['.vimrc']
+        entries = remote['backups']
+        if '.vimrc' in stale and exists and not (entries and entries[-1]['digest'] == digest):
+            entry, kept = self.backups.record(entries, digest, 'drift', remote['sizes']['.vimrc'])
+            referenced = {e['digest'] for e in kept}
+            obsolete = sorted({e['digest'] for e in entries} - referenced)
+            await transport.prepare(digest, kept, obsolete)
+            result['backup'] = f"{entry['timestamp']} ({digest[:12]})"
+        else:
+            await transport.prepare()
+
+        # The theme goes first so the new vimrc never names a missing colorscheme
+        for path in sorted(stale, key=lambda p: p == '.vimrc'):
+            await transport.write(path, files[path])
+            result['pushed_bytes'] += len(files[path])
+
+    async def provision(self, plan: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """
+        Provision one host, retrying connection failures and timeouts.
+
+        Returns:
+            Result with 'home' (the host, as in fleet results), 'status',
+            'attempts', 'pushed_bytes' (by the last attempt), 'round_trips',
+            'elapsed_ms' and, where relevant, 'platform', 'files',
+            'would_push', 'backup' or 'error'
+        """
+        async with semaphore:
+            start = time.perf_counter()
+            transport = self.transport_factory(plan['host'])
+            result: Dict[str, Any] = {'home': plan['host'], 'attempts': 0, 'pushed_bytes': 0}
+            try:
+                for attempt in range(self.retries + 1):
+                    # Only the last attempt is reported
+                    for key in ('status', 'platform', 'files', 'would_push', 'backup'):
+                        result.pop(key, None)
+                    result.update(attempts=attempt + 1, pushed_bytes=0)
+                    try:
+                        await asyncio.wait_for(self._pipeline(transport, plan, result),
+                                               self.timeout)
+                        result.pop('error', None)
+                        break
+                    except asyncio.TimeoutError:
+                        result.update(status='error', error=f'timed out after {self.timeout:g}s')
+                    except TransportError as e:
+                        result.update(status='error', error=str(e))
+                        if not e.retryable:
+                            break
+                    if attempt < self.retries:
+                        await asyncio.sleep(self.backoff * 2 ** attempt)
+            finally:
+                await transport.close()
+            result['round_trips'] = transport.round_trips
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            return result
+
+    async def run_async(self, plans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Provision every host; results are returned in plan order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self.provision(plan, semaphore) for plan in plans))
+
+    def run(self, hosts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Render and provision every host."""
+        return asyncio.run(self.run_async(self.plan(hosts)))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Push the vim configuration to many hosts concurrently',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s hosts.txt                        # Provision every host over ssh
+  %(prog)s hosts.txt --theme nord --dry-run # Show which hosts would change
+  %(prog)s homes.txt --transport local      # Directories stand in for hosts
+        """
+    )
+    parser.add_argument('hosts', type=Path, help='Hosts file')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='ssh',
+                        help='How hosts are reached (default: ssh)')
+    parser.add_argument('--theme',
+                        help='Theme for hosts that do not name one (default: keep their current theme)')
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Hosts provisioned at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds per attempt at a host (default: {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'Retries after connection failures or timeouts '
+                             f'(default: {DEFAULT_RETRIES})')
+    parser.add_argument('--ssh-option', action='append', default=[], metavar='OPTION',
+                        help='Extra ssh -o option (repeatable)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Check drift and report what would be pushed without pushing')
+    parser.add_argument('--report', type=Path, metavar='FILE',
+                        help='Write per-host results to FILE as JSON lines')
+    args = parser.parse_args()
+
+    try:
+        hosts = load_hosts(args.hosts)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for host in hosts:
+        host['theme'] = host['theme'] or args.theme
+
+    control_dir = None
+    if args.transport == 'ssh':
+        if shutil.which('ssh') is None:
+            print("Error: ssh not found", file=sys.stderr)
+            return 1
+        control_dir = tempfile.mkdtemp(prefix='vimfleet-ssh-')
+
+        def factory(host: str) -> Transport:
+            return SSHTransport(host, control_dir, min(args.timeout, 10.0), args.ssh_option)
+    else:
+        factory = LocalTransport
+
+    orchestrator = RemoteFleet(factory, concurrency=args.concurrency, timeout=args.timeout,
+                               retries=args.retries, dry_run=args.dry_run)
+    print(f"Remote fleet: {len(hosts)} host(s) over {args.transport}, "
+          f"concurrency {orchestrator.concurrency}")
+    if args.dry_run:
+        print("[DRY RUN] No files will be pushed.")
+
+    try:
+        results = orchestrator.run(hosts)
+    except KeyboardInterrupt:
+        print("\n\nRemote fleet run interrupted by user.")
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if control_dir:
+            shutil.rmtree(control_dir, ignore_errors=True)
+
+    print_fleet_summary(results, verbose=len(results) <= 100)
+    pushed = sum(result['pushed_bytes'] for result in results)
+    print(f"Bytes pushed: {pushed}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+        print(f"Report written to {args.report}")
+
+    return 1 if any(result['status'] == 'error' for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,16 +9,35 @@ Usage:
     python select_theme.py                 # Interactive mode
     python select_theme.py --theme claude  # Set theme directly
     python select_theme.py --list          # List available themes
+    python select_theme.py --current       # Print the current theme
+    python select_theme.py --names         # Print theme names, one per line
     python select_theme.py --preview       # Preview all themes
+    python select_theme.py --preview-file vimrc.template --theme nord
+    python select_theme.py --theme claude --compile cterm --inline
 """
 
-import argparse
 import os
-import re
-import shutil
 import sys
+
+if __name__ == '__main__':
+    # Read-only queries are answered from a cache before anything else is imported
+    from theme_query import fast_query
+    _status = fast_query(sys.argv[1:], os.path.abspath(__file__))
+    if _status is not None:
+        sys.exit(_status)
+
+import argparse
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, TextIO
+
+from backup_store import BackupStore
+from colorscheme import ColorScheme, ThemeIndex
+from fileutil import atomic_write
+from theme_compiler import TARGETS, ThemeCompiler, compile_colorscheme
+from theme_install import LINK_MODES, ThemeInstaller
+from theme_query import colors_key, update_cache, vimrc_key
+from theme_render import render_theme_preview, write_output
+from vimrc_model import VimrcModel
 
 
 # ANSI color codes for terminal output
@@ -115,199 +134,304 @@ THEMES = {
 class ThemeSelector:
     """Handles theme selection and application."""
 
-    def __init__(self):
-        """Initialize the theme selector."""
+    def __init__(self, link_mode: str = 'copy', compile_target: Optional[str] = None,
+                 inline: bool = False, home_dir: Optional[Path] = None,
+                 output: Optional[TextIO] = None, prompt: Callable[[str], str] = input,
+                 tui: bool = True):
+        """
+        Initialize the theme selector.
+
+        Args:
+            link_mode: How theme files are installed ('copy', 'hardlink' or 'reflink')
+            compile_target: If set ('gui', 'cterm' or 'both'), install compiled
+                themes for that target instead of the source files
+            inline: If True, inline the compiled theme into ~/.vimrc
+            home_dir: Home directory to manage (defaults to the current user's)
+            output: Stream for messages and listings (defaults to sys.stdout)
+            prompt: Reads a line of input in interactive selection
+            tui: If True, interactive selection uses the full-screen picker
+                when running on a terminal
+        """
         self.repo_root = Path(__file__).parent.absolute()
         self.colors_dir = self.repo_root / 'colors'
-        self.home_dir = Path.home()
+        self.home_dir = Path(home_dir) if home_dir else Path.home()
+        self.output = output
+        self.prompt = prompt
+        self.tui = tui
         self.vimrc_path = self.home_dir / '.vimrc'
         self.vim_colors_dir = self.home_dir / '.vim' / 'colors'
+        self.backup_store = BackupStore(self.home_dir / '.vim' / 'vimrc_backups')
+        self.theme_index = ThemeIndex(self.home_dir / '.vim' / 'cache' / 'theme_index.json',
+                                      self.colors_dir)
+        self.build_dir = self.home_dir / '.vim' / 'cache' / 'compiled_themes'
+        self.link_mode = link_mode
+        self.compile_target = compile_target or ('both' if inline else None)
+        self.inline = inline
+        self._themes_installed = False
+
+    @property
+    def stream(self) -> TextIO:
+        """Return the stream output goes to."""
+        return self.output or sys.stdout
+
+    def log(self, message: str = ""):
+        """Print a message to the output stream."""
+        print(message, file=self.stream)
 
     def get_available_themes(self) -> List[str]:
         """Get list of available themes from the colors directory."""
         if not self.colors_dir.exists():
             return []
 
-        themes = []
-        for file in self.colors_dir.glob('*.vim'):
-            theme_name = file.stem
-            themes.append(theme_name)
+        return sorted(self.theme_index.schemes())
 
-        return sorted(themes)
+    def get_theme_info(self, theme: str) -> Dict:
+        """
+        Get display metadata for a theme.
 
-    def display_theme_list(self, available_themes: List[str]):
-        """Display a formatted list of available themes."""
-        print(f"\n{Colors.BOLD}Available Vim Themes:{Colors.RESET}")
-        print("=" * 70)
+        Curated entries in THEMES take precedence; anything they do not
+        provide comes from the parsed colorscheme file.
+        """
+        scheme = self.theme_index.schemes().get(theme)
+        info = {
+            'name': theme.title(),
+            'description': 'Custom theme',
+            'colors': [],
+            'mood': '',
+            'preview_color': Colors.WHITE,
+        }
+        if scheme is not None:
+            info['name'] = scheme.title
+            info['description'] = scheme.description or info['description']
+            info['colors'] = list(scheme.palette)
+            info['background'] = scheme.background
+            info['groups'] = len(scheme.groups)
+            normal = scheme.group('Normal')
+            if normal is not None:
+                info['normal'] = (normal.guifg, normal.guibg)
+        info.update(THEMES.get(theme, {}))
+        return info
+
+    def format_theme_list(self, available_themes: List[str]) -> str:
+        """Compose the formatted list of available themes."""
+        lines = [f"\n{Colors.BOLD}Available Vim Themes:{Colors.RESET}", "=" * 70]
 
         for i, theme in enumerate(available_themes, 1):
-            theme_info = THEMES.get(theme, {
-                'name': theme.title(),
-                'description': 'Custom theme',
-                'colors': [],
-                'mood': '',
-                'preview_color': Colors.WHITE,
-            })
+            theme_info = self.get_theme_info(theme)
 
             preview_color = theme_info['preview_color']
             name = theme_info['name']
             description = theme_info['description']
             mood = theme_info['mood']
 
-            print(f"\n{preview_color}{Colors.BOLD}{i}. {name}{Colors.RESET}")
-            print(f"   {Colors.DIM}{description}{Colors.RESET}")
+            lines.append(f"\n{preview_color}{Colors.BOLD}{i}. {name}{Colors.RESET}")
+            lines.append(f"   {Colors.DIM}{description}{Colors.RESET}")
             if mood:
-                print(f"   {Colors.DIM}Mood: {mood}{Colors.RESET}")
+                lines.append(f"   {Colors.DIM}Mood: {mood}{Colors.RESET}")
+
+        return '\n'.join(lines) + '\n'
+
+    def display_theme_list(self, available_themes: List[str]):
+        """Display a formatted list of available themes."""
+        self.stream.write(self.format_theme_list(available_themes))
+
+    def render_theme_preview(self, theme: str) -> str:
+        """Compose the preview of a theme, drawn in the theme's own colors."""
+        scheme = self.theme_index.schemes().get(theme) or ColorScheme(name=theme)
+        return render_theme_preview(scheme, self.get_theme_info(theme))
 
     def display_theme_preview(self, theme: str):
         """Display a preview of a specific theme."""
-        theme_info = THEMES.get(theme, {
-            'name': theme.title(),
-            'description': 'Custom theme',
-            'colors': [],
-            'preview_color': Colors.WHITE,
-        })
-
-        preview_color = theme_info['preview_color']
-        name = theme_info['name']
-        description = theme_info['description']
-        colors = theme_info.get('colors', [])
-
-        print(f"\n{preview_color}{Colors.BOLD}╔{'═' * 68}╗{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET} {name:^66} {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}╠{'═' * 68}╣{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET} {description:66} {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        if colors:
-            colors_str = ', '.join(colors)
-            print(f"{preview_color}{Colors.BOLD}║{Colors.RESET} Colors: {colors_str:58} {preview_color}{Colors.BOLD}║{Colors.RESET}")
-
-        # Sample code preview
-        print(f"{preview_color}{Colors.BOLD}╠{'═' * 68}╣{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET} Code Preview:                                                     {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET}   {Colors.DIM}# This is a comment{Colors.RESET}                                            {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET}   {Colors.BOLD}def{Colors.RESET} {preview_color}hello_world{Colors.RESET}():                                          {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET}       {Colors.GREEN}\"\"\"Sample function\"\"\"{Colors.RESET}                                    {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}║{Colors.RESET}       {Colors.CYAN}print{Colors.RESET}({Colors.GREEN}\"Hello, World!\"{Colors.RESET})                                    {preview_color}{Colors.BOLD}║{Colors.RESET}")
-        print(f"{preview_color}{Colors.BOLD}╚{'═' * 68}╝{Colors.RESET}\n")
+        write_output(self.render_theme_preview(theme), self.stream)
 
     def get_current_theme(self) -> Optional[str]:
-        """Get the currently set theme from .vimrc."""
+        """Get the currently set theme from .vimrc (ignoring fallback colorschemes)."""
+        key = vimrc_key(str(self.vimrc_path))
         if not self.vimrc_path.exists():
             return None
 
-        with open(self.vimrc_path, 'r') as f:
-            content = f.read()
+        theme = VimrcModel.from_file(self.vimrc_path).colorscheme()
+        if key:
+            update_cache(str(self.home_dir), vimrc=key, current=theme or '')
+        return theme
 
-        # Look for colorscheme line
-        match = re.search(r'^\s*colorscheme\s+(\w+)', content, re.MULTILINE)
-        if match:
-            return match.group(1)
+    def install_theme_files(self) -> bool:
+        """
+        Install theme files to ~/.vim/colors/.
 
-        return None
+        Only themes that are new or changed since the last install are
+        copied; repeated calls within one run are no-ops. With a compile
+        target, the compiled artifacts are installed instead of the sources.
+        """
+        if self._themes_installed:
+            return True
 
-    def install_theme_files(self):
-        """Install theme files to ~/.vim/colors/."""
         if not self.colors_dir.exists():
-            print(f"{Colors.RED}Error: colors directory not found at {self.colors_dir}{Colors.RESET}")
+            self.log(f"{Colors.RED}Error: colors directory not found at {self.colors_dir}{Colors.RESET}")
             return False
 
-        # Create colors directory if it doesn't exist
-        self.vim_colors_dir.mkdir(parents=True, exist_ok=True)
-
-        # Copy all theme files
-        theme_files = list(self.colors_dir.glob('*.vim'))
-        if not theme_files:
-            print(f"{Colors.RED}Error: No theme files found in {self.colors_dir}{Colors.RESET}")
+        digests = self.theme_index.digests()
+        if not digests:
+            self.log(f"{Colors.RED}Error: No theme files found in {self.colors_dir}{Colors.RESET}")
             return False
 
-        print(f"\n{Colors.BOLD}Installing theme files...{Colors.RESET}")
-        for theme_file in theme_files:
-            dest = self.vim_colors_dir / theme_file.name
-            shutil.copy2(theme_file, dest)
-            print(f"  {Colors.GREEN}✓{Colors.RESET} Installed {theme_file.name}")
-
+        source_dir = self.colors_dir
+        if self.compile_target:
+            compiler = ThemeCompiler(self.build_dir, self.compile_target)
+            digests = compiler.compile_all(self.theme_index.schemes(), digests)
+            source_dir = compiler.output_dir
+            if compiler.compiled:
+                self.log(f"{Colors.DIM}Compiled {compiler.compiled} theme(s) for "
+                      f"{self.compile_target}{Colors.RESET}")
+
+        installer = ThemeInstaller(source_dir, self.vim_colors_dir, self.link_mode)
+        result = installer.install(digests)
+
+        if result['installed'] or result['pruned']:
+            self.log(f"\n{Colors.BOLD}Installing theme files...{Colors.RESET}")
+            for name in result['installed']:
+                self.log(f"  {Colors.GREEN}✓{Colors.RESET} Installed {name}")
+            for name in result['pruned']:
+                self.log(f"  {Colors.YELLOW}-{Colors.RESET} Removed {name} (no longer in repository)")
+        if result['unchanged']:
+            self.log(f"{Colors.DIM}{len(result['unchanged'])} theme file(s) already up to date{Colors.RESET}")
+
+        self._themes_installed = True
         return True
 
     def set_theme(self, theme: str) -> bool:
         """Set the theme in .vimrc."""
         if not self.vimrc_path.exists():
-            print(f"{Colors.RED}Error: .vimrc not found at {self.vimrc_path}{Colors.RESET}")
-            print(f"{Colors.YELLOW}Run 'make install' first to create your vim configuration.{Colors.RESET}")
+            self.log(f"{Colors.RED}Error: .vimrc not found at {self.vimrc_path}{Colors.RESET}")
+            self.log(f"{Colors.YELLOW}Run 'make install' first to create your vim configuration.{Colors.RESET}")
             return False
 
-        # Read current vimrc
-        with open(self.vimrc_path, 'r') as f:
-            content = f.read()
-
-        # Replace colorscheme line
-        # Look for existing colorscheme line
-        if re.search(r'^\s*colorscheme\s+', content, re.MULTILINE):
-            # Replace existing colorscheme
-            new_content = re.sub(
-                r'^\s*colorscheme\s+\w+.*$',
-                f'    colorscheme {theme}',
-                content,
-                flags=re.MULTILINE
-            )
-        else:
-            # Add colorscheme after the try/catch block or at the end of colors section
-            if 'endtry' in content:
-                new_content = re.sub(
-                    r'(endtry)',
-                    f'\\1\n    colorscheme {theme}',
-                    content,
-                    count=1
-                )
-            else:
-                # Add before the "--- Splits ---" section or at the end
-                if '--- Splits ---' in content:
-                    new_content = re.sub(
-                        r'(" --- Splits ---)',
-                        f'colorscheme {theme}\n\n\\1',
-                        content,
-                        count=1
-                    )
-                else:
-                    new_content = content + f'\ncolorscheme {theme}\n'
+        # Point the primary colorscheme at the theme; fallbacks stay as they are.
+        # The background option follows the theme so the two never disagree.
+        model = VimrcModel.from_file(self.vimrc_path)
+        scheme = self.theme_index.schemes().get(theme)
+        compiled = None
+        if self.inline:
+            compiled = compile_colorscheme(self.theme_index.schemes()[theme], self.compile_target,
+                                           inline=True)
+        changed = model.set_colorscheme(theme, compiled, self.compile_target or 'both')
+        if scheme is not None and scheme.background:
+            changed = model.set_option('background', scheme.background) or changed
+        if not changed:
+            self.log(f"\n{Colors.GREEN}✓ Theme is already set to '{theme}'{Colors.RESET}")
+            return True
 
         # Backup current vimrc
-        backup_path = self.vimrc_path.with_suffix('.vimrc.backup.theme')
-        shutil.copy2(self.vimrc_path, backup_path)
+        backup = self.backup_store.add(self.vimrc_path, 'theme')
 
         # Write new vimrc
-        with open(self.vimrc_path, 'w') as f:
-            f.write(new_content)
+        atomic_write(self.vimrc_path, model.text().encode('utf-8'))
 
-        print(f"\n{Colors.GREEN}{Colors.BOLD}✓ Theme set to '{theme}'{Colors.RESET}")
-        print(f"  Backup saved to {backup_path}")
+        self.log(f"\n{Colors.GREEN}{Colors.BOLD}✓ Theme set to '{theme}'{Colors.RESET}")
+        if self.inline:
+            self.log(f"  Compiled for {self.compile_target} and inlined into {self.vimrc_path}")
+        self.log(f"  Backup saved as {backup['timestamp']} ({backup['digest'][:12]})")
 
         return True
 
+    def picker_selection(self, available_themes: List[str]) -> Optional[str]:
+        """Run the full-screen picker with live previews."""
+        from theme_picker import ThemePicker
+
+        picker = ThemePicker(
+            available_themes,
+            describe=lambda theme: self.get_theme_info(theme)['description'],
+            preview=self.render_theme_preview,
+            current=self.get_current_theme(),
+            styles={theme: self.get_theme_info(theme)['preview_color'] for theme in available_themes},
+        )
+        selected_theme = picker.run()
+        if selected_theme is None:
+            self.log(f"{Colors.YELLOW}Selection cancelled.{Colors.RESET}")
+        return selected_theme
+
+    def preview_file(self, path: Path, theme: Optional[str] = None) -> bool:
+        """
+        Show a file highlighted in a theme's colors.
+
+        On a terminal the file is paged through and themes are cycled in place,
+        and Enter applies the theme shown. Otherwise the first screenful is
+        written in the given (or current) theme.
+
+        Args:
+            path: File to preview
+            theme: Theme shown first (default: the current theme)
+
+        Returns:
+            True on success
+        """
+        import shutil
+        from file_preview import FilePager, FilePreview
+
+        available_themes = self.get_available_themes()
+        if theme is not None and theme not in available_themes:
+            self.log(f"{Colors.RED}Error: Theme '{theme}' not found.{Colors.RESET}")
+            return False
+        if not available_themes:
+            self.log(f"{Colors.RED}Error: No themes found in {self.colors_dir}{Colors.RESET}")
+            return False
+        current_theme = self.get_current_theme()
+        start = theme or (current_theme if current_theme in available_themes else available_themes[0])
+        schemes = self.theme_index.schemes()
+
+        try:
+            preview = FilePreview(path)
+        except OSError as e:
+            self.log(f"{Colors.RED}Error: cannot read {path}: {e}{Colors.RESET}")
+            return False
+        try:
+            if self.tui and self.output is None:
+                import theme_picker
+                if theme_picker.available():
+                    selected_theme = FilePager(preview, available_themes, schemes.__getitem__, start).run()
+                    if selected_theme is None:
+                        return True
+                    return self.install_theme_files() and self.set_theme(selected_theme)
+
+            size = shutil.get_terminal_size((100, 40))
+            title = f"{path.name} · {start} ({preview.language.name})"
+            write_output(preview.render(schemes[start], 0, size.lines - 1, min(size.columns, 120), title) + '\n',
+                         self.stream)
+            return True
+        finally:
+            preview.close()
+
     def interactive_selection(self) -> Optional[str]:
         """Run interactive theme selection."""
         available_themes = self.get_available_themes()
 
         if not available_themes:
-            print(f"{Colors.RED}Error: No themes found in {self.colors_dir}{Colors.RESET}")
+            self.log(f"{Colors.RED}Error: No themes found in {self.colors_dir}{Colors.RESET}")
             return None
 
+        # On a terminal, use the picker; piped input gets the numbered prompt
+        if self.tui and self.output is None and self.prompt is input:
+            import theme_picker
+            if theme_picker.available():
+                return self.picker_selection(available_themes)
+
         # Display current theme
         current_theme = self.get_current_theme()
         if current_theme:
-            print(f"\n{Colors.BOLD}Current theme:{Colors.RESET} {Colors.CYAN}{current_theme}{Colors.RESET}")
+            self.log(f"\n{Colors.BOLD}Current theme:{Colors.RESET} {Colors.CYAN}{current_theme}{Colors.RESET}")
 
         # Display themes
         self.display_theme_list(available_themes)
 
         # Get user selection
-        print(f"\n{Colors.BOLD}Select a theme (1-{len(available_themes)}) or 'q' to quit:{Colors.RESET}")
+        self.log(f"\n{Colors.BOLD}Select a theme (1-{len(available_themes)}) or 'q' to quit:{Colors.RESET}")
 
         while True:
             try:
-                choice = input(f"{Colors.BRIGHT_CYAN}> {Colors.RESET}").strip().lower()
+                choice = self.prompt(f"{Colors.BRIGHT_CYAN}> {Colors.RESET}").strip().lower()
 
                 if choice == 'q':
-                    print("Selection cancelled.")
+                    self.log("Selection cancelled.")
                     return None
 
                 if choice == '':
@@ -323,30 +447,45 @@ class ThemeSelector:
                         self.display_theme_preview(selected_theme)
 
                         # Confirm
-                        confirm = input(f"{Colors.BOLD}Apply this theme? (Y/n):{Colors.RESET} ").strip().lower()
+                        confirm = self.prompt(f"{Colors.BOLD}Apply this theme? (Y/n):{Colors.RESET} ").strip().lower()
                         if confirm != 'n':
                             return selected_theme
                         else:
-                            print("Theme not applied. Select another or 'q' to quit.")
+                            self.log("Theme not applied. Select another or 'q' to quit.")
                             continue
                     else:
-                        print(f"{Colors.RED}Invalid selection. Please choose 1-{len(available_themes)}.{Colors.RESET}")
+                        self.log(f"{Colors.RED}Invalid selection. Please choose 1-{len(available_themes)}.{Colors.RESET}")
                 except ValueError:
                     # Maybe it's a theme name
                     if choice in available_themes:
                         return choice
                     else:
-                        print(f"{Colors.RED}Invalid selection. Please enter a number or 'q' to quit.{Colors.RESET}")
+                        self.log(f"{Colors.RED}Invalid selection. Please enter a number or 'q' to quit.{Colors.RESET}")
 
             except KeyboardInterrupt:
-                print(f"\n{Colors.YELLOW}Selection cancelled.{Colors.RESET}")
+                self.log(f"\n{Colors.YELLOW}Selection cancelled.{Colors.RESET}")
                 return None
             except EOFError:
-                print(f"\n{Colors.YELLOW}Selection cancelled.{Colors.RESET}")
+                self.log(f"\n{Colors.YELLOW}Selection cancelled.{Colors.RESET}")
                 return None
 
-    def run(self, theme: Optional[str] = None, list_only: bool = False, preview_all: bool = False):
+    def run(self, theme: Optional[str] = None, list_only: bool = False, preview_all: bool = False,
+            current_only: bool = False, names_only: bool = False,
+            preview_file: Optional[Path] = None):
         """Run the theme selector."""
+        if current_only:
+            current_theme = self.get_current_theme()
+            if current_theme:
+                self.log(current_theme)
+            return current_theme is not None
+
+        if names_only:
+            self.stream.write(''.join(f'{name}\n' for name in self.get_available_themes()))
+            return True
+
+        if preview_file is not None:
+            return self.preview_file(preview_file, theme)
+
         # Ensure theme files are installed
         if not list_only and not preview_all:
             if not self.install_theme_files():
@@ -355,22 +494,24 @@ class ThemeSelector:
         available_themes = self.get_available_themes()
 
         if list_only:
-            self.display_theme_list(available_themes)
+            key = colors_key(str(self.colors_dir), os.path.abspath(__file__))
+            text = self.format_theme_list(available_themes)
+            if key:
+                update_cache(str(self.home_dir), colors=key, list=text)
+            self.stream.write(text)
             return True
 
         if preview_all:
-            for theme in available_themes:
-                self.display_theme_preview(theme)
+            write_output(''.join(self.render_theme_preview(t) for t in available_themes), self.stream)
             return True
 
         if theme:
             # Direct theme selection
             if theme not in available_themes:
-                print(f"{Colors.RED}Error: Theme '{theme}' not found.{Colors.RESET}")
-                print(f"{Colors.YELLOW}Available themes: {', '.join(available_themes)}{Colors.RESET}")
+                self.log(f"{Colors.RED}Error: Theme '{theme}' not found.{Colors.RESET}")
+                self.log(f"{Colors.YELLOW}Available themes: {', '.join(available_themes)}{Colors.RESET}")
                 return False
 
-            self.install_theme_files()
             return self.set_theme(theme)
         else:
             # Interactive selection
@@ -390,7 +531,15 @@ Examples:
   %(prog)s                     # Interactive mode
   %(prog)s --theme claude      # Set Claude theme
   %(prog)s --list              # List available themes
+  %(prog)s --current           # Print the current theme (for prompts)
+  %(prog)s --names             # Print theme names, one per line
   %(prog)s --preview           # Preview all themes
+  %(prog)s --preview-file app.py --theme nord
+                               # Page through app.py in nord (←/→ switch themes)
+  %(prog)s --theme nord --compile cterm
+                               # Install themes compiled for 256-color terminals
+  %(prog)s --theme nord --compile cterm --inline
+                               # ...and inline nord into ~/.vimrc
 
 Available themes:
   - claude      : Anthropic brand colors (professional)
@@ -415,21 +564,90 @@ Available themes:
         help='List available themes and exit'
     )
 
+    parser.add_argument(
+        '--current',
+        action='store_true',
+        help='Print the current theme and exit (exit status 1 if none is set)'
+    )
+
+    parser.add_argument(
+        '--names',
+        action='store_true',
+        help='Print available theme names, one per line, and exit'
+    )
+
     parser.add_argument(
         '-p', '--preview',
         action='store_true',
         help='Preview all themes and exit'
     )
 
+    parser.add_argument(
+        '--preview-file',
+        metavar='PATH',
+        type=Path,
+        help='Preview PATH highlighted in a theme (--theme, else the current theme)'
+    )
+
+    parser.add_argument(
+        '--link-mode',
+        choices=LINK_MODES,
+        default='copy',
+        help='Install theme files as copies, hardlinks or reflinks (default: copy)'
+    )
+
+    parser.add_argument(
+        '--compile',
+        nargs='?',
+        const='both',
+        choices=TARGETS,
+        metavar='TARGET',
+        help='Install themes compiled for TARGET: gui, cterm or both (default: both)'
+    )
+
+    parser.add_argument(
+        '--inline',
+        action='store_true',
+        help='Inline the compiled theme into ~/.vimrc instead of loading it from the runtimepath'
+    )
+
+    parser.add_argument(
+        '--no-tui',
+        action='store_true',
+        help='Use the numbered prompt instead of the full-screen picker'
+    )
+
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        type=Path,
+        help='Time each phase and count file I/O, writing a trace to FILE'
+    )
+
+    parser.add_argument(
+        '--trace-format',
+        choices=['jsonl', 'chrome'],
+        default='jsonl',
+        help='Trace format: JSON lines or Chrome trace events (default: jsonl)'
+    )
+
     args = parser.parse_args()
 
-    selector = ThemeSelector()
+    if args.trace:
+        import instrumentation
+        instrumentation.trace_to(args.trace, args.trace_format)
+
+    selector = ThemeSelector(link_mode=args.link_mode, compile_target=args.compile,
+                             inline=args.inline, tui=not args.no_tui)
 
     try:
         success = selector.run(
             theme=args.theme,
             list_only=args.list,
-            preview_all=args.preview
+            preview_all=args.preview,
+            current_only=args.current,
+            names_only=args.names,
+            preview_file=args.preview_file
         )
         return 0 if success else 1
     except KeyboardInterrupt:
@@ -9,69 +9,198 @@ Usage:
     python setup_vim.py                    # Non-interactive with defaults
     python setup_vim.py --interactive      # Interactive mode with prompts
     python setup_vim.py --minimal          # Minimal configuration
+    python setup_vim.py --profile backend  # Team profile layered on the template
     python setup_vim.py --backup-only      # Create backup without applying
+    python setup_vim.py --fleet homes.txt  # Apply to many home directories
+    python setup_vim.py --watch            # Report drift continuously
 """
 
 import argparse
-import hashlib
 import os
-import shutil
 import sys
-from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple
+
+from backup_store import DEFAULT_RETENTION, BackupStore
+from drift_index import DriftIndex, hash_bytes
+from fileutil import atomic_write, make_private_dirs
+from host_platform import platform_options, read_fingerprint
+from profiles import ProfileStore, RenderCache, ResolvedProfile
+from vimrc_model import VimrcModel
+from vimrc_template import load_template
+
+
+# Default configuration options, used when not running interactively
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    'mouse_support': True,
+    'relative_numbers': True,
+    'color_scheme': 'desert',
+    'tab_width': 4,
+    'create_backups': True,
+}
+
+
+def merge_options(profile_options: Dict[str, Any],
+                  overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Merge the defaults, a profile's options and explicit overrides, in that order.
+
+    Raises:
+        ValueError: If an override names an unknown option
+    """
+    overrides = overrides or {}
+    unknown = set(overrides) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown option(s): {', '.join(sorted(unknown))}")
+    return {**DEFAULT_OPTIONS, **profile_options, **overrides}
+
+
+def carry_theme(content: str, current: str) -> Tuple[str, Optional[str]]:
+    """
+    Apply the primary colorscheme of a current config to a generated one.
+
+    The `background` option select_theme.py sets along with the theme is
+    carried over with it.
+
+    Args:
+        content: Configuration generated from the template
+        current: The configuration it replaces
+
+    Returns:
+        Tuple of (configuration, theme carried over or None)
+    """
+    current_model = VimrcModel(current)
+    theme = current_model.primary_colorscheme()
+    if theme is None:
+        return content, None
+    model = VimrcModel(content)
+    changed = model.set_colorscheme(theme.theme, current_model.inlined_commands(theme),
+                                    theme.target or 'both')
+    background = current_model.option('background')
+    if isinstance(background, str):
+        changed = model.set_option('background', background) or changed
+    if not changed:
+        return content, None
+    return model.text(), theme.theme
 
 
 class VimConfigManager:
     """Manages vim configuration setup and synchronization."""
 
-    def __init__(self, interactive: bool = False, dry_run: bool = False):
+    def __init__(self, interactive: bool = False, dry_run: bool = False,
+                 home_dir: Optional[Path] = None, quiet: bool = False,
+                 output: Optional[Callable[[str], None]] = None,
+                 prompt: Callable[[str], str] = input):
         """
         Initialize the vim config manager.
 
         Args:
             interactive: Whether to prompt for user input
             dry_run: If True, show what would be done without doing it
+            home_dir: Home directory to configure (defaults to the current user's)
+            quiet: If True, suppress progress output
+            output: Receives each progress message (defaults to print)
+            prompt: Reads a line of input in interactive mode
         """
         self.interactive = interactive
         self.dry_run = dry_run
+        self.quiet = quiet
+        self.output = output
+        self.prompt = prompt
         self.repo_root = Path(__file__).parent.absolute()
-        self.home_dir = Path.home()
+        self.home_dir = Path(home_dir) if home_dir else Path.home()
         self.vimrc_path = self.home_dir / '.vimrc'
         self.vim_dir = self.home_dir / '.vim'
         self.backup_dir = self.vim_dir / 'backup'
         self.swap_dir = self.vim_dir / 'swap'
         self.undo_dir = self.vim_dir / 'undo'
         self.local_vimrc = self.home_dir / '.vimrc.local'
+        self.cache_dir = self.vim_dir / 'cache'
+        self.drift_index = DriftIndex(self.cache_dir / 'drift_index.json')
+        self.backup_store = BackupStore(self.vim_dir / 'vimrc_backups')
+        self.profiles = ProfileStore(self.repo_root / 'profiles', DEFAULT_OPTIONS)
+        self.render_cache = RenderCache(self.cache_dir / 'renders')
+
+    def log(self, message: str = ""):
+        """Print a progress message unless running quietly."""
+        if not self.quiet:
+            (self.output or print)(message)
 
     def calculate_file_hash(self, filepath: Path) -> Optional[str]:
-        """Calculate SHA256 hash of a file."""
-        if not filepath.exists():
-            return None
+        """Calculate SHA256 hash of a file, reusing the drift index when unchanged."""
+        return self.drift_index.digest(filepath)
+
+    def save_drift_index(self):
+        """Persist the drift index (in dry-run mode only if ~/.vim already exists)."""
+        if self.dry_run and not self.vim_dir.is_dir():
+            return
+        try:
+            self.drift_index.save()
+        except OSError as e:
+            self.log(f"Warning: could not save drift index: {e}")
+
+    def backup_existing_config(self, reason: str = 'drift') -> Optional[Path]:
+        """
+        Back up the existing .vimrc into the content-addressed backup store.
 
-        sha256_hash = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        Args:
+            reason: Why the backup is being taken, recorded in the store index
 
-    def backup_existing_config(self) -> Optional[Path]:
-        """Create a backup of the existing .vimrc file."""
+        Returns:
+            Path of the stored backup, or None if there was nothing to back up
+        """
         if not self.vimrc_path.exists():
-            print("No existing .vimrc found, no backup needed.")
+            self.log("No existing .vimrc found, no backup needed.")
             return None
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = self.home_dir / f'.vimrc.backup.{timestamp}'
-
         if self.dry_run:
-            print(f"[DRY RUN] Would backup {self.vimrc_path} to {backup_path}")
-            return backup_path
+            self.log(f"[DRY RUN] Would backup {self.vimrc_path} to {self.backup_store.store_dir}")
+            return self.backup_store.store_dir
 
-        shutil.copy2(self.vimrc_path, backup_path)
-        print(f"Backed up existing .vimrc to {backup_path}")
+        entry = self.backup_store.add(self.vimrc_path, reason)
+        backup_path = self.backup_store.object_path(entry['digest'])
+        self.log(f"Backed up existing .vimrc ({entry['timestamp']}, {entry['digest'][:12]})")
         return backup_path
 
+    def list_backups(self):
+        """Print all stored backups, newest first."""
+        entries = self.backup_store.entries()
+        if not entries:
+            self.log("No backup files found")
+            return
+
+        self.log(f"Backups in {self.backup_store.store_dir}:")
+        for entry in reversed(entries):
+            self.log(f"  {entry['timestamp']}  {entry['digest'][:12]}  "
+                     f"{entry['size']:>7} bytes  {entry['reason']}")
+
+    def restore_backup(self, ref: str = 'latest') -> bool:
+        """
+        Restore ~/.vimrc from the backup store.
+
+        Args:
+            ref: 'latest', a timestamp prefix or a digest prefix
+
+        Returns:
+            True if a backup was restored
+        """
+        try:
+            entry = self.backup_store.find(ref)
+        except ValueError as e:
+            self.log(f"✗ {e}")
+            return False
+        if entry is None:
+            self.log(f"✗ No backup matches '{ref}'")
+            return False
+
+        if self.dry_run:
+            self.log(f"[DRY RUN] Would restore {entry['timestamp']} ({entry['digest'][:12]})")
+            return True
+
+        self.backup_store.restore(entry['digest'], self.vimrc_path)
+        self.log(f"✓ Restored ~/.vimrc from backup {entry['timestamp']} ({entry['digest'][:12]})")
+        return True
+
     def ensure_vim_directories(self):
         """Ensure all necessary vim directories exist."""
         directories = [self.vim_dir, self.backup_dir, self.swap_dir, self.undo_dir]
@@ -79,65 +208,66 @@ class VimConfigManager:
         for directory in directories:
             if self.dry_run:
                 if not directory.exists():
-                    print(f"[DRY RUN] Would create directory: {directory}")
+                    self.log(f"[DRY RUN] Would create directory: {directory}")
             else:
-                directory.mkdir(parents=True, exist_ok=True, mode=0o700)
-                print(f"Ensured directory exists: {directory}")
+                make_private_dirs(directory)
+                self.log(f"Ensured directory exists: {directory}")
 
-    def get_config_options(self) -> Dict[str, Any]:
+    def get_config_options(self, profile: str = 'default') -> Dict[str, Any]:
         """
         Get configuration options from user or defaults.
 
+        Args:
+            profile: Configuration profile whose options are the defaults
+
         Returns:
             Dictionary of configuration options
         """
-        options = {
-            'mouse_support': True,
-            'relative_numbers': True,
-            'color_scheme': 'desert',
-            'tab_width': 4,
-            'create_backups': True,
-        }
+        options = merge_options(self.profiles.resolve(profile).options)
 
         if not self.interactive:
-            print("Using default configuration options:")
+            self.log("Using default configuration options:")
             for key, value in options.items():
-                print(f"  {key}: {value}")
+                self.log(f"  {key}: {value}")
             return options
 
-        print("\nInteractive Configuration Setup")
-        print("=" * 50)
-        print("Press Enter to accept defaults shown in brackets.\n")
+        self.log("\nInteractive Configuration Setup")
+        self.log("=" * 50)
+        self.log("Press Enter to accept defaults shown in brackets.\n")
+
+        def confirm(question: str, default: bool) -> bool:
+            response = self.prompt(f"{question} [{'Y/n' if default else 'y/N'}]: ").strip().lower()
+            return response != 'n' if default else response == 'y'
 
         # Mouse support
-        response = input(f"Enable mouse support? [Y/n]: ").strip().lower()
-        options['mouse_support'] = response != 'n'
+        options['mouse_support'] = confirm("Enable mouse support?", options['mouse_support'])
 
         # Relative line numbers
-        response = input(f"Use relative line numbers? [Y/n]: ").strip().lower()
-        options['relative_numbers'] = response != 'n'
+        options['relative_numbers'] = confirm("Use relative line numbers?",
+                                              options['relative_numbers'])
 
         # Color scheme
         schemes = ['desert', 'slate', 'pablo', 'default']
-        print(f"\nAvailable color schemes: {', '.join(schemes)}")
-        response = input(f"Color scheme [desert]: ").strip() or 'desert'
-        options['color_scheme'] = response if response in schemes else 'desert'
+        default_scheme = options['color_scheme']
+        self.log(f"\nAvailable color schemes: {', '.join(schemes)}")
+        response = self.prompt(f"Color scheme [{default_scheme}]: ").strip() or default_scheme
+        options['color_scheme'] = response if response in schemes else default_scheme
 
         # Tab width
-        response = input(f"Tab width (2/4/8) [4]: ").strip()
+        default_width = options['tab_width']
+        response = self.prompt(f"Tab width (2/4/8) [{default_width}]: ").strip()
         try:
-            width = int(response) if response else 4
-            options['tab_width'] = width if width in [2, 4, 8] else 4
+            width = int(response) if response else default_width
+            options['tab_width'] = width if width in [2, 4, 8] else default_width
         except ValueError:
-            options['tab_width'] = 4
+            options['tab_width'] = default_width
 
         # Backups
-        response = input(f"Create backup files? [Y/n]: ").strip().lower()
-        options['create_backups'] = response != 'n'
+        options['create_backups'] = confirm("Create backup files?", options['create_backups'])
 
-        print("\nConfiguration options set:")
+        self.log("\nConfiguration options set:")
         for key, value in options.items():
-            print(f"  {key}: {value}")
+            self.log(f"  {key}: {value}")
 
         return options
 
@@ -149,153 +279,359 @@ class VimConfigManager:
             template_path: Path to the template file
             options: Configuration options to apply
 
+        Platform facts (operating system, clipboard register, vim features)
+        are detected here and rendered as constants, so the generated vimrc
+        does not probe the system at startup.
+
         Returns:
             Generated configuration content
         """
-        with open(template_path, 'r') as f:
-            content = f.read()
+        return load_template(template_path).render(self.with_platform(options))
+
+    def generate_configs(self, template_path: Path,
+                         option_sets: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate configurations for many option sets from one compiled template.
+
+        Args:
+            template_path: Path to the template file
+            option_sets: Configuration options to apply, one dictionary per config
+
+        Returns:
+            Generated configuration content, one per option set
+        """
+        return load_template(template_path).render_many(
+            [self.with_platform(options) for options in option_sets])
 
-        # Apply options by modifying specific lines
-        # For now, we'll use the template as-is and note that
-        # advanced customization can be done via .vimrc.local
+    def render_profile(self, profile: str, options: Dict[str, Any]) -> str:
+        """
+        Generate the configuration of a profile, served from the render cache when possible.
 
-        if not options['mouse_support']:
-            content = content.replace('set mouse=a', '" set mouse=a  " Disabled by setup')
+        Args:
+            profile: Configuration profile to render
+            options: Configuration options to apply
 
-        if not options['relative_numbers']:
-            content = content.replace('set relativenumber', '" set relativenumber  " Disabled by setup')
+        Returns:
+            Generated configuration content
 
-        if options['color_scheme'] != 'desert':
-            content = content.replace('colorscheme desert', f'colorscheme {options["color_scheme"]}')
+        Raises:
+            ProfileError: If the profile cannot be resolved
+        """
+        return self.render_profiles(profile, [options])[0]
 
-        if options['tab_width'] != 4:
-            content = content.replace('set tabstop=4', f'set tabstop={options["tab_width"]}')
-            content = content.replace('set shiftwidth=4', f'set shiftwidth={options["tab_width"]}')
-            content = content.replace('set softtabstop=4', f'set softtabstop={options["tab_width"]}')
+    def render_profiles(self, profile: str, option_sets: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate a profile's configuration for many option sets.
 
-        if not options['create_backups']:
-            content = content.replace('set backup', '" set backup  " Disabled by setup')
+        Each configuration is looked up in the render cache by the digests of
+        the profile's chain, the options and the platform; only misses are
+        rendered, all from one compiled template, and then stored.
 
+        Args:
+            profile: Configuration profile to render
+            option_sets: Configuration options to apply, one dictionary per config
+
+        Returns:
+            Generated configuration content, one per option set
+        """
+        resolved = self.profiles.resolve(profile)
+        digests = resolved.digests()
+        store = not self.dry_run or self.vim_dir.is_dir()
+        compiled = None
+        rendered: Dict[str, str] = {}
+        keys = []
+        for options in option_sets:
+            options = self.with_platform(options)
+            key = self.render_cache.key(digests, options)
+            keys.append(key)
+            if key in rendered:
+                continue
+            content = self.render_cache.get(key)
+            if content is None:
+                compiled = compiled or self.profiles.compile(resolved)
+                content = compiled.render(options)
+                if store:
+                    try:
+                        self.render_cache.put(key, content)
+                    except OSError as e:
+                        self.log(f"Warning: could not update render cache: {e}")
+                        store = False
+            rendered[key] = content
+        return [rendered[key] for key in keys]
+
+    def describe_profile(self, resolved: ResolvedProfile) -> str:
+        """Return 'name (template, inherits a -> b)' for progress messages."""
+        detail = resolved.template.name
+        if len(resolved.chain) > 1:
+            detail += f", inherits {' -> '.join(p.name for p in resolved.chain)}"
+        return f"{resolved.name} ({detail})"
+
+    def with_platform(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add the detected host platform facts to a set of options.
+
+        Args:
+            options: Configuration options; explicit values take precedence
+
+        Returns:
+            Options including 'platform', 'clipboard', 'vim_clipboard' and
+            'platform_fingerprint'
+        """
+        return {**platform_options(), **options}
+
+    def carry_over_theme(self, content: str) -> str:
+        """
+        Keep the theme chosen with select_theme.py in a regenerated config.
+
+        Only the primary colorscheme of the generated config is changed (an
+        inlined compiled theme is carried over as it is); fallbacks in the
+        template stay untouched.
+
+        Args:
+            content: Configuration generated from the template
+
+        Returns:
+            The configuration with the current theme applied
+        """
+        if not self.vimrc_path.exists():
+            return content
+        current = self.vimrc_path.read_text(encoding='utf-8', errors='replace')
+        content, theme = carry_theme(content, current)
+        if theme:
+            self.log(f"Keeping current theme: {theme}")
         return content
 
-    def check_drift(self, template_path: Path) -> bool:
+    def check_platform(self) -> bool:
         """
-        Check if current .vimrc has drifted from the template.
+        Check whether ~/.vimrc was generated for a different host platform.
+
+        Returns:
+            True if the recorded host fingerprint differs from this host's
+        """
+        try:
+            recorded = read_fingerprint(self.vimrc_path.read_text(errors='replace'))
+        except FileNotFoundError:
+            return False
+        current = platform_options()
+        if recorded is None or recorded == current['platform_fingerprint']:
+            return False
+        self.log(f"Host platform changed since .vimrc was generated "
+                 f"({recorded} -> {current['platform_fingerprint']}) - regenerating.")
+        return True
+
+    def check_drift(self, content: str) -> bool:
+        """
+        Check if current .vimrc has drifted from the rendered configuration.
 
         Args:
-            template_path: Path to the template file
+            content: Configuration generated from the template for the chosen options
 
         Returns:
             True if drift detected, False otherwise
         """
         if not self.vimrc_path.exists():
-            print("No existing .vimrc found - will create new one.")
+            self.log("No existing .vimrc found - will create new one.")
             return True
 
-        # For default config, check if hashes match
-        template_hash = self.calculate_file_hash(template_path)
+        expected_hash = hash_bytes(content.encode('utf-8'))
         current_hash = self.calculate_file_hash(self.vimrc_path)
+        self.save_drift_index()
 
-        if template_hash == current_hash:
-            print("No drift detected - .vimrc matches template exactly.")
+        if expected_hash == current_hash:
+            self.log("No drift detected - .vimrc matches the generated configuration.")
             return False
 
-        print("Drift detected - .vimrc differs from template.")
+        self.log("Drift detected - .vimrc differs from the generated configuration.")
         return True
 
-    def apply_config(self, content: str):
+    def apply_config(self, content: str) -> str:
         """
         Apply the vim configuration.
 
+        The write is skipped when ~/.vimrc already holds exactly this content;
+        otherwise the new file is written to a temporary file, fsynced and
+        renamed into place so a crash never leaves a truncated .vimrc.
+
         Args:
             content: Configuration content to write
+
+        Returns:
+            'written', 'unchanged', or 'skipped' (dry run)
         """
+        data = content.encode('utf-8')
+        if self.calculate_file_hash(self.vimrc_path) == hash_bytes(data):
+            self.log(f"{self.vimrc_path} is already up to date - nothing to write.")
+            return 'unchanged'
+
         if self.dry_run:
-            print(f"[DRY RUN] Would write configuration to {self.vimrc_path}")
-            print("\n--- Configuration Preview (first 500 chars) ---")
-            print(content[:500])
-            print("...")
-            return
+            self.log(f"[DRY RUN] Would write configuration to {self.vimrc_path}")
+            self.log("\n--- Configuration Preview (first 500 chars) ---")
+            self.log(content[:500])
+            self.log("...")
+            return 'skipped'
 
-        with open(self.vimrc_path, 'w') as f:
-            f.write(content)
-        print(f"Successfully wrote configuration to {self.vimrc_path}")
+        atomic_write(self.vimrc_path, data)
+        self.log(f"Successfully wrote configuration to {self.vimrc_path}")
+        return 'written'
 
     def check_local_config(self):
         """Check and report on local config file."""
         if self.local_vimrc.exists():
-            print(f"\nLocal config file exists: {self.local_vimrc}")
-            print("This file will be sourced after the main config.")
+            self.log(f"\nLocal config file exists: {self.local_vimrc}")
+            self.log("This file will be sourced after the main config.")
             with open(self.local_vimrc, 'r') as f:
                 local_content = f.read()
-            print(f"Local config has {len(local_content.splitlines())} lines.")
+            self.log(f"Local config has {len(local_content.splitlines())} lines.")
         else:
-            print(f"\nNo local config file found at {self.local_vimrc}")
-            print("You can create this file for machine-specific overrides.")
+            self.log(f"\nNo local config file found at {self.local_vimrc}")
+            self.log("You can create this file for machine-specific overrides.")
 
-    def setup(self, profile: str = 'default'):
+    def get_template_path(self, profile: str = 'default') -> Path:
+        """
+        Determine the base template of a configuration profile.
+
+        Args:
+            profile: Configuration profile to use (see profiles/)
+
+        Returns:
+            Path to the template file at the root of the profile's chain
+
+        Raises:
+            ProfileError: If the profile cannot be resolved
+        """
+        return self.profiles.resolve(profile).template
+
+    def setup(self, profile: str = 'default', options: Optional[Dict[str, Any]] = None):
         """
         Main setup process.
 
         Args:
-            profile: Configuration profile to use (default, minimal, etc.)
+            profile: Configuration profile to use (see profiles/)
+            options: Configuration options to apply (default: the profile's
+                defaults, or prompted for in interactive mode)
+
+        Returns:
+            Outcome of apply_config: 'written', 'unchanged' or 'skipped'
+
+        Raises:
+            ProfileError: If the profile, its template or an overlay does not exist
         """
-        print("Vim Configuration Manager")
-        print("=" * 50)
-
-        # Determine template path
-        if profile == 'minimal':
-            template_path = self.repo_root / 'vimrc.minimal.template'
-            if not template_path.exists():
-                print(f"Warning: Minimal template not found, using default.")
-                template_path = self.repo_root / 'vimrc.template'
-        else:
-            template_path = self.repo_root / 'vimrc.template'
+        self.log("Vim Configuration Manager")
+        self.log("=" * 50)
+
+        resolved = self.profiles.resolve(profile)
+        template_path = resolved.template
 
-        if not template_path.exists():
-            print(f"Error: Template file not found at {template_path}")
-            sys.exit(1)
+        self.log(f"Using profile: {self.describe_profile(resolved)}")
+        self.log(f"Target: {self.vimrc_path}")
+        host = platform_options()
+        self.log(f"Platform: {host['platform']} (fingerprint {host['platform_fingerprint']})")
+        self.log()
 
-        print(f"Using template: {template_path.name}")
-        print(f"Target: {self.vimrc_path}")
-        print()
+        # Get configuration options
+        if options is None:
+            options = self.get_config_options(profile)
+
+        # Generate configuration
+        self.log("\nGenerating configuration...")
+        config_content = self.carry_over_theme(self.render_profile(profile, options))
 
-        # Check for drift
-        has_drift = self.check_drift(template_path)
+        # Check for drift against the rendered configuration
+        self.check_platform()
+        has_drift = self.check_drift(config_content)
 
         # Backup existing config
         if has_drift and self.vimrc_path.exists():
-            backup_path = self.backup_existing_config()
+            self.backup_existing_config()
 
         # Ensure directories exist
         self.ensure_vim_directories()
 
-        # Get configuration options
-        options = self.get_config_options()
-
-        # Generate configuration
-        print("\nGenerating configuration...")
-        config_content = self.generate_config(template_path, options)
-
         # Apply configuration
-        print("\nApplying configuration...")
-        self.apply_config(config_content)
+        self.log("\nApplying configuration...")
+        result = self.apply_config(config_content)
 
         # Check local config
         self.check_local_config()
 
-        print("\n" + "=" * 50)
+        self.log("\n" + "=" * 50)
         if self.dry_run:
-            print("DRY RUN completed - no changes were made.")
+            self.log("DRY RUN completed - no changes were made.")
+        elif result == 'unchanged':
+            self.log("Vim configuration is already in sync - no changes were made.")
         else:
-            print("Vim configuration setup completed successfully!")
-            print(f"\nYour vim is now configured according to {template_path.name}")
-            print("You can start using vim with your new configuration.")
+            self.log("Vim configuration setup completed successfully!")
+            self.log(f"\nYour vim is now configured according to profile '{profile}'"
+                     f" ({template_path.name})")
+            self.log("You can start using vim with your new configuration.")
+
+        self.log("\nNext steps:")
+        self.log("  1. Run 'vim' to test your configuration")
+        self.log("  2. Edit ~/.vimrc.local for machine-specific settings")
+        self.log("  3. Re-run this script anytime to sync with the template")
+
+        return result
+
+
+def list_profiles(manager: VimConfigManager) -> int:
+    """Print every profile with its description, chain and options."""
+    status = 0
+    for name in manager.profiles.names():
+        try:
+            resolved = manager.profiles.resolve(name)
+        except ValueError as e:
+            print(f"  {name:<12} error: {e}")
+            status = 1
+            continue
+        print(f"  {name:<12} {resolved.chain[-1].description}")
+        print(f"  {'':<12} {manager.describe_profile(resolved)}")
+        if resolved.options:
+            settings = ', '.join(f"{key}={value}" for key, value in sorted(resolved.options.items()))
+            print(f"  {'':<12} options: {settings}")
+    return status
+
+
+def run_fleet_mode(args: argparse.Namespace) -> int:
+    """Provision every home directory in a fleet manifest."""
+    import json
+    from fleet import load_manifest, print_fleet_summary, run_fleet, run_fleet_reports
+
+    if args.interactive:
+        print("Error: --fleet cannot be combined with --interactive", file=sys.stderr)
+        return 1
+
+    if args.drift_report:
+        # One JSON report per line, nothing else on stdout
+        try:
+            for report in run_fleet_reports(load_manifest(args.fleet), jobs=args.jobs):
+                sys.stdout.write(json.dumps(report, sort_keys=True) + '\n')
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    try:
+        targets = load_manifest(args.fleet)
+        print(f"Fleet mode: {len(targets)} target(s) from {args.fleet}")
+        if args.dry_run:
+            print("[DRY RUN] No changes will be made.")
+        results = list(run_fleet(targets, jobs=args.jobs, dry_run=args.dry_run))
+    except KeyboardInterrupt:
+        print("\n\nFleet run interrupted by user.")
+        return 1
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+
+    print_fleet_summary(results, verbose=len(results) <= 100)
 
-        print("\nNext steps:")
-        print("  1. Run 'vim' to test your configuration")
-        print("  2. Edit ~/.vimrc.local for machine-specific settings")
-        print("  3. Re-run this script anytime to sync with the template")
+    if args.fleet_report:
+        with open(args.fleet_report, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+        print(f"Fleet report written to {args.fleet_report}")
+
+    return 1 if any(r['status'] == 'error' for r in results) else 0
 
 
 def main():
@@ -308,8 +644,17 @@ Examples:
   %(prog)s                        # Apply default config non-interactively
   %(prog)s --interactive          # Interactive mode with prompts
   %(prog)s --minimal              # Use minimal configuration
+  %(prog)s --profile backend      # Team profile: default template + backend overlay
+  %(prog)s --list-profiles        # List profiles and their inheritance
   %(prog)s --dry-run              # Preview changes without applying
   %(prog)s --backup-only          # Only create backup, don't apply
+  %(prog)s --fleet homes.txt      # Apply to every home in a manifest
+  %(prog)s --list-backups         # List stored backups
+  %(prog)s --restore              # Restore the most recent backup
+  %(prog)s --drift-report         # JSON report of drifted settings
+  %(prog)s --watch --auto-apply   # Re-apply the config whenever it drifts
+  %(prog)s --trace trace.json --trace-format chrome
+                                  # Time each phase (open in chrome://tracing)
 
 The script is idempotent - running it multiple times is safe.
         """
@@ -341,13 +686,136 @@ The script is idempotent - running it multiple times is safe.
 
     parser.add_argument(
         '--profile',
-        choices=['default', 'minimal'],
+        choices=ProfileStore(Path(__file__).parent.absolute() / 'profiles').names(),
         default='default',
-        help='Configuration profile to use'
+        help='Configuration profile to use (see --list-profiles)'
+    )
+
+    parser.add_argument(
+        '--list-profiles',
+        action='store_true',
+        help='List configuration profiles and what they inherit'
+    )
+
+    parser.add_argument(
+        '--fleet',
+        metavar='MANIFEST',
+        type=Path,
+        help='Apply configuration to every home directory listed in MANIFEST'
+    )
+
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Number of worker processes for --fleet (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--fleet-report',
+        metavar='FILE',
+        type=Path,
+        help='Write per-target --fleet results to FILE as JSON lines'
+    )
+
+    parser.add_argument(
+        '--list-backups',
+        action='store_true',
+        help='List stored .vimrc backups'
+    )
+
+    parser.add_argument(
+        '--restore',
+        metavar='REF',
+        nargs='?',
+        const='latest',
+        help="Restore ~/.vimrc from a backup ('latest', timestamp or digest prefix)"
+    )
+
+    parser.add_argument(
+        '--migrate-backups',
+        action='store_true',
+        help='Move legacy ~/.vimrc.backup.* files into the backup store'
+    )
+
+    for name, default in DEFAULT_RETENTION.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=int,
+            default=default,
+            metavar='N',
+            help=f"Backup retention: {name.replace('_', ' ')} (default: {default})"
+        )
+
+    parser.add_argument(
+        '--print-config',
+        action='store_true',
+        help='Print the generated configuration to stdout and exit'
+    )
+
+    parser.add_argument(
+        '--drift-report',
+        action='store_true',
+        help='Print a JSON report of the settings that drifted from the template '
+             '(one line per home with --fleet) and exit'
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and re-check drift whenever ~/.vimrc, ~/.vimrc.local, '
+             '~/.vim/colors or the template changes'
+    )
+
+    parser.add_argument(
+        '--auto-apply',
+        action='store_true',
+        help='With --watch, re-apply the configuration and reinstall themes on drift'
+    )
+
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=0.5,
+        metavar='SECONDS',
+        help='With --watch, wait for SECONDS without changes before re-checking '
+             '(default: 0.5)'
+    )
+
+    parser.add_argument(
+        '--poll',
+        metavar='SECONDS',
+        type=float,
+        nargs='?',
+        const=2.0,
+        help='With --watch, poll every SECONDS (default: 2) instead of using inotify'
+    )
+
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        type=Path,
+        help='Time each phase and count file I/O, writing a trace to FILE'
+    )
+
+    parser.add_argument(
+        '--trace-format',
+        choices=['jsonl', 'chrome'],
+        default='jsonl',
+        help='Trace format: JSON lines or Chrome trace events (default: jsonl)'
     )
 
     args = parser.parse_args()
 
+    if args.trace:
+        import instrumentation
+        if args.fleet:
+            import fleet  # noqa: F401 - imported up front so its phases are traced
+        instrumentation.trace_to(args.trace, args.trace_format)
+
+    if args.fleet:
+        return run_fleet_mode(args)
+
     # Handle minimal flag
     if args.minimal:
         args.profile = 'minimal'
@@ -358,10 +826,58 @@ The script is idempotent - running it multiple times is safe.
         dry_run=args.dry_run
     )
 
+    manager.backup_store.retention.update(
+        {name: getattr(args, name) for name in DEFAULT_RETENTION}
+    )
+
+    if args.list_backups:
+        manager.list_backups()
+        return 0
+
+    if args.list_profiles:
+        return list_profiles(manager)
+
+    if args.restore:
+        return 0 if manager.restore_backup(args.restore) else 1
+
+    if args.migrate_backups:
+        count = manager.backup_store.import_legacy(manager.home_dir)
+        print(f"Imported {count} legacy backup file(s) into {manager.backup_store.store_dir}")
+        if count:
+            print("The retention policy applies from the next backup; "
+                  "review them with --list-backups.")
+        return 0
+
+    if args.drift_report:
+        import json
+        from drift_report import report_for_home
+        manager.quiet = True
+        content = manager.render_profile(args.profile, manager.get_config_options(args.profile))
+        report = report_for_home(manager.carry_over_theme(content), manager.home_dir)
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return 0
+
+    if args.watch:
+        from config_watch import ConfigWatcher
+        manager.quiet = True
+        watcher = ConfigWatcher(manager, profile=args.profile, auto_apply=args.auto_apply,
+                                debounce=args.debounce, poll_interval=args.poll)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("\nWatch stopped.")
+        return 0
+
+    if args.print_config:
+        manager.quiet = True
+        content = manager.render_profile(args.profile, manager.get_config_options(args.profile))
+        sys.stdout.write(manager.carry_over_theme(content))
+        return 0
+
     # Handle backup-only mode
     if args.backup_only:
         print("Backup-only mode")
-        manager.backup_existing_config()
+        manager.backup_existing_config(reason='manual')
         return 0
 
     # Run setup
@@ -0,0 +1,131 @@
+"""Tests for remote_fleet.py, with local directories standing in for hosts."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from backup_store import BackupStore
+from drift_index import hash_bytes
+from host_platform import platform_facts, platform_fingerprint, read_fingerprint
+from remote_fleet import LocalTransport, RemoteFleet, TransportError
+from setup_vim import DEFAULT_OPTIONS
+from vimrc_model import VimrcModel
+
+
+def host(path: Path, theme: Optional[str] = None) -> Dict[str, Any]:
+    """Return a host entry as load_hosts does."""
+    return {'host': str(path), 'profile': 'default', 'options': dict(DEFAULT_OPTIONS),
+            'theme': theme}
+
+
+class RemoteFleetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        # Keep the render cache out of the real home directory
+        patcher = mock.patch.dict(os.environ, {'HOME': str(self.tmp / 'local')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def home(self, name: str, vimrc: Optional[str] = None) -> Path:
+        path = self.tmp / name
+        path.mkdir()
+        if vimrc is not None:
+            (path / '.vimrc').write_text(vimrc)
+        return path
+
+    def run_fleet(self, hosts: List[Dict[str, Any]], factory=LocalTransport,
+                  **kwargs) -> List[Dict[str, Any]]:
+        fleet = RemoteFleet(factory, backoff=0, **kwargs)
+        return fleet.run(hosts)
+
+    def test_created_then_unchanged(self):
+        home = self.home('h1')
+        [result] = self.run_fleet([host(home)])
+        self.assertEqual(result['status'], 'created')
+        self.assertEqual(result['pushed_bytes'], (home / '.vimrc').stat().st_size)
+        self.assertEqual(os.stat(home / '.vim').st_mode & 0o777, 0o700)
+
+        [result] = self.run_fleet([host(home)])
+        self.assertEqual(result['status'], 'unchanged')
+        self.assertEqual(result['pushed_bytes'], 0)
+        self.assertEqual(result['round_trips'], 1)
+
+    def test_theme_file_is_installed(self):
+        home = self.home('h1')
+        [result] = self.run_fleet([host(home, theme='forest')])
+        self.assertEqual(result['status'], 'created')
+        self.assertTrue((home / '.vim' / 'colors' / 'forest.vim').exists())
+        model = VimrcModel.from_file(home / '.vimrc')
+        self.assertEqual(model.primary_colorscheme().theme, 'forest')
+
+    def test_update_backs_up_into_store_and_keeps_theme(self):
+        old = 'set nocompatible\ncolorscheme nord\n'
+        home = self.home('h1', old)
+        [result] = self.run_fleet([host(home)])
+        self.assertEqual(result['status'], 'updated')
+
+        store = BackupStore(home / '.vim' / 'vimrc_backups')
+        entry = store.find('latest')
+        self.assertEqual(entry['digest'], hash_bytes(old.encode('utf-8')))
+        self.assertEqual(entry['size'], len(old))
+        self.assertEqual(store.object_path(entry['digest']).read_text(), old)
+        self.assertEqual(len(store.entries()), 1)
+        self.assertFalse(list(home.glob('.vimrc.backup.*')))
+
+        model = VimrcModel.from_file(home / '.vimrc')
+        self.assertEqual(model.primary_colorscheme().theme, 'nord')
+
+    def test_missing_home_is_an_error(self):
+        [result] = self.run_fleet([host(self.tmp / 'missing')], retries=2)
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('does not exist', result['error'])
+        self.assertEqual(result['attempts'], 1)
+        self.assertEqual(result['pushed_bytes'], 0)
+
+    def test_retry_reports_the_successful_attempt(self):
+        home = self.home('h1')
+        failures = []
+
+        class FlakyTransport(LocalTransport):
+            async def write(self, path, data, mode=0o644):
+                await super().write(path, data, mode)
+                if not failures:
+                    failures.append(path)
+                    raise TransportError('connection reset', retryable=True)
+
+        [result] = self.run_fleet([host(home, theme='forest')], factory=FlakyTransport, retries=2)
+        self.assertEqual(failures, ['.vim/colors/forest.vim'])
+        self.assertEqual(result['status'], 'created')
+        self.assertEqual(result['attempts'], 2)
+        self.assertNotIn('error', result)
+        # The theme file landed in the first attempt; only the vimrc is pushed again
+        self.assertEqual(result['files'], ['.vimrc'])
+        self.assertEqual(result['pushed_bytes'], (home / '.vimrc').stat().st_size)
+
+    def test_renders_for_the_probed_platform(self):
+        home = self.home('h1')
+        facts = platform_facts('Darwin', False)
+
+        class DarwinTransport(LocalTransport):
+            async def probe(self, paths, fetch_vimrc=False):
+                remote = await super().probe(paths, fetch_vimrc)
+                remote['facts'] = facts
+                return remote
+
+        [result] = self.run_fleet([host(home)], factory=DarwinTransport)
+        self.assertEqual(result['platform'], 'Darwin')
+        content = (home / '.vimrc').read_text()
+        self.assertEqual(read_fingerprint(content), platform_fingerprint(facts))
+        self.assertIn('" (disabled by setup) set clipboard=unnamed\n', content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Colorscheme Compiler
+
+Compiles parsed colorschemes into minimal vim script for one terminal
+target. Source files carry comments, a `hi clear`/`syntax reset` preamble
+and both gui and cterm attributes; a compiled artifact keeps only:
+
+    - the attributes the target reads (gui* for GUI vim and termguicolors,
+      cterm* for 256-color terminals, or both),
+    - one definition per group (repeated definitions merged, as vim would),
+    - `hi link` entries pointing straight at the end of their link chain,
+    - `hi clear` without `syntax reset`, which `:hi clear` already performs
+      when syntax highlighting is on.
+
+Compiled themes can be installed in place of the sources, or inlined into
+the generated vimrc (see vimrc_model.py) so vim never searches the
+runtimepath for the colorscheme.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from colorscheme import ColorScheme, HighlightGroup
+from drift_index import hash_bytes
+from fileutil import atomic_write
+
+
+TARGETS = ('gui', 'cterm', 'both')
+
+# Bump when the compiled output format changes, to invalidate artifacts
+COMPILER_VERSION = 1
+
+MANIFEST_NAME = '.compile_manifest.json'
+
+# Highlight keys each target reads, in output order
+_TARGET_KEYS: Dict[str, tuple] = {
+    'gui': ('guifg', 'guibg', 'guisp', 'gui'),
+    'cterm': ('ctermfg', 'ctermbg', 'cterm'),
+    'both': ('guifg', 'guibg', 'guisp', 'gui', 'ctermfg', 'ctermbg', 'cterm'),
+}
+
+# Extra (non-color) keys kept per target
+_TARGET_EXTRA: Dict[str, tuple] = {
+    'gui': ('font',),
+    'cterm': ('term', 'start', 'stop'),
+    'both': ('term', 'start', 'stop', 'font'),
+}
+
+
+def resolve_link(scheme: ColorScheme, group: HighlightGroup) -> Optional[str]:
+    """
+    Return the group at the end of a link chain.
+
+    Chains stop at the first group that defines attributes itself or that
+    the scheme does not define (a built-in default group). Cyclic chains
+    are left as written.
+    """
+    seen = {group.name}
+    target = group.link
+    while target is not None:
+        linked = scheme.groups.get(target)
+        if linked is None or linked.link is None:
+            return target
+        if linked.link in seen or linked.link == target:
+            return group.link
+        seen.add(target)
+        target = linked.link
+    return None
+
+
+def compile_group(scheme: ColorScheme, group: HighlightGroup, target: str) -> Optional[str]:
+    """
+    Compile one highlight group.
+
+    Args:
+        scheme: Scheme the group belongs to (for link resolution)
+        group: Group to compile
+        target: 'gui', 'cterm' or 'both'
+
+    Returns:
+        A single `hi` command, or None if the group sets nothing the target uses
+    """
+    if group.link is not None:
+        return f'hi link {group.name} {resolve_link(scheme, group)}'
+
+    attrs = [f'{key}={getattr(group, key)}' for key in _TARGET_KEYS[target]
+             if getattr(group, key) is not None]
+    attrs.extend(f'{key}={value}' for key, value in group.extra.items()
+                 if key in _TARGET_EXTRA[target])
+    if not attrs:
+        return None
+    return f"hi {group.name} {' '.join(attrs)}"
+
+
+def compile_colorscheme(scheme: ColorScheme, target: str = 'both', inline: bool = False) -> str:
+    """
+    Compile a colorscheme to minimal vim script.
+
+    Args:
+        scheme: Parsed colorscheme
+        target: 'gui', 'cterm' or 'both'
+        inline: If True, omit `hi clear` (nothing to clear at vimrc startup)
+
+    Returns:
+        Compiled vim script, one command per line
+
+    Raises:
+        ValueError: If target is unknown
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown compile target '{target}'")
+
+    lines: List[str] = []
+    if scheme.background:
+        lines.append(f'set background={scheme.background}')
+    if not inline:
+        lines.append('hi clear')
+    for group in sorted(scheme.groups.values(), key=lambda g: g.line):
+        compiled = compile_group(scheme, group, target)
+        if compiled is not None:
+            lines.append(compiled)
+    lines.append(f"let g:colors_name = '{scheme.colors_name or scheme.name}'")
+    return '\n'.join(lines) + '\n'
+
+
+class ThemeCompiler:
+    """Keeps compiled artifacts for one target in sync with their sources."""
+
+    def __init__(self, build_dir: Path, target: str = 'both'):
+        """
+        Initialize the compiler.
+
+        Args:
+            build_dir: Directory for compiled artifacts (a subdirectory per target
+                is created)
+            target: 'gui', 'cterm' or 'both'
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown compile target '{target}'")
+        self.target = target
+        self.output_dir = Path(build_dir) / target
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self.compiled = 0
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Return manifest entries keyed by theme name."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == COMPILER_VERSION:
+                return data.get('themes', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def compile_all(self, schemes: Dict[str, ColorScheme],
+                    digests: Dict[str, str]) -> Dict[str, str]:
+        """
+        Compile every scheme whose source changed since it was last compiled.
+
+        Args:
+            schemes: Parsed colorschemes keyed by theme name
+            digests: Source digest of every theme
+
+        Returns:
+            Digest of every compiled artifact, keyed by theme name (suitable
+            for ThemeInstaller.install)
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        themes: Dict[str, Dict] = {}
+
+        for name, scheme in sorted(schemes.items()):
+            entry = manifest.get(name)
+            artifact = self.output_dir / f'{name}.vim'
+            if entry is not None and entry['source'] == digests[name] and artifact.exists():
+                themes[name] = entry
+                continue
+            data = compile_colorscheme(scheme, self.target).encode('utf-8')
+            atomic_write(artifact, data, fsync=False)
+            themes[name] = {'source': digests[name], 'digest': hash_bytes(data)}
+            self.compiled += 1
+
+        for name in set(manifest) - set(themes):
+            (self.output_dir / f'{name}.vim').unlink(missing_ok=True)
+
+        if themes != manifest:
+            data = json.dumps({'version': COMPILER_VERSION, 'themes': themes},
+                              indent=1, sort_keys=True)
+            atomic_write(self.manifest_path, data.encode('utf-8'), fsync=False)
+        return {name: entry['digest'] for name, entry in themes.items()}
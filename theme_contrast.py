@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Theme Contrast Analyzer
+
+Measures how readable the important highlight groups of every theme are.
+For each group the effective foreground and background are resolved the
+way vim draws them: links are followed (including vim's default links,
+e.g. String -> Constant), missing colors fall back to Normal, and
+reverse/inverse swaps the two.
+
+Per (theme, group) pair it reports:
+
+    contrast    WCAG 2 contrast ratio of fg against bg (AA needs 4.5,
+                AAA 7; 3 is the large-text minimum)
+    delta_e     CIE76 distance between fg and bg
+    bg_delta_e  distance between the group's background and Normal's, i.e.
+                how visible a Visual/Search/PmenuSel region is
+
+The metrics are computed as array operations over all groups of all themes
+at once (NumPy when installed, a plain loop otherwise). Results are cached
+in ~/.vim/cache/contrast_cache.json (contrast_cache-<hash>.json for another
+--colors-dir) keyed by theme file digest, so only new or edited themes are
+analyzed again.
+
+Usage:
+    python theme_contrast.py                 # Rank all themes
+    python theme_contrast.py --theme nord    # Per-group detail
+    python theme_contrast.py --colors-dir ~/imported-themes --json report.json
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from colorscheme import ColorScheme, HighlightGroup, ThemeIndex
+from drift_index import hash_bytes
+from fileutil import atomic_write, make_private_dirs
+from xterm_quantize import hex_to_rgb, numpy_module, srgb_to_lab, srgb_to_lab_array
+
+
+CONTRAST_VERSION = 1
+
+# Groups whose legibility is measured, in report order
+ANALYZED_GROUPS = (
+    'Normal', 'Comment', 'LineNr', 'CursorLineNr', 'StatusLine', 'StatusLineNC',
+    'Visual', 'Search', 'IncSearch', 'MatchParen', 'Pmenu', 'PmenuSel', 'Folded',
+    'Constant', 'String', 'Identifier', 'Function', 'Statement', 'PreProc', 'Type',
+    'Special', 'Todo', 'Error', 'ErrorMsg', 'WarningMsg',
+    'DiffAdd', 'DiffChange', 'DiffDelete', 'DiffText',
+)
+
+# Columns shown in the ranked report
+SUMMARY_GROUPS = ('Comment', 'LineNr', 'Search', 'PmenuSel')
+
+# Vim's default links for groups a theme does not define (see :help group-name)
+DEFAULT_LINKS = {
+    'String': 'Constant', 'Character': 'Constant', 'Number': 'Constant',
+    'Boolean': 'Constant', 'Float': 'Number', 'Function': 'Identifier',
+    'Conditional': 'Statement', 'Repeat': 'Statement', 'Label': 'Statement',
+    'Operator': 'Statement', 'Keyword': 'Statement', 'Exception': 'Statement',
+    'Include': 'PreProc', 'Define': 'PreProc', 'Macro': 'PreProc', 'PreCondit': 'PreProc',
+    'StorageClass': 'Type', 'Structure': 'Type', 'Typedef': 'Type',
+    'Tag': 'Special', 'SpecialChar': 'Special', 'Delimiter': 'Special',
+    'SpecialComment': 'Special', 'Debug': 'Special',
+}
+
+# WCAG 2 thresholds, best first
+WCAG_LEVELS = (('AAA', 7.0), ('AA', 4.5), ('AA-large', 3.0))
+AA_RATIO = 4.5
+
+_HEX_COLOR_RE = re.compile(r'#[0-9a-fA-F]{6}')
+
+Pair = Tuple[Optional[str], Optional[str]]
+
+
+def wcag_level(ratio: float) -> str:
+    """Return the best WCAG level a contrast ratio meets ('fail' if none)."""
+    for level, minimum in WCAG_LEVELS:
+        if ratio >= minimum:
+            return level
+    return 'fail'
+
+
+def _defining_group(scheme: ColorScheme, name: str) -> Optional[HighlightGroup]:
+    """Return the group that defines a group's colors, following default links."""
+    seen = set()
+    while name not in seen:
+        seen.add(name)
+        group = scheme.group(name)
+        if group is not None:
+            return group
+        name = DEFAULT_LINKS.get(name, name)
+    return None
+
+
+def _is_reverse(group: HighlightGroup) -> bool:
+    """Return True if a group swaps its foreground and background."""
+    attributes = (group.gui or '').lower().split(',')
+    return 'reverse' in attributes or 'inverse' in attributes
+
+
+def _gui_color(value: Optional[str]) -> Optional[str]:
+    """Return a lowercase '#rrggbb' color, or None for NONE, names and missing values."""
+    return value.lower() if value and _HEX_COLOR_RE.fullmatch(value) else None
+
+
+def resolve_pair(scheme: ColorScheme, name: str, normal: Optional[Pair] = None) -> Pair:
+    """
+    Return the effective (fg, bg) gui colors of a group.
+
+    Colors the group leaves unset come from Normal; reverse swaps them.
+    Either side is None if it cannot be resolved to a '#rrggbb' color.
+
+    Args:
+        scheme: Parsed colorscheme
+        name: Group name
+        normal: Normal's resolved pair, if already known
+    """
+    if normal is None:
+        group = scheme.group('Normal')
+        normal = (_gui_color(group.guifg), _gui_color(group.guibg)) if group else (None, None)
+    group = _defining_group(scheme, name)
+    if group is None:
+        return normal
+    fg = _gui_color(group.guifg) or normal[0]
+    bg = _gui_color(group.guibg) or normal[1]
+    if _is_reverse(group):
+        fg, bg = bg, fg
+    return fg, bg
+
+
+def _luminance(rgb: Sequence[float]) -> float:
+    """WCAG relative luminance of an sRGB color (0-255 per channel)."""
+    linear = []
+    for c in rgb:
+        c /= 255.0
+        linear.append(c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4)
+    return 0.2126 * linear[0] + 0.7152 * linear[1] + 0.0722 * linear[2]
+
+
+def measure(pairs: List[Tuple[str, str, str]]) -> List[Tuple[float, float, float]]:
+    """
+    Compute contrast, delta E and background delta E for color triples.
+
+    Args:
+        pairs: (fg, bg, Normal bg) hex colors
+
+    Returns:
+        (contrast ratio, fg/bg delta E, bg/Normal bg delta E) per triple
+    """
+    if not pairs:
+        return []
+    colors = sorted({color for triple in pairs for color in triple})
+    position = {color: i for i, color in enumerate(colors)}
+    np = numpy_module()
+
+    if np is None:
+        luminance = [_luminance(hex_to_rgb(color)) for color in colors]
+        lab = [srgb_to_lab(hex_to_rgb(color)) for color in colors]
+
+        def distance(a: int, b: int) -> float:
+            return sum((x - y) ** 2 for x, y in zip(lab[a], lab[b])) ** 0.5
+
+        results = []
+        for fg, bg, normal_bg in pairs:
+            f, b, n = position[fg], position[bg], position[normal_bg]
+            light, dark = max(luminance[f], luminance[b]), min(luminance[f], luminance[b])
+            results.append(((light + 0.05) / (dark + 0.05), distance(f, b), distance(b, n)))
+        return results
+
+    # Every distinct color is converted once; pairs index into those arrays
+    rgb = np.array([hex_to_rgb(color) for color in colors], dtype=float)
+    c = rgb / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    luminance = linear @ np.array([0.2126, 0.7152, 0.0722])
+    lab = srgb_to_lab_array(rgb)
+
+    index = np.array([[position[color] for color in triple] for triple in pairs])
+    fg, bg, normal_bg = index[:, 0], index[:, 1], index[:, 2]
+    light = np.maximum(luminance[fg], luminance[bg])
+    dark = np.minimum(luminance[fg], luminance[bg])
+    contrast = (light + 0.05) / (dark + 0.05)
+    delta = np.linalg.norm(lab[fg] - lab[bg], axis=1)
+    bg_delta = np.linalg.norm(lab[bg] - lab[normal_bg], axis=1)
+    return list(zip(contrast.tolist(), delta.tolist(), bg_delta.tolist()))
+
+
+def analyze(schemes: Dict[str, ColorScheme],
+            groups: Sequence[str] = ANALYZED_GROUPS) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Analyze the legibility of groups in many themes in one batch.
+
+    Returns:
+        Dictionary of theme -> group -> {'fg', 'bg', 'contrast', 'delta_e',
+        'bg_delta_e'}; groups whose colors cannot be resolved are left out
+    """
+    keys: List[Tuple[str, str]] = []
+    triples: List[Tuple[str, str, str]] = []
+    resolved: Dict[str, Dict[str, Pair]] = {}
+    for theme, scheme in schemes.items():
+        normal = resolve_pair(scheme, 'Normal')
+        pairs = {name: resolve_pair(scheme, name, normal) for name in groups}
+        resolved[theme] = pairs
+        normal_bg = normal[1]
+        for name, (fg, bg) in pairs.items():
+            if fg and bg:
+                keys.append((theme, name))
+                triples.append((fg, bg, normal_bg or bg))
+
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {theme: {} for theme in schemes}
+    for (theme, name), (contrast, delta, bg_delta) in zip(keys, measure(triples)):
+        fg, bg = resolved[theme][name]
+        results[theme][name] = {
+            'fg': fg, 'bg': bg,
+            'contrast': round(contrast, 2),
+            'delta_e': round(delta, 1),
+            'bg_delta_e': round(bg_delta, 1),
+        }
+    return results
+
+
+class ContrastCache:
+    """Analysis results persisted by theme file digest."""
+
+    def __init__(self, path: Path, groups: Sequence[str] = ANALYZED_GROUPS):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file
+            groups: Groups analyzed (a different set invalidates the cache)
+        """
+        self.path = Path(path)
+        self.groups = list(groups)
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CONTRAST_VERSION and data.get('groups') == self.groups:
+                return data['themes']
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return {}
+
+    def results(self, schemes: Dict[str, ColorScheme],
+                digests: Dict[str, str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Return results for schemes, analyzing only uncached digests.
+
+        Entries whose digest is not in digests are dropped when the cache is
+        rewritten, so results of deleted or edited themes do not accumulate.
+
+        Args:
+            schemes: Themes to return results for
+            digests: Content digest of every current theme (a superset of
+                schemes)
+        """
+        cached = self._read()
+        missing = {theme: scheme for theme, scheme in schemes.items()
+                   if digests[theme] not in cached}
+        self.hits = len(schemes) - len(missing)
+        self.misses = len(missing)
+        fresh = analyze(missing, self.groups) if missing else {}
+
+        current = set(digests.values())
+        entries = {digest: result for digest, result in cached.items() if digest in current}
+        entries.update((digests[theme], result) for theme, result in fresh.items())
+        if missing or len(entries) != len(cached):
+            self._save(entries)
+        return {theme: entries[digests[theme]] for theme in schemes}
+
+    def _save(self, entries: Dict[str, Dict]):
+        """Persist the cache; failures only cost a re-analysis next time."""
+        data = {'version': CONTRAST_VERSION, 'groups': self.groups, 'themes': entries}
+        try:
+            make_private_dirs(self.path.parent)
+            atomic_write(self.path, json.dumps(data).encode('utf-8'), fsync=False)
+        except OSError:
+            pass
+
+
+def rank(results: Dict[str, Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Rank themes by legibility.
+
+    Themes with fewer groups below WCAG AA come first; ties go to the
+    higher minimum contrast.
+
+    Returns:
+        One summary per theme, best first, with 'theme', 'groups',
+        'failing' (group names below AA), 'min_contrast', 'min_group' and
+        'median_contrast'
+    """
+    summaries = []
+    for theme, groups in results.items():
+        ratios = sorted((metrics['contrast'], name) for name, metrics in groups.items())
+        values = [ratio for ratio, _ in ratios]
+        summaries.append({
+            'theme': theme,
+            'groups': len(groups),
+            'failing': [name for ratio, name in ratios if ratio < AA_RATIO],
+            'min_contrast': values[0] if values else None,
+            'min_group': ratios[0][1] if ratios else None,
+            'median_contrast': values[len(values) // 2] if values else None,
+        })
+    summaries.sort(key=lambda s: (s['groups'] == 0, len(s['failing']),
+                                  -(s['min_contrast'] or 0), s['theme']))
+    return summaries
+
+
+def print_ranking(summaries: List[Dict[str, Any]], results: Dict[str, Dict[str, Dict]]):
+    """Print the ranked report with contrast ratios of the summary groups."""
+    header = ''.join(f"{name:>10}" for name in SUMMARY_GROUPS)
+    print(f"{'#':>3}  {'Theme':<18}{'below AA':>9}{'min':>7}  {'(group)':<14}{'median':>7}{header}")
+    print("=" * (60 + 10 * len(SUMMARY_GROUPS)))
+    for position, summary in enumerate(summaries, 1):
+        groups = results[summary['theme']]
+        columns = ''.join(
+            f"{groups[name]['contrast']:>10.2f}" if name in groups else f"{'-':>10}"
+            for name in SUMMARY_GROUPS)
+        if summary['groups'] == 0:
+            print(f"{position:>3}  {summary['theme']:<18}  (no resolvable gui colors)")
+            continue
+        print(f"{position:>3}  {summary['theme']:<18}{len(summary['failing']):>9}"
+              f"{summary['min_contrast']:>7.2f}  {summary['min_group']:<14}"
+              f"{summary['median_contrast']:>7.2f}{columns}")
+
+
+def print_detail(theme: str, groups: Dict[str, Dict[str, Any]]):
+    """Print every analyzed group of one theme."""
+    print(f"{theme}")
+    print("=" * 70)
+    print(f"  {'Group':<14}{'fg':>9}{'bg':>9}{'contrast':>10}  {'WCAG':<9}{'ΔE':>6}{'bg ΔE':>7}")
+    for name in ANALYZED_GROUPS:
+        metrics = groups.get(name)
+        if metrics is None:
+            print(f"  {name:<14}{'-':>9}{'-':>9}")
+            continue
+        print(f"  {name:<14}{metrics['fg']:>9}{metrics['bg']:>9}{metrics['contrast']:>10.2f}  "
+              f"{wcag_level(metrics['contrast']):<9}{metrics['delta_e']:>6.1f}"
+              f"{metrics['bg_delta_e']:>7.1f}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Rank themes by the contrast of their highlight groups',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                              # Rank every theme in colors/
+  %(prog)s --theme nord                 # Every group of one theme
+  %(prog)s --colors-dir DIR --json out  # Rank another theme collection
+        """
+    )
+    parser.add_argument('--colors-dir', type=Path, default=Path(__file__).parent / 'colors',
+                        help='Directory of colorschemes (default: colors/)')
+    parser.add_argument('--theme', help='Show every group of one theme')
+    parser.add_argument('--no-cache', action='store_true', help='Re-analyze every theme')
+    parser.add_argument('--json', type=Path, metavar='FILE',
+                        help='Write the ranking and per-group results to FILE')
+    args = parser.parse_args()
+
+    colors_dir = args.colors_dir.expanduser().absolute()
+    if not colors_dir.is_dir():
+        print(f"Error: colors directory does not exist: {colors_dir}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    cache_dir = Path.home() / '.vim' / 'cache'
+    # The shared index and cache belong to the repo's colors; other
+    # directories get their own, so alternating between them prunes nothing
+    if colors_dir == (Path(__file__).parent / 'colors').absolute():
+        suffix = ''
+    else:
+        suffix = f"-{hash_bytes(str(colors_dir).encode())[:12]}"
+    index_path = cache_dir / f'theme_index{suffix}.json'
+    index = ThemeIndex(index_path, colors_dir)
+    schemes = index.schemes()
+    if args.theme:
+        if args.theme not in schemes:
+            print(f"Error: unknown theme '{args.theme}'", file=sys.stderr)
+            return 1
+        schemes = {args.theme: schemes[args.theme]}
+
+    if args.no_cache:
+        results = analyze(schemes)
+        note = f"{len(schemes)} analyzed"
+    else:
+        cache = ContrastCache(cache_dir / f'contrast_cache{suffix}.json')
+        results = cache.results(schemes, index.digests())
+        note = f"{cache.misses} analyzed, {cache.hits} cached"
+
+    summaries = rank(results)
+    if args.theme:
+        print_detail(args.theme, results[args.theme])
+    else:
+        print_ranking(summaries, results)
+    print(f"\n{len(schemes)} theme(s) ({note}) in {time.perf_counter() - start:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'ranking': summaries, 'themes': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Theme Installation
+
+Installs colorscheme files into ~/.vim/colors incrementally. An install
+manifest (~/.vim/colors/.install_manifest.json) records, for each file
+this tool installed, the digest of its source and the stat signature of
+the installed copy. Only new or changed themes are copied; themes removed
+from the repository are pruned if the installed copy is still the one
+this tool wrote.
+
+Files can be installed as copies, hardlinks or reflinks (copy-on-write
+clones); the link modes fall back to a copy across filesystems.
+"""
+
+import errno
+import fcntl
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+from fileutil import atomic_write
+
+
+MANIFEST_NAME = '.install_manifest.json'
+MANIFEST_VERSION = 1
+
+LINK_MODES = ('copy', 'hardlink', 'reflink')
+
+# Linux FICLONE ioctl: clone a whole file sharing extents (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def _reflink(source: Path, dest: Path):
+    """Clone source into dest with FICLONE; raises OSError if unsupported."""
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, dest)
+
+
+class ThemeInstaller:
+    """Keeps an install directory in sync with a colors directory."""
+
+    def __init__(self, colors_dir: Path, install_dir: Path, link_mode: str = 'copy'):
+        """
+        Initialize the installer.
+
+        Args:
+            colors_dir: Source directory with colorscheme files
+            install_dir: Destination directory (usually ~/.vim/colors)
+            link_mode: 'copy', 'hardlink' or 'reflink'
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}'")
+        self.colors_dir = Path(colors_dir)
+        self.install_dir = Path(install_dir)
+        self.link_mode = link_mode
+        self.manifest_path = self.install_dir / MANIFEST_NAME
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        """Return manifest entries keyed by file name."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                return data.get('files', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _save_manifest(self, files: Dict[str, Dict]):
+        """Persist the manifest."""
+        data = json.dumps({'version': MANIFEST_VERSION, 'files': files}, indent=1, sort_keys=True)
+        atomic_write(self.manifest_path, data.encode('utf-8'), fsync=False)
+
+    def _installed_signature(self, dest: Path) -> List[int]:
+        """Return the stat signature recorded for an installed file."""
+        st = os.stat(dest)
+        return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+    def _place(self, source: Path, dest: Path) -> str:
+        """
+        Put source at dest using the configured link mode.
+
+        Returns:
+            The mode actually used (link modes fall back to 'copy')
+        """
+        tmp = dest.with_name(f'.{dest.name}.tmp')
+        if tmp.exists():
+            tmp.unlink()
+
+        mode = self.link_mode
+        try:
+            if mode == 'hardlink':
+                os.link(source, tmp)
+            elif mode == 'reflink':
+                _reflink(source, tmp)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP,
+                               errno.ENOTTY, errno.EINVAL, errno.EMLINK):
+                raise
+            if tmp.exists():
+                tmp.unlink()
+            mode = 'copy'
+
+        if mode == 'copy':
+            shutil.copy2(source, tmp)
+        os.replace(tmp, dest)
+        return mode
+
+    def changed(self) -> List[str]:
+        """
+        List installed files that no longer match what this tool wrote.
+
+        Returns:
+            Sorted file names whose installed copy was edited, replaced or
+            deleted since it was installed
+        """
+        changed = []
+        for name, entry in self.load_manifest().items():
+            try:
+                if self._installed_signature(self.install_dir / name) == entry['signature']:
+                    continue
+            except FileNotFoundError:
+                pass
+            changed.append(name)
+        return sorted(changed)
+
+    def install(self, digests: Dict[str, str], prune: bool = True) -> Dict[str, List[str]]:
+        """
+        Bring the install directory up to date.
+
+        Args:
+            digests: Content digest of every source theme, keyed by theme name
+            prune: If True, remove previously installed themes that no longer
+                exist in the source directory
+
+        Returns:
+            Theme file names grouped under 'installed', 'unchanged' and 'pruned'
+        """
+        self.install_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self.load_manifest()
+        files: Dict[str, Dict] = {}
+        result: Dict[str, List[str]] = {'installed': [], 'unchanged': [], 'pruned': []}
+
+        for theme, digest in sorted(digests.items()):
+            name = f'{theme}.vim'
+            dest = self.install_dir / name
+            entry = manifest.get(name)
+
+            if entry is not None and entry['digest'] == digest and entry['mode'] == self.link_mode:
+                try:
+                    if self._installed_signature(dest) == entry['signature']:
+                        files[name] = entry
+                        result['unchanged'].append(name)
+                        continue
+                except FileNotFoundError:
+                    pass
+
+            mode = self._place(self.colors_dir / name, dest)
+            files[name] = {
+                'digest': digest,
+                'mode': self.link_mode,
+                'placed_as': mode,
+                'signature': self._installed_signature(dest),
+            }
+            result['installed'].append(name)
+
+        for name, entry in manifest.items():
+            if name in files:
+                continue
+            dest = self.install_dir / name
+            try:
+                untouched = self._installed_signature(dest) == entry['signature']
+            except FileNotFoundError:
+                continue
+            if prune and untouched:
+                dest.unlink()
+                result['pruned'].append(name)
+            else:
+                # Keep tracking it so a later run can still prune it
+                files[name] = entry
+
+        if files != manifest:
+            self._save_manifest(files)
+        return result
@@ -0,0 +1,475 @@
+"""
+Full-Screen Theme Picker
+
+A raw-mode terminal picker for select_theme.py: type to fuzzy-filter the
+themes, move with the arrow keys and see the highlighted theme previewed
+live; Enter applies it, Esc cancels.
+
+The screen is double-buffered as rows of (style, character) cells. Each
+frame is diffed against the previous one and only the changed runs of
+cells are sent, with one cursor move per run, so a keystroke over a slow
+SSH hop costs a few dozen bytes instead of a full repaint. All keys that
+have already arrived are applied before drawing, and frames are spaced at
+least FRAME_INTERVAL apart, so fast key repeat collapses into a few frames.
+
+select_theme.py falls back to the numbered prompt when stdin or stdout is
+not a terminal.
+"""
+
+import os
+import re
+import select
+import shutil
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import termios
+    import tty
+except ImportError:  # not a POSIX terminal
+    termios = None
+    tty = None
+
+
+RESET = '\033[0m'
+BOLD = '\033[1m'
+DIM = '\033[2m'
+REVERSE = '\033[7m'
+
+# Minimum time between frames; input arriving sooner is applied first
+FRAME_INTERVAL = 1 / 60
+# How long a lone ESC waits for the rest of an escape sequence
+ESC_TIMEOUT = 0.03
+# Idle wake-up interval for noticing terminal resizes
+IDLE_TIMEOUT = 0.25
+# Unchanged cells between two changed runs that are resent rather than
+# skipped with a cursor move (a move costs about as many bytes)
+MAX_GAP = 6
+
+ENTER_SCREEN = '\033[?1049h\033[?25l\033[2J'
+LEAVE_SCREEN = '\033[0m\033[?25h\033[?1049l'
+
+_KEY_SEQUENCES: Dict[bytes, str] = {
+    b'\x1b[A': 'up', b'\x1bOA': 'up', b'\x1b[B': 'down', b'\x1bOB': 'down',
+    b'\x1b[5~': 'page-up', b'\x1b[6~': 'page-down',
+    b'\x1b[H': 'home', b'\x1bOH': 'home', b'\x1b[1~': 'home',
+    b'\x1b[F': 'end', b'\x1bOF': 'end', b'\x1b[4~': 'end',
+    b'\x1b[C': 'right', b'\x1bOC': 'right', b'\x1b[D': 'left', b'\x1bOD': 'left',
+}
+_CONTROL_KEYS: Dict[int, str] = {
+    0x03: 'interrupt', 0x04: 'interrupt', 0x0d: 'enter', 0x0a: 'enter',
+    0x7f: 'backspace', 0x08: 'backspace', 0x15: 'clear', 0x09: '\t',
+    0x10: 'up', 0x0e: 'down',  # Ctrl-P / Ctrl-N
+}
+_CSI_RE = re.compile(rb'\x1b(?:\[[0-9;]*[A-Za-z~]|O[A-Za-z])')
+_SGR_RE = re.compile(r'(\x1b\[[0-9;]*m)')
+
+Cell = Tuple[str, str]
+Row = List[Cell]
+
+
+def parse_keys(data: bytes) -> Tuple[List[str], bytes]:
+    """
+    Split terminal input into keys.
+
+    Returns:
+        (keys, rest): printable characters are returned as themselves, other
+        keys by name; rest is an incomplete escape sequence to prepend to the
+        next read
+    """
+    keys: List[str] = []
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte == 0x1b:
+            match = _CSI_RE.match(data, i)
+            if match:
+                key = _KEY_SEQUENCES.get(match.group())
+                if key:
+                    keys.append(key)
+                i = match.end()
+                continue
+            if i + 1 == len(data) or (data[i + 1:i + 2] in (b'[', b'O') and i + 2 == len(data)):
+                return keys, data[i:]
+            keys.append('escape')
+            i += 1
+            continue
+        if byte in _CONTROL_KEYS:
+            keys.append(_CONTROL_KEYS[byte])
+            i += 1
+            continue
+        # Decode one UTF-8 character
+        length = 1 if byte < 0x80 else 2 if byte >> 5 == 0b110 else 3 if byte >> 4 == 0b1110 else 4
+        if i + length > len(data):
+            return keys, data[i:]
+        char = data[i:i + length].decode('utf-8', 'replace')
+        if char.isprintable():
+            keys.append(char)
+        i += length
+    return keys, b''
+
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """
+    Score how well query matches text as a subsequence (higher is better).
+
+    Returns:
+        The score, or None if the characters of query do not appear in text
+        in order. Matches at the start and consecutive matches score higher.
+    """
+    if not query:
+        return 0
+    text = text.lower()
+    score = 0
+    position = -1
+    for char in query.lower():
+        found = text.find(char, position + 1)
+        if found < 0:
+            return None
+        score += 10 if found == position + 1 else 1
+        if found == 0:
+            score += 15
+        position = found
+    return score - len(text) // 10
+
+
+def parse_ansi(text: str, width: int) -> List[Row]:
+    """
+    Convert text with SGR escape sequences into rows of cells.
+
+    Args:
+        text: Text as written to a terminal
+        width: Rows are truncated to this many cells
+
+    Returns:
+        One row per line, each cell carrying the style it is drawn in
+    """
+    rows: List[Row] = [[]]
+    style = ''
+    for part in _SGR_RE.split(text):
+        if not part:
+            continue
+        if part.startswith('\033['):
+            if part in (RESET, '\033[m') or part.startswith('\033[0;'):
+                style = '' if part in (RESET, '\033[m') else part
+            else:
+                style += part
+            continue
+        for char in part:
+            if char == '\n':
+                rows.append([])
+            elif char == '\r':
+                continue
+            elif len(rows[-1]) < width:
+                rows[-1].append((style, ' ' if char == '\t' else char))
+    return rows
+
+
+def text_row(segments: Sequence[Tuple[str, str]], width: int, fill: str = '') -> Row:
+    """Build a row of cells from (style, text) segments, padded to width."""
+    row: Row = []
+    for style, text in segments:
+        row.extend((style, char) for char in text)
+    row = row[:width]
+    row.extend([(fill, ' ')] * (width - len(row)))
+    return row
+
+
+class Screen:
+    """Double-buffered terminal screen that only redraws changed cells."""
+
+    def __init__(self, write: Callable[[str], None]):
+        """
+        Initialize the screen.
+
+        Args:
+            write: Sends a frame to the terminal (called once per frame)
+        """
+        self.write = write
+        self.previous: List[Row] = []
+        self.frames = 0
+        self.bytes_written = 0
+
+    def invalidate(self):
+        """Forget the displayed contents so the next frame is drawn in full."""
+        self.previous = []
+        self.write('\033[0m\033[2J')
+
+    def diff(self, rows: List[Row]) -> str:
+        """Return the escape sequences that turn the previous frame into rows."""
+        out: List[str] = []
+        for y, row in enumerate(rows):
+            old = self.previous[y] if y < len(self.previous) else []
+            if row == old:
+                continue
+            x = 0
+            while x < len(row):
+                if x < len(old) and old[x] == row[x]:
+                    x += 1
+                    continue
+                # A changed run, extended over short gaps of unchanged cells
+                end = x + 1
+                gap = 0
+                while end < len(row) and gap <= MAX_GAP:
+                    gap = gap + 1 if end < len(old) and old[end] == row[end] else 0
+                    end += 1
+                end -= gap
+                out.append(f'\033[{y + 1};{x + 1}H')
+                style = None
+                for cell_style, char in row[x:end]:
+                    if cell_style != style:
+                        out.append(RESET + cell_style)
+                        style = cell_style
+                    out.append(char)
+                x = end
+            if len(old) > len(row):
+                out.append(f'\033[{y + 1};{len(row) + 1}H{RESET}\033[K')
+        for y in range(len(rows), len(self.previous)):
+            out.append(f'\033[{y + 1};1H{RESET}\033[K')
+        if out:
+            out.append(RESET)
+        return ''.join(out)
+
+    def draw(self, rows: List[Row]):
+        """Display a frame, sending only what changed."""
+        frame = self.diff(rows)
+        self.previous = rows
+        if frame:
+            self.frames += 1
+            self.bytes_written += len(frame.encode('utf-8'))
+            self.write(frame)
+
+
+class ThemePicker:
+    """Interactive fuzzy theme picker with a live preview."""
+
+    def __init__(self, themes: List[str], describe: Callable[[str], str],
+                 preview: Callable[[str], str], current: Optional[str] = None,
+                 styles: Optional[Dict[str, str]] = None):
+        """
+        Initialize the picker.
+
+        Args:
+            themes: Theme names
+            describe: Returns the one-line description of a theme
+            preview: Returns the rendered preview of a theme
+            current: Theme to start on (marked as current in the list)
+            styles: Per-theme style of the theme's name in the list
+        """
+        self.themes = themes
+        self.describe = describe
+        self.preview = preview
+        self.current = current
+        self.styles = styles or {}
+        self.query = ''
+        self.matches = list(themes)
+        self.index = themes.index(current) if current in themes else 0
+        self.top = 0
+        self.frames = 0
+        self.bytes_written = 0
+        self._previews: Dict[Tuple[str, int], List[Row]] = {}
+        self._descriptions: Dict[str, str] = {}
+
+    # -- State -----------------------------------------------------------------
+
+    @property
+    def selected(self) -> Optional[str]:
+        """The highlighted theme, if any theme matches the filter."""
+        return self.matches[self.index] if self.matches else None
+
+    def _filter(self):
+        """Recompute the matches for the query, keeping the selection if possible."""
+        selected = self.selected
+        scored = []
+        for position, theme in enumerate(self.themes):
+            score = fuzzy_score(self.query, theme)
+            if score is not None:
+                scored.append((-score, position, theme))
+        self.matches = [theme for _, _, theme in sorted(scored)]
+        self.index = self.matches.index(selected) if selected in self.matches else 0
+
+    def handle(self, key: str, page: int = 8) -> Optional[str]:
+        """
+        Apply one key.
+
+        Returns:
+            'select' or 'cancel' when the picker should close, else None
+        """
+        if key == 'enter':
+            return 'select' if self.selected else None
+        if key in ('escape', 'interrupt'):
+            return 'cancel'
+        count = len(self.matches)
+        if key == 'up' and count:
+            self.index = (self.index - 1) % count
+        elif key == 'down' and count:
+            self.index = (self.index + 1) % count
+        elif key == 'page-up':
+            self.index = max(0, self.index - page)
+        elif key == 'page-down':
+            self.index = max(0, min(count - 1, self.index + page))
+        elif key == 'home':
+            self.index = 0
+        elif key == 'end':
+            self.index = max(0, count - 1)
+        elif key == 'backspace':
+            if self.query:
+                self.query = self.query[:-1]
+                self._filter()
+        elif key == 'clear':
+            self.query = ''
+            self._filter()
+        elif len(key) == 1 and key.isprintable():
+            self.query += key
+            self._filter()
+        return None
+
+    # -- Drawing ---------------------------------------------------------------
+
+    def _preview_rows(self, theme: str, width: int) -> List[Row]:
+        """Return the preview of a theme as cells (cached per theme and width)."""
+        key = (theme, width)
+        if key not in self._previews:
+            rows = parse_ansi(self.preview(theme).strip('\n'), width)
+            self._previews[key] = [row + [('', ' ')] * (width - len(row)) for row in rows]
+        return self._previews[key]
+
+    def _description(self, theme: str) -> str:
+        if theme not in self._descriptions:
+            self._descriptions[theme] = self.describe(theme)
+        return self._descriptions[theme]
+
+    def compose(self, width: int, height: int) -> List[Row]:
+        """Lay out the header, filter line, theme list and preview."""
+        preview = self._preview_rows(self.selected, width) if self.selected else []
+        list_rows = max(3, min(len(self.themes), height - 4 - len(preview), 12))
+        if self.index < self.top:
+            self.top = self.index
+        elif self.index >= self.top + list_rows:
+            self.top = self.index - list_rows + 1
+        self.top = max(0, min(self.top, max(0, len(self.matches) - list_rows)))
+
+        rows = [
+            text_row([(BOLD, ' Select a theme'),
+                      (DIM, '   type to filter · ↑/↓ move · Enter apply · Esc cancel')], width),
+            text_row([(BOLD, ' > '), ('', self.query), (REVERSE, ' '),
+                      (DIM, f'   {len(self.matches)}/{len(self.themes)}')], width),
+        ]
+        for position in range(self.top, self.top + list_rows):
+            if position >= len(self.matches):
+                rows.append(text_row([], width))
+                continue
+            theme = self.matches[position]
+            marker = '●' if theme == self.current else ' '
+            name_style = self.styles.get(theme, '')
+            if position == self.index:
+                rows.append(text_row([(REVERSE, f' {marker} {theme:<14} '),
+                                      (REVERSE, self._description(theme))], width, REVERSE))
+            else:
+                rows.append(text_row([('', f' {marker} '), (name_style + BOLD, f'{theme:<14}'),
+                                      ('', ' '), (DIM, self._description(theme))], width))
+        rows.append(text_row([], width))
+        rows.extend(preview)
+        return rows[:height]
+
+    # -- Terminal loop ---------------------------------------------------------
+
+    def run(self, fd_in: Optional[int] = None, fd_out: Optional[int] = None) -> Optional[str]:
+        """
+        Run the picker on the terminal.
+
+        Args:
+            fd_in: Terminal input descriptor (defaults to stdin)
+            fd_out: Terminal output descriptor (defaults to stdout)
+
+        Returns:
+            The chosen theme, or None if cancelled
+        """
+        action, screen = run_terminal(self.compose, self.handle, fd_in, fd_out)
+        self.frames = screen.frames
+        self.bytes_written = screen.bytes_written
+        return self.selected if action == 'select' else None
+
+
+def run_terminal(compose: Callable[[int, int], List[Row]], handle: Callable[[str], Optional[str]],
+                 fd_in: Optional[int] = None, fd_out: Optional[int] = None
+                 ) -> Tuple[str, Screen]:
+    """
+    Run a full-screen view in raw mode until a key ends it.
+
+    Args:
+        compose: Returns the rows of a frame for (width, height)
+        handle: Applies one key; returns an action to end the loop, else None
+        fd_in: Terminal input descriptor (defaults to stdin)
+        fd_out: Terminal output descriptor (defaults to stdout)
+
+    Returns:
+        (action that ended the loop, 'cancel' on end of input; the screen)
+    """
+    fd_in = sys.stdin.fileno() if fd_in is None else fd_in
+    fd_out = sys.stdout.fileno() if fd_out is None else fd_out
+
+    def write(text: str):
+        data = text.encode('utf-8')
+        while data:
+            data = data[os.write(fd_out, data):]
+
+    saved = termios.tcgetattr(fd_in)
+    screen = Screen(write)
+    try:
+        tty.setraw(fd_in)
+        write(ENTER_SCREEN)
+        size = shutil.get_terminal_size()
+        screen.draw(compose(size.columns, size.lines))
+        last_frame = time.monotonic()
+        pending = b''
+
+        while True:
+            ready, _, _ = select.select([fd_in], [], [], IDLE_TIMEOUT)
+            if ready:
+                data = pending + os.read(fd_in, 4096)
+                # Apply everything that has already arrived before drawing
+                while select.select([fd_in], [], [], 0)[0]:
+                    chunk = os.read(fd_in, 4096)
+                    if not chunk:
+                        break
+                    data += chunk
+                if not data:
+                    return 'cancel', screen
+                keys, pending = parse_keys(data)
+                if pending and not select.select([fd_in], [], [], ESC_TIMEOUT)[0]:
+                    keys.append('escape')
+                    pending = b''
+                for key in keys:
+                    action = handle(key)
+                    if action is not None:
+                        return action, screen
+
+                wait = FRAME_INTERVAL - (time.monotonic() - last_frame)
+                if wait > 0 and select.select([fd_in], [], [], wait)[0]:
+                    continue  # more keys coming; draw once they are applied
+
+            new_size = shutil.get_terminal_size()
+            if new_size != size:
+                size = new_size
+                screen.invalidate()
+            elif not ready:
+                continue
+            screen.draw(compose(size.columns, size.lines))
+            last_frame = time.monotonic()
+    finally:
+        write(LEAVE_SCREEN)
+        termios.tcsetattr(fd_in, termios.TCSAFLUSH, saved)
+
+
+def available(stdin=None, stdout=None) -> bool:
+    """Return True if the picker can run (both streams are a capable terminal)."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    if termios is None or os.environ.get('TERM', 'dumb') == 'dumb':
+        return False
+    try:
+        return stdin.isatty() and stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
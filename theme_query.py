@@ -0,0 +1,167 @@
+"""
+Theme Query Fast Path
+
+Answers the read-only queries of select_theme.py (--current, --names and
+--list) before the rest of the selector is imported, so shell prompt
+hooks and `make theme-list` do not pay for argparse, re, json, pathlib or
+parsing ~/.vimrc on every call.
+
+Answers come from a small cache file (~/.vim/cache/theme_query) keyed on
+stat signatures: ~/.vimrc for the current theme, and the colors directory,
+every theme file and select_theme.py itself for the theme list. The full
+selector refreshes the cache whenever it has to compute an answer. This
+module only imports os, sys, time and typing.
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+CACHE_VERSION = 'theme-query 1'
+
+# Files modified this recently may change again within the same mtime tick;
+# their signatures are not cached (see drift_index.RACY_WINDOW_NS)
+RACY_WINDOW_NS = 2_000_000_000
+
+# Flags answered by the fast path when given on their own
+QUERY_FLAGS = ('--current', '--names', '--list', '-l')
+
+
+def _signature(path: str, now_ns: int) -> str:
+    """Return 'ino:size:mtime' for a path, or '' if missing or too recent to trust."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ''
+    if now_ns - st.st_mtime_ns < RACY_WINDOW_NS:
+        return ''
+    return f'{st.st_ino}:{st.st_size}:{st.st_mtime_ns}'
+
+
+def theme_names(colors_dir: str) -> List[str]:
+    """Return the sorted theme names in a colors directory."""
+    try:
+        return sorted(entry.name[:-4] for entry in os.scandir(colors_dir)
+                      if entry.name.endswith('.vim'))
+    except OSError:
+        return []
+
+
+def colors_key(colors_dir: str, script: str) -> str:
+    """
+    Return the cache key for the theme list.
+
+    Combines the signatures of the colors directory, each theme file and
+    the selector script (which carries the curated theme metadata). An
+    empty key means some file is too recent to cache.
+    """
+    now = time.time_ns()
+    parts = [_signature(colors_dir, now), _signature(script, now)]
+    for name in theme_names(colors_dir):
+        parts.append(f'{name}={_signature(os.path.join(colors_dir, name + ".vim"), now)}')
+    if any(part == '' or part.endswith('=') for part in parts):
+        return ''
+    return ';'.join(parts)
+
+
+def vimrc_key(vimrc_path: str) -> str:
+    """Return the cache key for the current theme ('' if not cacheable)."""
+    return _signature(vimrc_path, time.time_ns())
+
+
+def cache_path(home: str) -> str:
+    """Return the location of the query cache."""
+    return os.path.join(home, '.vim', 'cache', 'theme_query')
+
+
+def load_cache(path: str) -> Dict[str, str]:
+    """
+    Read the query cache.
+
+    Returns:
+        Entries 'vimrc', 'current', 'colors' and 'list' that are present;
+        empty if the cache is missing or from another version
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.readline().rstrip('\n') != CACHE_VERSION:
+                return {}
+            entries = {}
+            for line in f:
+                key, _, value = line.rstrip('\n').partition(' ')
+                if key == 'list':
+                    entries['list'] = f.read()
+                    break
+                entries[key] = value
+            return entries
+    except (OSError, UnicodeDecodeError):
+        return {}
+
+
+def update_cache(home: str, **entries: str):
+    """
+    Merge entries into the query cache; failures only cost a slow query.
+
+    Args:
+        home: Home directory owning the cache
+        entries: Any of vimrc, current, colors and list
+    """
+    from fileutil import atomic_write
+
+    path = cache_path(home)
+    data = load_cache(path)
+    data.update(entries)
+    lines = [CACHE_VERSION]
+    for key in ('vimrc', 'current', 'colors'):
+        if key in data:
+            lines.append(f'{key} {data[key]}')
+    text = '\n'.join(lines) + '\n'
+    if 'list' in data:
+        text += 'list\n' + data['list']
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        atomic_write(path, text.encode('utf-8'), mode=0o600, fsync=False)
+    except OSError:
+        pass
+
+
+def fast_query(argv: List[str], script: str, home: str = '') -> Optional[int]:
+    """
+    Answer a read-only query from the cache if possible.
+
+    Args:
+        argv: Command line arguments (without the program name)
+        script: Path of select_theme.py (locates the colors directory)
+        home: Home directory (defaults to $HOME)
+
+    Returns:
+        Exit status if the query was answered, None to run the full selector
+    """
+    if len(argv) != 1 or argv[0] not in QUERY_FLAGS:
+        return None
+
+    colors_dir = os.path.join(os.path.dirname(script), 'colors')
+    if argv[0] == '--names':
+        names = theme_names(colors_dir)
+        sys.stdout.write(''.join(f'{name}\n' for name in names))
+        return 0
+
+    home = home or os.path.expanduser('~')
+    cache = load_cache(cache_path(home))
+
+    if argv[0] == '--current':
+        key = vimrc_key(os.path.join(home, '.vimrc'))
+        if not key or cache.get('vimrc') != key:
+            return None
+        if cache.get('current'):
+            sys.stdout.write(cache['current'] + '\n')
+            return 0
+        return 1
+
+    key = colors_key(colors_dir, script)
+    if not key or cache.get('colors') != key or 'list' not in cache:
+        return None
+    sys.stdout.write(cache['list'])
+    return 0
@@ -0,0 +1,253 @@
+"""
+Theme Renderer
+
+Renders theme previews using the colors a colorscheme actually defines.
+Colors come from guifg/guibg as 24-bit escape sequences on truecolor
+terminals and from ctermfg/ctermbg as 256-color sequences otherwise.
+Frames are composed into a single string and written with one call, so a
+preview of every theme goes out as one stream.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from colorscheme import ColorScheme
+from xterm_quantize import nearest
+
+
+RESET = '\033[0m'
+
+# Vim's names for the 16 basic cterm colors (see :help cterm-colors)
+CTERM_NAMES: Dict[str, int] = {
+    'black': 0, 'darkred': 1, 'darkgreen': 2, 'darkyellow': 3, 'brown': 3,
+    'darkblue': 4, 'darkmagenta': 5, 'darkcyan': 6, 'lightgray': 7,
+    'lightgrey': 7, 'gray': 7, 'grey': 7, 'darkgray': 8, 'darkgrey': 8,
+    'red': 9, 'lightred': 9, 'green': 10, 'lightgreen': 10, 'yellow': 11,
+    'lightyellow': 11, 'blue': 12, 'lightblue': 12, 'magenta': 13,
+    'lightmagenta': 13, 'cyan': 14, 'lightcyan': 14, 'white': 15,
+}
+
+# Highlight attributes and their SGR codes
+ATTRIBUTE_CODES: Dict[str, str] = {
+    'bold': '1', 'italic': '3', 'underline': '4', 'undercurl': '4',
+    'reverse': '7', 'inverse': '7', 'strikethrough': '9',
+}
+
+RGB = Tuple[int, int, int]
+Segment = Tuple[str, str]
+
+
+def detect_color_mode() -> str:
+    """Return 'truecolor' if the terminal advertises 24-bit color, else '256'."""
+    if os.environ.get('COLORTERM', '').lower() in ('truecolor', '24bit'):
+        return 'truecolor'
+    return '256'
+
+
+def hex_to_rgb(value: Optional[str]) -> Optional[RGB]:
+    """Convert '#rrggbb' to an RGB tuple, or None for NONE/names/missing values."""
+    if not value or len(value) != 7 or not value.startswith('#'):
+        return None
+    try:
+        return (int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16))
+    except ValueError:
+        return None
+
+
+def rgb_to_xterm256(rgb: RGB) -> int:
+    """Return the xterm-256 cube or gray entry perceptually nearest to an RGB color."""
+    return nearest('#%02x%02x%02x' % rgb)
+
+
+def cterm_index(value: Optional[str]) -> Optional[int]:
+    """Convert a ctermfg/ctermbg value (number or color name) to a palette index."""
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    return CTERM_NAMES.get(value.lower())
+
+
+class ThemeStyles:
+    """Resolves highlight groups of a scheme into ANSI escape sequences."""
+
+    def __init__(self, scheme: ColorScheme, mode: str = 'truecolor'):
+        """
+        Initialize the style resolver.
+
+        Args:
+            scheme: Parsed colorscheme
+            mode: 'truecolor' or '256'
+        """
+        self.scheme = scheme
+        self.mode = mode
+        self._cache: Dict[str, str] = {}
+        normal = scheme.group('Normal')
+        self.normal_fg = self._color(normal, 'fg')
+        self.normal_bg = self._color(normal, 'bg')
+
+    def _color(self, group, which: str) -> Optional[str]:
+        """Return the SGR color parameters for a group's fg or bg, if defined."""
+        if group is None:
+            return None
+        layer = '38' if which == 'fg' else '48'
+        if self.mode == 'truecolor':
+            rgb = hex_to_rgb(getattr(group, f'gui{which}'))
+            if rgb is not None:
+                return f'{layer};2;{rgb[0]};{rgb[1]};{rgb[2]}'
+        index = cterm_index(getattr(group, f'cterm{which}'))
+        if index is None:
+            rgb = hex_to_rgb(getattr(group, f'gui{which}'))
+            if rgb is None:
+                return None
+            index = rgb_to_xterm256(rgb)
+        return f'{layer};5;{index}'
+
+    def sgr(self, name: str) -> str:
+        """
+        Return the escape sequence that selects a highlight group.
+
+        Missing foreground or background colors fall back to Normal's.
+        """
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+
+        group = self.scheme.group(name)
+        params = ['0']
+        if group is not None:
+            attrs = group.gui if self.mode == 'truecolor' and group.gui else group.cterm
+            for attr in (attrs or '').lower().split(','):
+                if attr in ATTRIBUTE_CODES:
+                    params.append(ATTRIBUTE_CODES[attr])
+        fg = self._color(group, 'fg') or self.normal_fg
+        bg = self._color(group, 'bg') or self.normal_bg
+        params.extend(p for p in (fg, bg) if p)
+
+        sequence = f"\033[{';'.join(params)}m"
+        self._cache[name] = sequence
+        return sequence
+
+
+class FrameBuilder:
+    """Composes a boxed frame of styled text into one string."""
+
+    def __init__(self, styles: ThemeStyles, width: int = 70, border_group: str = 'Title'):
+        """
+        Initialize the frame.
+
+        Args:
+            styles: Style resolver for the theme being drawn
+            width: Total frame width including borders
+            border_group: Highlight group used for the box border
+        """
+        self.styles = styles
+        self.inner = width - 2
+        self.border = styles.sgr(border_group)
+        self.parts: List[str] = []
+
+    def rule(self, left: str, right: str):
+        """Add a horizontal border line."""
+        self.parts.append(f"{self.border}{left}{'═' * self.inner}{right}{RESET}\n")
+
+    def row(self, segments: Sequence[Segment], fill_group: str = 'Normal'):
+        """
+        Add a boxed row.
+
+        Args:
+            segments: (group, text) pairs drawn left to right
+            fill_group: Group used to pad the row to the frame width
+        """
+        used = 0
+        body = []
+        current = self.border
+        segments = list(segments) + [(fill_group, ' ' * self.inner)]
+        for group, text in segments:
+            text = text[:max(0, self.inner - used)]
+            if not text:
+                continue
+            style = self.styles.sgr(group)
+            # Only emit an escape sequence when the style actually changes
+            body.append(text if style == current else f'{style}{text}')
+            current = style
+            used += len(text)
+        closing = '║' if current == self.border else f'{self.border}║'
+        self.parts.append(f"{self.border}║{''.join(body)}{closing}{RESET}\n")
+
+    def text(self) -> str:
+        """Return the composed frame."""
+        return ''.join(self.parts)
+
+
+# Sample code drawn in previews, as (group, text) segments per line
+SAMPLE_CODE: List[List[Segment]] = [
+    [('Comment', '# This is a comment')],
+    [('Statement', 'def'), ('Normal', ' '), ('Function', 'hello_world'), ('Normal', '():')],
+    [('Normal', '    '), ('String', '"""Sample function"""')],
+    [('Normal', '    '), ('Identifier', 'count'), ('Normal', ' = '), ('Number', '42')],
+    [('Normal', '    '), ('Conditional', 'if'), ('Normal', ' count '),
+     ('Operator', '>'), ('Normal', ' '), ('Number', '0'), ('Normal', ':  '),
+     ('Todo', 'TODO'), ('Comment', ' tidy up')],
+    [('Normal', '        '), ('Function', 'print'), ('Normal', '('),
+     ('String', '"Hello, World!"'), ('Normal', ')')],
+]
+
+# UI groups shown as swatches under the sample code
+SWATCH_GROUPS = ('Visual', 'Search', 'PmenuSel', 'StatusLine', 'DiffAdd', 'Error')
+
+
+def render_theme_preview(scheme: ColorScheme, info: Dict, mode: Optional[str] = None,
+                         width: int = 70) -> str:
+    """
+    Compose the preview frame for one theme.
+
+    Args:
+        scheme: Parsed colorscheme
+        info: Display metadata (name, description, colors)
+        mode: 'truecolor' or '256' (detected from the terminal if omitted)
+        width: Frame width
+
+    Returns:
+        The preview as a string of text and escape sequences
+    """
+    styles = ThemeStyles(scheme, mode or detect_color_mode())
+    frame = FrameBuilder(styles, width)
+    inner = width - 2
+
+    frame.parts.append('\n')
+    frame.rule('╔', '╗')
+    frame.row([('Title', info['name'].center(inner))])
+    frame.rule('╠', '╣')
+    frame.row([('Normal', f" {info['description']}")])
+    if info.get('colors'):
+        frame.row([('Comment', ' Colors: '), ('Normal', ', '.join(info['colors']))])
+
+    frame.rule('╠', '╣')
+    for lineno, segments in enumerate(SAMPLE_CODE, 1):
+        line_group = 'CursorLine' if lineno == 2 else 'Normal'
+        number_group = 'CursorLineNr' if lineno == 2 else 'LineNr'
+        frame.row([(number_group, f' {lineno:>3} ')] + list(segments), fill_group=line_group)
+
+    frame.rule('╠', '╣')
+    swatches: List[Segment] = [('Normal', ' ')]
+    for name in SWATCH_GROUPS:
+        swatches.append((name, f' {name} '))
+        swatches.append(('Normal', ' '))
+    frame.row(swatches)
+    frame.rule('╚', '╝')
+    frame.parts.append('\n')
+    return frame.text()
+
+
+def write_output(text: str, stream=None):
+    """Write composed output with a single buffered write and flush."""
+    stream = stream or sys.stdout
+    stream.flush()
+    buffer = getattr(stream, 'buffer', None)
+    if buffer is not None:
+        buffer.write(text.encode(stream.encoding or 'utf-8', 'replace'))
+        buffer.flush()
+    else:
+        stream.write(text)
+        stream.flush()
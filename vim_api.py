@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Vim Configuration API
+
+Library interface to setup_vim.py and select_theme.py for orchestration
+tools. Operations return Result objects instead of printing, prompting or
+exiting; the progress messages the scripts would print are collected on
+the result (without color codes).
+
+Run as a script, it serves a batch of operations: one JSON command per
+line on stdin, one JSON result per line on stdout, in order and flushed
+as each completes. A single process keeps the compiled templates, the
+detected platform facts and its imports across commands, so thousands of
+operations cost one interpreter start.
+
+Commands:
+    {"op": "check", "home": "/home/alice", "profile": "default", "options": {...}}
+    {"op": "apply", "home": "/home/alice", "dry_run": true}
+    {"op": "set-theme", "home": "/home/alice", "theme": "nord", "compile": "cterm"}
+    {"op": "list", "home": "/home/alice"}
+    {"op": "backup", "home": "/home/alice", "reason": "manual"}
+
+"home" defaults to the current user's home, "profile" to 'default' and
+"options" to the defaults. An "id" given with a command is echoed in its
+result.
+
+Usage:
+    python vim_api.py < commands.ndjson > results.ndjson
+"""
+
+import inspect
+import io
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from drift_index import hash_bytes
+from drift_report import build_report
+from select_theme import ThemeSelector
+from setup_vim import VimConfigManager, merge_options
+
+
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+@dataclass
+class Result:
+    """Outcome of one operation."""
+
+    op: str
+    ok: bool = True
+    changed: bool = False
+    data: Dict[str, Any] = field(default_factory=dict)
+    messages: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    id: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation (without an unset id)."""
+        result = asdict(self)
+        if self.id is None:
+            del result['id']
+        return result
+
+
+class VimConfigAPI:
+    """Runs configuration and theme operations and returns their results."""
+
+    def __init__(self, default_home: Optional[Path] = None):
+        """
+        Initialize the API.
+
+        Args:
+            default_home: Home directory used when an operation names none
+                (defaults to the current user's)
+        """
+        self.default_home = Path(default_home) if default_home else Path.home()
+        self.operations: Dict[str, Callable[..., Result]] = {
+            'check': self.check,
+            'apply': self.apply,
+            'set-theme': self.set_theme,
+            'list': self.list_themes,
+            'backup': self.backup,
+        }
+
+    # -- Helpers ---------------------------------------------------------------
+
+    def _home(self, home: Optional[str]) -> Path:
+        """Resolve the home directory of an operation."""
+        path = Path(home).expanduser() if home else self.default_home
+        if not path.is_dir():
+            raise FileNotFoundError(f"home directory does not exist: {path}")
+        return path
+
+    @staticmethod
+    def _options(manager: VimConfigManager, profile: str,
+                 options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge option overrides into the profile's options and the defaults."""
+        return merge_options(manager.profiles.resolve(profile).options, options)
+
+    @staticmethod
+    def _manager(home: Path, result: Result, dry_run: bool = False) -> VimConfigManager:
+        """Create a manager whose messages are collected on the result."""
+        return VimConfigManager(home_dir=home, dry_run=dry_run, output=result.messages.append,
+                                prompt=_no_prompt)
+
+    @staticmethod
+    def _selector(home: Path, output: TextIO, compile_target: Optional[str] = None,
+                  inline: bool = False, link_mode: str = 'copy') -> ThemeSelector:
+        """Create a theme selector writing to output."""
+        return ThemeSelector(link_mode=link_mode, compile_target=compile_target, inline=inline,
+                             home_dir=home, output=output, prompt=_no_prompt)
+
+    @staticmethod
+    def _collect(result: Result, output: io.StringIO):
+        """Add non-empty lines of selector output to the result's messages."""
+        result.messages.extend(line for line in _ANSI_RE.sub('', output.getvalue()).splitlines()
+                               if line.strip())
+
+    # -- Operations ------------------------------------------------------------
+
+    def check(self, home: Optional[str] = None, profile: str = 'default',
+              options: Optional[Dict[str, Any]] = None) -> Result:
+        """
+        Check whether ~/.vimrc has drifted from the generated configuration.
+
+        Returns:
+            Result with data 'drift', 'platform_changed', 'vimrc_exists' and,
+            when drifted, 'changes' (number of settings that differ)
+        """
+        result = Result('check')
+        manager = self._manager(self._home(home), result, dry_run=True)
+        expected = manager.carry_over_theme(
+            manager.render_profile(profile, self._options(manager, profile, options)))
+
+        result.data['vimrc_exists'] = manager.vimrc_path.exists()
+        result.data['platform_changed'] = manager.check_platform()
+        result.data['drift'] = manager.check_drift(expected)
+        result.data['expected_digest'] = hash_bytes(expected.encode('utf-8'))
+        if result.data['drift'] and result.data['vimrc_exists']:
+            actual = manager.vimrc_path.read_text(errors='replace')
+            result.data['changes'] = len(build_report(expected, actual)['changes'])
+        return result
+
+    def apply(self, home: Optional[str] = None, profile: str = 'default',
+              options: Optional[Dict[str, Any]] = None, dry_run: bool = False) -> Result:
+        """
+        Bring ~/.vimrc in line with the template (setup_vim.py without prompts).
+
+        Returns:
+            Result with data 'write' ('written', 'unchanged' or 'skipped')
+        """
+        result = Result('apply')
+        manager = self._manager(self._home(home), result, dry_run=dry_run)
+        write = manager.setup(profile, self._options(manager, profile, options))
+        result.data['write'] = write
+        result.changed = write == 'written'
+        return result
+
+    def set_theme(self, theme: str, home: Optional[str] = None, compile: Optional[str] = None,
+                  inline: bool = False, link_mode: str = 'copy') -> Result:
+        """
+        Install the themes and make theme the primary colorscheme.
+
+        Returns:
+            Result with data 'theme' and 'previous'
+        """
+        result = Result('set-theme')
+        output = io.StringIO()
+        selector = self._selector(self._home(home), output, compile, inline, link_mode)
+        try:
+            if theme not in selector.get_available_themes():
+                raise ValueError(f"unknown theme '{theme}'")
+            before = selector.vimrc_path.read_bytes() if selector.vimrc_path.exists() else None
+            result.data['previous'] = selector.get_current_theme()
+            result.ok = selector.install_theme_files() and selector.set_theme(theme)
+            after = selector.vimrc_path.read_bytes() if selector.vimrc_path.exists() else None
+            result.changed = before != after
+            result.data['theme'] = theme
+        finally:
+            self._collect(result, output)
+        if not result.ok:
+            result.error = result.messages[0] if result.messages else 'set-theme failed'
+        return result
+
+    def list_themes(self, home: Optional[str] = None) -> Result:
+        """
+        List available themes.
+
+        Returns:
+            Result with data 'themes' (name, title, description, background)
+            and 'current'
+        """
+        result = Result('list')
+        selector = self._selector(self._home(home), io.StringIO())
+        themes = []
+        for name in selector.get_available_themes():
+            info = selector.get_theme_info(name)
+            themes.append({'name': name, 'title': info['name'],
+                           'description': info['description'],
+                           'background': info.get('background')})
+        result.data['themes'] = themes
+        result.data['current'] = selector.get_current_theme()
+        return result
+
+    def backup(self, home: Optional[str] = None, reason: str = 'manual') -> Result:
+        """
+        Back up ~/.vimrc into the backup store.
+
+        Returns:
+            Result with data 'backup' (stored path, or None without a ~/.vimrc)
+        """
+        result = Result('backup')
+        manager = self._manager(self._home(home), result)
+        latest = manager.backup_store.latest()
+        path = manager.backup_existing_config(reason=reason)
+        result.data['backup'] = str(path) if path else None
+        result.changed = path is not None and manager.backup_store.latest() != latest
+        return result
+
+    # -- Dispatch --------------------------------------------------------------
+
+    def execute(self, command: Dict[str, Any]) -> Result:
+        """
+        Run one command.
+
+        Args:
+            command: Dictionary with 'op', an optional 'id' and the
+                operation's arguments
+
+        Returns:
+            The operation's result; failures are reported on the result
+            (ok False, error set) rather than raised
+        """
+        if not isinstance(command, dict):
+            return Result('unknown', ok=False, error='command must be a JSON object')
+        args = dict(command)
+        op = args.pop('op', None)
+        request_id = args.pop('id', None)
+        operation = self.operations.get(op)
+        if operation is None:
+            return Result(str(op), ok=False, id=request_id,
+                          error=f"unknown op '{op}' (expected one of: "
+                                f"{', '.join(self.operations)})")
+        try:
+            inspect.signature(operation).bind(**args)
+        except TypeError as e:
+            return Result(op, ok=False, id=request_id, error=f'invalid arguments: {e}')
+        try:
+            result = operation(**args)
+        except Exception as e:
+            result = Result(op, ok=False, error=str(e))
+        result.id = request_id
+        return result
+
+    def serve(self, commands: TextIO, results: TextIO) -> int:
+        """
+        Execute NDJSON commands, writing one NDJSON result per command.
+
+        Blank lines are skipped; a line that is not valid JSON yields an
+        error result.
+
+        Args:
+            commands: Stream of commands, one JSON object per line
+            results: Stream results are written and flushed to
+
+        Returns:
+            Number of commands that failed
+        """
+        failed = 0
+        for line in commands:
+            if not line.strip():
+                continue
+            try:
+                result = self.execute(json.loads(line))
+            except ValueError as e:
+                result = Result('unknown', ok=False, error=f'invalid JSON: {e}')
+            failed += not result.ok
+            results.write(json.dumps(result.to_dict(), sort_keys=True) + '\n')
+            results.flush()
+        return failed
+
+
+def _no_prompt(message: str) -> str:
+    """Refuse to prompt: library and batch operations never read input."""
+    raise RuntimeError(f"interactive input is not available: {message.strip()}")
+
+
+def main():
+    """Serve NDJSON commands from stdin."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Run vim configuration operations from NDJSON commands on stdin',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Example:
+  echo '{"op": "check", "home": "/home/alice"}' | %(prog)s
+        """
+    )
+    parser.add_argument('--home', type=Path,
+                        help='Home directory for commands without "home" (default: $HOME)')
+    args = parser.parse_args()
+
+    api = VimConfigAPI(default_home=args.home)
+    try:
+        failed = api.serve(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Vim Startup Benchmark
+
+Measures what the generated configuration costs at vim startup. Every
+profile, option set and theme combination is rendered into an isolated
+temporary HOME and started headless with `vim --startuptime` several
+times. The logs are parsed into per-phase and per-sourced-file timings
+and reported as median/p95, optionally compared against a stored baseline
+with regression budgets.
+
+Themes can be loaded from the source files, from compiled artifacts
+(theme_compiler.py) or inlined into the vimrc, to measure what compiling
+saves at startup.
+
+With --cli, the cold-start time of the read-only select_theme.py queries
+used by prompt hooks (--current, --names, --list) is measured instead.
+
+Usage:
+    python vim_bench.py                              # Benchmark every combination
+    python vim_bench.py --runs 20 --theme claude     # More runs, one theme
+    python vim_bench.py --save-baseline bench.json   # Record a baseline
+    python vim_bench.py --baseline bench.json        # Fail on regressions
+    python vim_bench.py --theme-mode source --theme-mode inline
+    python vim_bench.py --cli                        # select_theme.py query cold start
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from colorscheme import ColorScheme, load_colorscheme
+from profiles import ProfileStore
+from setup_vim import VimConfigManager, merge_options
+from theme_compiler import TARGETS, compile_colorscheme
+from vimrc_model import VimrcModel
+
+
+# Option sets benchmarked for every profile, as overrides of the profile's options
+OPTION_SETS: Dict[str, Dict] = {
+    'defaults': {},
+    'lean': {'mouse_support': False, 'relative_numbers': False, 'create_backups': False},
+}
+
+# How the theme is loaded: source colors/*.vim, compiled artifacts, or inlined
+THEME_MODES = ('source', 'compiled', 'inline')
+
+# Read-only select_theme.py queries timed with --cli
+CLI_QUERIES = ('--current', '--names', '--list')
+
+_SOURCED_RE = re.compile(r'^(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+): sourcing (.+)$')
+_PHASE_RE = re.compile(r'^(\d+\.\d+)\s+(\d+\.\d+): (.+)$')
+
+
+def parse_startuptime(text: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse a --startuptime log.
+
+    Args:
+        text: Log contents for a single vim start
+
+    Returns:
+        Dictionary with 'total' (ms until the last event), 'phases'
+        (event -> elapsed ms) and 'sourced' (file -> self+sourced ms)
+    """
+    phases: Dict[str, float] = {}
+    sourced: Dict[str, float] = {}
+    total = 0.0
+
+    for line in text.splitlines():
+        match = _SOURCED_RE.match(line)
+        if match:
+            clock, with_children, _, path = match.groups()
+            sourced[path] = sourced.get(path, 0.0) + float(with_children)
+            total = max(total, float(clock))
+            continue
+        match = _PHASE_RE.match(line)
+        if match:
+            clock, elapsed, event = match.groups()
+            phases[event] = phases.get(event, 0.0) + float(elapsed)
+            total = max(total, float(clock))
+
+    return {'total': total, 'phases': phases, 'sourced': sourced}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Return median and p95 of timing samples."""
+    return {
+        'median': round(percentile(samples, 50), 3),
+        'p95': round(percentile(samples, 95), 3),
+    }
+
+
+class StartupBenchmark:
+    """Runs the startup benchmark matrix."""
+
+    def __init__(self, vim: str = 'vim', runs: int = 10, verbose: bool = True,
+                 compile_target: str = 'cterm'):
+        """
+        Initialize the benchmark.
+
+        Args:
+            vim: vim executable
+            runs: Timed runs per combination (after one warm-up run)
+            verbose: Print progress while running
+            compile_target: Target for the compiled and inline theme modes
+        """
+        self.vim = vim
+        self.runs = runs
+        self.verbose = verbose
+        self.compile_target = compile_target
+        self.manager = VimConfigManager(quiet=True)
+        self.colors_dir = self.manager.repo_root / 'colors'
+        self._schemes: Dict[str, ColorScheme] = {}
+
+    def themes(self) -> List[str]:
+        """Return the themes available in the repository."""
+        return sorted(path.stem for path in self.colors_dir.glob('*.vim'))
+
+    def scheme(self, theme: str) -> ColorScheme:
+        """Return the parsed colorscheme for a theme."""
+        if theme not in self._schemes:
+            self._schemes[theme] = load_colorscheme(self.colors_dir / f'{theme}.vim')
+        return self._schemes[theme]
+
+    def render(self, profile: str, overrides: Dict, theme: str, theme_mode: str = 'source') -> str:
+        """Render the configuration for a combination, with theme as the primary colorscheme."""
+        options = merge_options(self.manager.profiles.resolve(profile).options, overrides)
+        content = self.manager.render_profile(profile, options)
+        model = VimrcModel(content)
+        compiled = None
+        if theme_mode == 'inline':
+            compiled = compile_colorscheme(self.scheme(theme), self.compile_target, inline=True)
+        model.set_colorscheme(theme, compiled, self.compile_target)
+        return model.text()
+
+    def _prepare_home(self, root: Path, vimrc: str, theme_mode: str) -> Path:
+        """Create an isolated HOME with the config and themes installed."""
+        home = root / 'home'
+        for sub in ('backup', 'swap', 'undo', 'colors'):
+            (home / '.vim' / sub).mkdir(parents=True, exist_ok=True)
+        for theme_file in self.colors_dir.glob('*.vim'):
+            dest = home / '.vim' / 'colors' / theme_file.name
+            if theme_mode == 'compiled':
+                dest.write_text(compile_colorscheme(self.scheme(theme_file.stem),
+                                                    self.compile_target))
+            else:
+                shutil.copy2(theme_file, dest)
+        (home / '.vimrc').write_text(vimrc)
+        return home
+
+    def time_vimrc(self, vimrc: str, theme_mode: str = 'source') -> List[Dict]:
+        """
+        Start vim repeatedly against a configuration.
+
+        Args:
+            vimrc: Configuration content
+            theme_mode: How themes are installed ('source' or 'compiled'; inline
+                themes live in the vimrc itself)
+
+        Returns:
+            Parsed --startuptime results, one per timed run
+        """
+        results = []
+        with tempfile.TemporaryDirectory(prefix='vim-bench-') as tmp:
+            root = Path(tmp)
+            home = self._prepare_home(root, vimrc, theme_mode)
+            env = dict(os.environ, HOME=str(home), TERM='xterm-256color')
+            log = root / 'startup.log'
+
+            for run in range(self.runs + 1):
+                if log.exists():
+                    log.unlink()
+                subprocess.run(
+                    [self.vim, '-N', '-X', '-u', str(home / '.vimrc'), '-i', 'NONE',
+                     '-es', '--startuptime', str(log), '-c', 'qa!'],
+                    env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL, timeout=30,
+                )
+                if run == 0:
+                    continue  # warm-up
+                parsed = parse_startuptime(log.read_text(errors='replace'))
+                parsed['sourced'] = {self._normalize(path, home): ms
+                                     for path, ms in parsed['sourced'].items()}
+                results.append(parsed)
+        return results
+
+    def time_queries(self, queries: Tuple[str, ...] = CLI_QUERIES) -> Dict[str, Dict]:
+        """
+        Time cold starts of read-only select_theme.py queries.
+
+        Each query runs in a fresh interpreter against an isolated HOME; the
+        warm-up run fills the query cache, as a prompt hook would.
+
+        Returns:
+            Aggregated wall-clock results keyed by 'select_theme.py <flag>'
+        """
+        script = self.manager.repo_root / 'select_theme.py'
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='vim-bench-') as tmp:
+            home = self._prepare_home(Path(tmp), self.render('default', {}, 'claude'), 'source')
+            # Age the vimrc past the racy window so its signature can be cached
+            past = time.time() - 60
+            os.utime(home / '.vimrc', (past, past))
+            env = dict(os.environ, HOME=str(home))
+
+            for flag in queries:
+                samples = []
+                for run in range(self.runs + 1):
+                    start = time.perf_counter()
+                    subprocess.run([sys.executable, str(script), flag], env=env,
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, timeout=30)
+                    if run > 0:
+                        samples.append((time.perf_counter() - start) * 1000)
+                key = f'select_theme.py {flag}'
+                results[key] = {'total': summarize(samples), 'phases': {}, 'sourced': {}}
+                if self.verbose:
+                    total = results[key]['total']
+                    print(f"  {key:<40} median {total['median']:8.3f} ms"
+                          f"   p95 {total['p95']:8.3f} ms", flush=True)
+        return results
+
+    def _normalize(self, path: str, home: Path) -> str:
+        """Make sourced paths comparable across runs and machines."""
+        path = path.replace(str(home), '~')
+        return re.sub(r'^/.*?/vim/vim\d+/', '$VIMRUNTIME/', path)
+
+    def aggregate(self, runs: List[Dict]) -> Dict:
+        """Aggregate timed runs into median/p95 statistics."""
+        phases: Dict[str, List[float]] = {}
+        sourced: Dict[str, List[float]] = {}
+        for run in runs:
+            for event, ms in run['phases'].items():
+                phases.setdefault(event, []).append(ms)
+            for path, ms in run['sourced'].items():
+                sourced.setdefault(path, []).append(ms)
+        return {
+            'total': summarize([run['total'] for run in runs]),
+            'phases': {event: summarize(ms) for event, ms in phases.items()},
+            'sourced': {path: summarize(ms) for path, ms in sourced.items()},
+        }
+
+    def run(self, profiles: List[str], option_sets: List[str], themes: List[str],
+            theme_modes: Tuple[str, ...] = ('source',)) -> Dict[str, Dict]:
+        """
+        Benchmark every combination.
+
+        Returns:
+            Aggregated results keyed by 'profile/option-set/theme', with
+            '@mode' appended for theme modes other than 'source'
+        """
+        results = {}
+        for profile in profiles:
+            for set_name in option_sets:
+                for theme in themes:
+                    for theme_mode in theme_modes:
+                        key = f'{profile}/{set_name}/{theme}'
+                        if theme_mode != 'source':
+                            key += f'@{theme_mode}'
+                        vimrc = self.render(profile, OPTION_SETS[set_name], theme, theme_mode)
+                        results[key] = self.aggregate(self.time_vimrc(vimrc, theme_mode))
+                        if self.verbose:
+                            total = results[key]['total']
+                            print(f"  {key:<40} median {total['median']:8.3f} ms"
+                                  f"   p95 {total['p95']:8.3f} ms", flush=True)
+        return results
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                          budget_pct: float, budget_ms: float) -> List[Tuple[str, float, float]]:
+    """
+    Find combinations whose median startup time regressed beyond budget.
+
+    A regression must exceed both the relative and the absolute budget, so
+    noise on very fast starts does not trip the check.
+
+    Returns:
+        List of (combination, baseline median, current median)
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        old = before['total']['median']
+        new = result['total']['median']
+        if new - old > budget_ms and new > old * (1 + budget_pct / 100.0):
+            regressions.append((key, old, new))
+    return regressions
+
+
+def print_report(results: Dict[str, Dict], top: int = 5):
+    """Print the slowest phases and sourced files per combination."""
+    for key, result in results.items():
+        total = result['total']
+        print(f"\n{key}: median {total['median']:.3f} ms, p95 {total['p95']:.3f} ms")
+        slowest = sorted(result['sourced'].items(), key=lambda item: -item[1]['median'])
+        for path, stats in slowest[:top]:
+            print(f"    {stats['median']:8.3f} ms  (p95 {stats['p95']:8.3f})  {path}")
+        phases = sorted(result['phases'].items(), key=lambda item: -item[1]['median'])
+        for event, stats in phases[:top]:
+            print(f"    {stats['median']:8.3f} ms  (p95 {stats['p95']:8.3f})  [{event}]")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark vim startup time for generated configurations',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--runs', type=int, default=10, help='Timed runs per combination (default: 10)')
+    parser.add_argument('--vim', default='vim', help='vim executable (default: vim)')
+    profiles = ProfileStore().names()
+    parser.add_argument('--profile', action='append', choices=profiles,
+                        help='Profile to benchmark (repeatable, default: all)')
+    parser.add_argument('--options', action='append', choices=sorted(OPTION_SETS),
+                        help='Option set to benchmark (repeatable, default: all)')
+    parser.add_argument('--theme', action='append', help='Theme to benchmark (repeatable, default: all)')
+    parser.add_argument('--theme-mode', action='append', choices=THEME_MODES,
+                        help='How themes are loaded: source, compiled or inline '
+                             '(repeatable, default: source)')
+    parser.add_argument('--compile-target', choices=TARGETS, default='cterm',
+                        help='Target for compiled and inline themes (default: cterm)')
+    parser.add_argument('--cli', action='store_true',
+                        help='Time select_theme.py read-only queries instead of vim startup')
+    parser.add_argument('--json', type=Path, metavar='FILE', help='Write full results to FILE')
+    parser.add_argument('--save-baseline', type=Path, metavar='FILE',
+                        help='Store results as the baseline in FILE')
+    parser.add_argument('--baseline', type=Path, metavar='FILE',
+                        help='Compare against the baseline in FILE and fail on regressions')
+    parser.add_argument('--budget-pct', type=float, default=10.0,
+                        help='Allowed median slowdown in percent (default: 10)')
+    parser.add_argument('--budget-ms', type=float, default=2.0,
+                        help='Allowed median slowdown in milliseconds (default: 2)')
+    parser.add_argument('--report', action='store_true',
+                        help='Show slowest phases and sourced files per combination')
+    args = parser.parse_args()
+
+    if shutil.which(args.vim) is None:
+        print(f"Error: vim executable '{args.vim}' not found", file=sys.stderr)
+        return 1
+
+    bench = StartupBenchmark(vim=args.vim, runs=max(1, args.runs),
+                             compile_target=args.compile_target)
+    themes = args.theme or bench.themes()
+    unknown = set(themes) - set(bench.themes())
+    if unknown:
+        print(f"Error: unknown theme(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+
+    if args.cli:
+        print(f"select_theme.py query cold start ({bench.runs} runs per query)")
+        print("=" * 70)
+        results = bench.time_queries()
+    else:
+        print(f"Vim startup benchmark ({bench.runs} runs per combination)")
+        print("=" * 70)
+        results = bench.run(args.profile or profiles, args.options or list(OPTION_SETS), themes,
+                            tuple(args.theme_mode or ('source',)))
+
+    if args.report:
+        print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=1, sort_keys=True))
+        print(f"\nResults written to {args.json}")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=1, sort_keys=True))
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_with_baseline(results, baseline, args.budget_pct, args.budget_ms)
+        print("\n" + "=" * 70)
+        if regressions:
+            print(f"✗ {len(regressions)} combination(s) regressed beyond budget "
+                  f"({args.budget_pct:g}% and {args.budget_ms:g} ms):")
+            for key, old, new in regressions:
+                print(f"  {key}: {old:.3f} ms -> {new:.3f} ms")
+            return 1
+        print("✓ No startup regressions beyond budget")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
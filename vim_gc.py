@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Vim Directory Garbage Collector
+
+Cleans up ~/.vim/backup, ~/.vim/swap and ~/.vim/undo, which the generated
+vimrc fills (`set backup`, `undofile`, swap directory) but nothing empties.
+
+Entries are removed by these policies, in this order:
+
+    orphan    undo files whose source file no longer exists (the directories
+              use vim's `//` naming, so `%home%alice%notes.txt` is the undo
+              file of /home/alice/notes.txt)
+    age       entries not used for longer than --max-age days
+    size      least recently used entries, until the three directories fit
+              in --max-size
+
+Swap files whose owning vim process is still running on this host are
+never removed (the pid and host name are read from the swap file header).
+Directories are scanned with os.scandir, and many homes are collected in
+parallel.
+
+Usage:
+    python vim_gc.py --dry-run
+    python vim_gc.py --max-age 90 --max-size 500M
+    python vim_gc.py --fleet homes.txt --max-age 30 --jobs 8
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+KINDS = ('backup', 'swap', 'undo')
+
+# Swap file header (vim's struct block0): "b0" id, then fixed-size fields.
+# The pid is stored least significant byte first on every platform.
+SWAP_ID = b'b0'
+SWAP_PID_OFFSET = 24
+SWAP_HOST_OFFSET = 68
+SWAP_HOST_SIZE = 40
+SWAP_HEADER_SIZE = SWAP_HOST_OFFSET + SWAP_HOST_SIZE
+
+# Vim swap file extensions: .swp, .swo, ... .swa, then .svz ... .sva
+SWAP_NAME_RE = re.compile(r'\.s[a-w][a-z]$')
+
+_SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+@dataclass
+class GCPolicy:
+    """Which entries to remove."""
+
+    max_age_days: Optional[float] = None
+    max_size: Optional[int] = None
+    orphans: bool = True
+
+
+@dataclass
+class GCEntry:
+    """One file in a vim directory."""
+
+    path: str
+    kind: str
+    size: int
+    last_used: float
+    source: Optional[str] = None
+    reason: Optional[str] = None
+
+
+@dataclass
+class GCReport:
+    """Outcome of collecting one home directory."""
+
+    home: str
+    scanned: Dict[str, int] = field(default_factory=dict)
+    scanned_bytes: int = 0
+    removed: Dict[str, int] = field(default_factory=dict)
+    removed_bytes: int = 0
+    live_swap: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def kept_bytes(self) -> int:
+        return self.scanned_bytes - self.removed_bytes
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size such as '500M', '2G' or '1048576'.
+
+    Raises:
+        ValueError: If the size is not understood
+    """
+    match = _SIZE_RE.match(text)
+    if not match:
+        raise ValueError(f"invalid size '{text}' (expected e.g. 500M or 2G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ('B', 'K', 'M', 'G'):
+        if size < 1024 or unit == 'G':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}G"
+
+
+def source_path(name: str, kind: str) -> Optional[str]:
+    """
+    Return the file an entry belongs to, from vim's `//` naming.
+
+    Args:
+        name: Entry file name (e.g. '%home%alice%notes.txt.swp')
+        kind: 'backup', 'swap' or 'undo'
+
+    Returns:
+        The source path, or None if the name does not encode one
+    """
+    if not name.startswith('%'):
+        return None
+    if kind == 'swap':
+        name = SWAP_NAME_RE.sub('', name)
+    elif kind == 'backup' and name.endswith('~'):
+        name = name[:-1]
+    return name.replace('%', '/')
+
+
+def swap_owner(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the owning process of a swap file from its header.
+
+    Returns:
+        Dictionary with 'pid' and 'host', or None if the header is unreadable
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(SWAP_HEADER_SIZE)
+    except OSError:
+        return None
+    if len(header) < SWAP_HEADER_SIZE or header[:2] != SWAP_ID:
+        return None
+    host = header[SWAP_HOST_OFFSET:SWAP_HOST_OFFSET + SWAP_HOST_SIZE]
+    return {
+        'pid': int.from_bytes(header[SWAP_PID_OFFSET:SWAP_PID_OFFSET + 4], 'little'),
+        'host': host.split(b'\0', 1)[0].decode('utf-8', 'replace'),
+    }
+
+
+def process_running(pid: int) -> bool:
+    """Return True if a process with this pid exists."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def swap_in_use(path: str, hostname: str) -> bool:
+    """
+    Return True if a swap file belongs to a vim that may still be running.
+
+    Swap files written on another host cannot be checked and count as in use.
+    """
+    owner = swap_owner(path)
+    if owner is None:
+        return False
+    if owner['host'] and owner['host'] != hostname[:SWAP_HOST_SIZE - 1]:
+        return True
+    return process_running(owner['pid'])
+
+
+class VimGC:
+    """Scans and collects the vim directories of home directories."""
+
+    def __init__(self, policy: GCPolicy, dry_run: bool = False, jobs: Optional[int] = None):
+        """
+        Initialize the collector.
+
+        Args:
+            policy: Which entries to remove
+            dry_run: If True, report what would be removed without removing
+            jobs: Homes collected at once (default: CPU count)
+        """
+        self.policy = policy
+        self.dry_run = dry_run
+        self.jobs = jobs or os.cpu_count() or 1
+        self.hostname = socket.gethostname()
+
+    def scan(self, home: Path, report: GCReport) -> List[GCEntry]:
+        """
+        List the regular files in a home's backup, swap and undo directories.
+
+        Swap files of running vim processes are left out (and counted on the
+        report).
+        """
+        entries = []
+        for kind in KINDS:
+            directory = home / '.vim' / kind
+            count = 0
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        count += 1
+                        report.scanned_bytes += st.st_size
+                        if kind == 'swap' and swap_in_use(entry.path, self.hostname):
+                            report.live_swap += 1
+                            continue
+                        entries.append(GCEntry(
+                            path=entry.path,
+                            kind=kind,
+                            size=st.st_size,
+                            # vim rewrites swap files while editing, and
+                            # swap_in_use() reading the header moves the atime
+                            last_used=st.st_mtime if kind == 'swap'
+                            else max(st.st_atime, st.st_mtime),
+                            source=source_path(entry.name, kind),
+                        ))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                report.errors.append(f"{directory}: {e.strerror}")
+            report.scanned[kind] = count
+        return entries
+
+    def select(self, entries: List[GCEntry], live_bytes: int = 0,
+               now: Optional[float] = None) -> List[GCEntry]:
+        """
+        Pick the entries to remove, setting each one's reason.
+
+        Args:
+            entries: Scanned entries
+            live_bytes: Bytes held by entries that are never removed (counted
+                against max_size)
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Entries to remove
+        """
+        now = time.time() if now is None else now
+        policy = self.policy
+        for entry in entries:
+            if policy.orphans and entry.kind == 'undo' and entry.source \
+                    and not os.path.lexists(entry.source):
+                entry.reason = 'orphan'
+            elif policy.max_age_days is not None \
+                    and now - entry.last_used > policy.max_age_days * 86400:
+                entry.reason = 'age'
+
+        if policy.max_size is not None:
+            total = live_bytes + sum(entry.size for entry in entries if entry.reason is None)
+            for entry in sorted(entries, key=lambda e: e.last_used):
+                if total <= policy.max_size:
+                    break
+                if entry.reason is None:
+                    entry.reason = 'size'
+                    total -= entry.size
+        return [entry for entry in entries if entry.reason]
+
+    def collect(self, home: Path) -> GCReport:
+        """Scan one home and remove (or, in a dry run, report) what the policy selects."""
+        report = GCReport(home=str(home))
+        if not home.is_dir():
+            report.errors.append(f"home directory does not exist: {home}")
+            return report
+        entries = self.scan(home, report)
+        live_bytes = report.scanned_bytes - sum(entry.size for entry in entries)
+        for entry in self.select(entries, live_bytes):
+            if not self.dry_run:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    report.errors.append(f"{entry.path}: {e.strerror}")
+                    continue
+            report.removed[entry.reason] = report.removed.get(entry.reason, 0) + 1
+            report.removed_bytes += entry.size
+        return report
+
+    def run(self, homes: List[Path]) -> List[GCReport]:
+        """Collect every home, in parallel; reports are returned in input order."""
+        if len(homes) == 1:
+            return [self.collect(homes[0])]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.jobs, len(homes)))) as pool:
+            return list(pool.map(self.collect, homes))
+
+
+def print_reports(reports: List[GCReport], dry_run: bool = False):
+    """Print one line per home, followed by totals."""
+    verb = 'would remove' if dry_run else 'removed'
+    for report in reports:
+        scanned = sum(report.scanned.values())
+        removed = sum(report.removed.values())
+        reasons = ', '.join(f"{count} {reason}" for reason, count in sorted(report.removed.items()))
+        line = (f"  {report.home}: {scanned} files ({format_size(report.scanned_bytes)}), "
+                f"{verb} {removed} ({format_size(report.removed_bytes)})")
+        if reasons:
+            line += f" [{reasons}]"
+        if report.live_swap:
+            line += f", {report.live_swap} swap file(s) in use"
+        print(line)
+        for error in report.errors:
+            print(f"      error: {error}")
+
+    print("=" * 70)
+    removed = sum(sum(report.removed.values()) for report in reports)
+    removed_bytes = sum(report.removed_bytes for report in reports)
+    kept_bytes = sum(report.kept_bytes for report in reports)
+    print(f"{len(reports)} home(s): {verb} {removed} file(s), {format_size(removed_bytes)}; "
+          f"{format_size(kept_bytes)} kept")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Remove stale files from ~/.vim/backup, ~/.vim/swap and ~/.vim/undo',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s --dry-run                      # Show what would be removed
+  %(prog)s --max-age 90 --max-size 500M   # Age and size limits
+  %(prog)s --fleet homes.txt --jobs 8     # Every home in a fleet manifest
+        """
+    )
+    parser.add_argument('homes', nargs='*', type=Path,
+                        help='Home directories to collect (default: $HOME)')
+    parser.add_argument('--fleet', type=Path, metavar='MANIFEST',
+                        help='Collect every home in a fleet manifest')
+    parser.add_argument('--max-age', type=float, metavar='DAYS',
+                        help='Remove entries not used for DAYS days')
+    parser.add_argument('--max-size', type=parse_size, metavar='SIZE',
+                        help='Keep at most SIZE (e.g. 500M) per home, removing the '
+                             'least recently used entries first')
+    parser.add_argument('--keep-orphans', action='store_true',
+                        help='Keep undo files whose source file no longer exists')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report what would be removed without removing anything')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Homes collected at once (default: CPU count)')
+    parser.add_argument('--json', type=Path, metavar='FILE', help='Write reports to FILE')
+    args = parser.parse_args()
+
+    homes = list(args.homes)
+    if args.fleet:
+        from fleet import load_manifest
+        try:
+            homes.extend(Path(target['home']) for target in load_manifest(args.fleet))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    if not homes:
+        homes = [Path.home()]
+
+    policy = GCPolicy(max_age_days=args.max_age, max_size=args.max_size,
+                      orphans=not args.keep_orphans)
+    collector = VimGC(policy, dry_run=args.dry_run, jobs=args.jobs)
+
+    start = time.perf_counter()
+    if args.dry_run:
+        print("[DRY RUN] No files will be removed.")
+    reports = collector.run(homes)
+    print_reports(reports, dry_run=args.dry_run)
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([asdict(report) for report in reports], f, indent=2)
+        print(f"Reports written to {args.json}")
+
+    return 1 if any(report.errors for report in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Vim Configuration Verifier
+
+Loads every generated configuration and every colorscheme in headless vim
+and reports the errors vim raises, with the file and line they come from.
+Highlight values headless vim cannot validate (gui colors, cterm numbers
+beyond the terminal's range) are checked on the parsed colorschemes.
+Each check runs `vim -es` in its own temporary HOME (the themes installed
+under ~/.vim/colors, nothing from the real home directory), with a
+timeout, and the checks run in parallel.
+
+Results are cached by content: a check's key covers the vimrc it loads,
+the digests of the theme files it can reach and the identity of the vim
+executable, so only configurations or themes that changed since the last
+run are started again.
+
+The matrix covers every profile and option set, or with --manifest the
+distinct configurations a fleet manifest renders, plus every theme in the
+repository.
+
+Usage:
+    python vim_verify.py                         # Verify the full matrix
+    python vim_verify.py --manifest homes.txt    # Configurations of a fleet rollout
+    python vim_verify.py --theme nord --jobs 4   # One theme, four workers
+    python vim_verify.py --no-cache --json out.json
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from colorscheme import ColorScheme, load_colorscheme
+from drift_index import hash_bytes
+from fileutil import atomic_write
+from profiles import ProfileStore
+from setup_vim import VimConfigManager, merge_options
+from vim_bench import OPTION_SETS
+from vimrc_model import VimrcModel
+
+
+# Bump when the checks or the cached result format change
+VERIFY_VERSION = 1
+
+DEFAULT_TIMEOUT = 20.0
+
+_PROCESSING_RE = re.compile(r'^Error detected while processing (.+):$')
+_LINE_RE = re.compile(r'^line\s+(\d+):$')
+_MESSAGE_RE = re.compile(r'^(E\d+|W\d+): ')
+_GUI_COLOR_RE = re.compile(r'^(#[0-9a-fA-F]{6}|[A-Za-z][A-Za-z0-9 ]*)$')
+_CTERM_COLOR_RE = re.compile(r'^(\d+|[A-Za-z][A-Za-z0-9]*\*?)$')
+
+# Attributes accepted by gui= and cterm=
+_HIGHLIGHT_ATTRS = {
+    'bold', 'underline', 'undercurl', 'underdouble', 'underdotted', 'underdashed',
+    'strikethrough', 'reverse', 'inverse', 'italic', 'standout', 'nocombine', 'none',
+}
+
+# Loaded after a theme to check it names itself
+_THEME_VIMRC = """set nocompatible
+set t_Co=256
+if has('termguicolors')
+  set termguicolors
+endif
+syntax on
+colorscheme {theme}
+if get(g:, 'colors_name', '') !=# '{theme}'
+  echoerr "colorscheme {theme} sets g:colors_name to '" . get(g:, 'colors_name', '') . "'"
+endif
+"""
+
+
+@dataclass
+class VerifyJob:
+    """One configuration to load in vim."""
+
+    name: str
+    vimrc: str
+    themes: List[str] = field(default_factory=list)  # Theme files the vimrc can reach
+    key: str = ''
+    lint: Optional[str] = None   # Theme whose highlight values are also checked
+
+
+def parse_errors(text: str, home: Path) -> List[Dict[str, Any]]:
+    """
+    Extract error messages from vim's message output.
+
+    Args:
+        text: Contents of the verbosefile
+        home: Temporary HOME the check ran in (shown as '~')
+
+    Returns:
+        Errors as {'file', 'line', 'message'}; file and line are None for
+        messages not raised while sourcing a file
+    """
+    errors = []
+    current_file: Optional[str] = None
+    current_line: Optional[int] = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _PROCESSING_RE.match(line)
+        if match:
+            current_file = match.group(1).replace(str(home), '~')
+            current_line = None
+            continue
+        match = _LINE_RE.match(line)
+        if match:
+            current_line = int(match.group(1))
+            continue
+        if current_file is not None or _MESSAGE_RE.match(line):
+            errors.append({'file': current_file, 'line': current_line, 'message': line})
+    return errors
+
+
+def lint_colorscheme(scheme: ColorScheme, filename: str) -> List[Dict[str, Any]]:
+    """
+    Check highlight values vim only validates with a terminal or GUI attached.
+
+    Headless vim accepts any gui color and cterm numbers beyond the
+    terminal's range, so those are checked here.
+
+    Args:
+        scheme: Parsed colorscheme
+        filename: File name reported with each error
+
+    Returns:
+        Errors in the same form as parse_errors
+    """
+    errors = []
+    for group in sorted(scheme.groups.values(), key=lambda g: g.line):
+        problems = []
+        for key in ('guifg', 'guibg', 'guisp'):
+            value = getattr(group, key)
+            if value is not None and not _GUI_COLOR_RE.match(value):
+                problems.append(f'invalid {key} color "{value}"')
+        for key in ('ctermfg', 'ctermbg'):
+            value = getattr(group, key)
+            if value is not None and (not _CTERM_COLOR_RE.match(value)
+                                      or value.isdigit() and int(value) > 255):
+                problems.append(f'invalid {key} color "{value}"')
+        for key in ('gui', 'cterm'):
+            value = getattr(group, key)
+            if value is not None:
+                unknown = [attr for attr in value.lower().split(',') if attr not in _HIGHLIGHT_ATTRS]
+                if unknown:
+                    problems.append(f'unknown {key} attribute(s) "{",".join(unknown)}"')
+        errors.extend({'file': filename, 'line': group.line, 'message': f'{group.name}: {problem}'}
+                      for problem in problems)
+    if scheme.colors_name not in (None, scheme.name):
+        errors.append({'file': filename, 'line': None,
+                       'message': f'g:colors_name is "{scheme.colors_name}", expected "{scheme.name}"'})
+    return errors
+
+
+def format_error(error: Dict[str, Any]) -> str:
+    """Return an error as 'file:line: message'."""
+    if error['file'] is None:
+        return error['message']
+    location = error['file'] if error['line'] is None else f"{error['file']}:{error['line']}"
+    return f"{location}: {error['message']}"
+
+
+class VimVerifier:
+    """Runs verification jobs in headless vim."""
+
+    def __init__(self, vim: str = 'vim', jobs: Optional[int] = None,
+                 timeout: float = DEFAULT_TIMEOUT, cache_path: Optional[Path] = None):
+        """
+        Initialize the verifier.
+
+        Args:
+            vim: vim executable
+            jobs: Number of checks run at once (default: CPU count)
+            timeout: Seconds a single check may take
+            cache_path: Result cache file, or None to always run every check
+        """
+        self.vim = vim
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.manager = VimConfigManager(quiet=True)
+        self.colors_dir = self.manager.repo_root / 'colors'
+        self._theme_digests: Dict[str, str] = {}
+        self._vim_identity: Optional[str] = None
+        self.ran = 0
+
+    def themes(self) -> List[str]:
+        """Return the themes available in the repository."""
+        return sorted(path.stem for path in self.colors_dir.glob('*.vim'))
+
+    def theme_digest(self, theme: str) -> str:
+        """Return the content digest of a theme file ('' if it does not exist)."""
+        if theme not in self._theme_digests:
+            path = self.colors_dir / f'{theme}.vim'
+            self._theme_digests[theme] = hash_bytes(path.read_bytes()) if path.exists() else ''
+        return self._theme_digests[theme]
+
+    def vim_identity(self) -> str:
+        """Identify the vim build, so upgrading vim invalidates cached results."""
+        if self._vim_identity is None:
+            path = shutil.which(self.vim) or self.vim
+            try:
+                st = os.stat(path)
+                self._vim_identity = f'{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}'
+            except OSError:
+                self._vim_identity = path
+        return self._vim_identity
+
+    # -- Jobs ----------------------------------------------------------------
+
+    def _job(self, name: str, vimrc: str, themes: List[str]) -> VerifyJob:
+        """Create a job with its cache key."""
+        parts = [f'verify {VERIFY_VERSION}', self.vim_identity(), hash_bytes(vimrc.encode('utf-8'))]
+        parts.extend(f'{theme}={self.theme_digest(theme)}' for theme in sorted(themes))
+        return VerifyJob(name, vimrc, sorted(themes), hash_bytes('\n'.join(parts).encode('utf-8')))
+
+    def config_job(self, name: str, vimrc: str) -> VerifyJob:
+        """Create a job that loads a generated configuration."""
+        referenced = {ref.theme for ref in VimrcModel(vimrc).colorschemes if not ref.inlined}
+        return self._job(name, vimrc, [theme for theme in referenced if self.theme_digest(theme)])
+
+    def theme_job(self, theme: str) -> VerifyJob:
+        """Create a job that loads one colorscheme."""
+        job = self._job(f'theme {theme}', _THEME_VIMRC.format(theme=theme), [theme])
+        job.lint = theme
+        return job
+
+    def profile_jobs(self, profiles: List[str], option_sets: List[str]) -> List[VerifyJob]:
+        """Create a job per profile and option set."""
+        jobs = []
+        names = list(option_sets)
+        for profile in profiles:
+            base = self.manager.profiles.resolve(profile).options
+            contents = self.manager.render_profiles(
+                profile, [merge_options(base, OPTION_SETS[name]) for name in names])
+            for set_name, content in zip(names, contents):
+                jobs.append(self.config_job(f'profile {profile}/{set_name}', content))
+        return jobs
+
+    def manifest_jobs(self, manifest: Path) -> List[VerifyJob]:
+        """Create a job per distinct configuration a fleet manifest renders."""
+        from fleet import load_manifest, render_targets
+
+        targets = load_manifest(manifest)
+        rendered, render_ids = render_targets(targets)
+        jobs = []
+        for render_id, (content, digest) in enumerate(rendered):
+            homes = render_ids.count(render_id)
+            profile = targets[render_ids.index(render_id)]['profile']
+            jobs.append(self.config_job(f'fleet {profile}/{digest[:12]} ({homes} home(s))', content))
+        return jobs
+
+    # -- Running -------------------------------------------------------------
+
+    def _prepare_home(self, root: Path, job: VerifyJob) -> Path:
+        """Create an isolated HOME holding the job's vimrc and themes."""
+        home = root / 'home'
+        for sub in ('backup', 'swap', 'undo', 'colors'):
+            (home / '.vim' / sub).mkdir(parents=True, exist_ok=True)
+        for theme in job.themes:
+            shutil.copy2(self.colors_dir / f'{theme}.vim', home / '.vim' / 'colors' / f'{theme}.vim')
+        (home / '.vimrc').write_text(job.vimrc)
+        return home
+
+    def run_job(self, job: VerifyJob) -> Dict[str, Any]:
+        """
+        Load one configuration in headless vim.
+
+        Returns:
+            Result with 'ok', 'errors' and 'elapsed_ms'; a check that timed
+            out or could not start is reported with 'cacheable' False
+        """
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix='vim-verify-') as tmp:
+            root = Path(tmp)
+            home = self._prepare_home(root, job)
+            log = root / 'messages.log'
+            env = {key: value for key, value in os.environ.items()
+                   if key not in ('VIMINIT', 'EXINIT', 'MYVIMRC', 'VIMRUNTIME_USER')}
+            env.update(HOME=str(home), XDG_CONFIG_HOME=str(home / '.config'),
+                       TERM='xterm-256color')
+            command = [self.vim, '-N', '-es', '-i', 'NONE', '-n',
+                       '--cmd', f'set verbosefile={log}',
+                       '-u', str(home / '.vimrc'), '-c', 'qa!']
+            try:
+                proc = subprocess.run(command, env=env, cwd=home, stdin=subprocess.DEVNULL,
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                      timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                return {'ok': False, 'cacheable': False,
+                        'errors': [{'file': None, 'line': None,
+                                    'message': f'vim did not exit within {self.timeout:g}s'}],
+                        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}
+            except OSError as e:
+                return {'ok': False, 'cacheable': False,
+                        'errors': [{'file': None, 'line': None, 'message': str(e)}],
+                        'elapsed_ms': 0.0}
+
+            messages = log.read_text(errors='replace') if log.exists() else ''
+            errors = parse_errors(messages, home)
+            if proc.returncode != 0 and not errors:
+                output = proc.stdout.decode('utf-8', 'replace').strip()
+                errors.append({'file': None, 'line': None,
+                               'message': output or f'vim exited with status {proc.returncode}'})
+        if job.lint:
+            scheme = load_colorscheme(self.colors_dir / f'{job.lint}.vim')
+            errors.extend(lint_colorscheme(scheme, f'colors/{job.lint}.vim'))
+        return {'ok': not errors, 'cacheable': True, 'errors': errors,
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Return cached results keyed by job key."""
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == VERIFY_VERSION:
+                return data.get('results', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _save_cache(self, results: Dict[str, Dict]):
+        """Persist results; failures only cost a re-check next time."""
+        if self.cache_path is None:
+            return
+        data = json.dumps({'version': VERIFY_VERSION, 'results': results}, sort_keys=True)
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            atomic_write(self.cache_path, data.encode('utf-8'), fsync=False)
+        except OSError:
+            pass
+
+    def verify(self, jobs: List[VerifyJob]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every job whose result is not cached.
+
+        Args:
+            jobs: Jobs to verify
+
+        Returns:
+            Results keyed by job name, each with 'ok', 'errors', 'elapsed_ms'
+            and 'cached'
+        """
+        cache = self._load_cache()
+        pending = list({job.key: job for job in jobs if job.key not in cache}.values())
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.jobs, len(pending) or 1))) as pool:
+            fresh = dict(zip((job.key for job in pending), pool.map(self.run_job, pending)))
+        self.ran += len(pending)
+
+        results = {}
+        kept: Dict[str, Dict] = {}
+        for job in jobs:
+            if job.key in fresh:
+                result = {k: v for k, v in fresh[job.key].items() if k != 'cacheable'}
+                if fresh[job.key]['cacheable']:
+                    kept[job.key] = result
+                results[job.name] = dict(result, cached=False)
+            else:
+                kept[job.key] = cache[job.key]
+                results[job.name] = dict(cache[job.key], cached=True)
+
+        if kept != cache:
+            # Only keys of the current matrix are kept, so the cache cannot grow unbounded
+            self._save_cache(kept)
+        return results
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    """Print one line per check, followed by its errors."""
+    for name, result in results.items():
+        mark = '✓' if result['ok'] else '✗'
+        note = 'cached' if result['cached'] else f"{result['elapsed_ms']:.0f} ms"
+        print(f"  {mark} {name:<48} {note}")
+        for error in result['errors']:
+            print(f"      {format_error(error)}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Verify generated configurations and themes load without errors in vim',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--vim', default='vim', help='vim executable (default: vim)')
+    profiles = ProfileStore().names()
+    parser.add_argument('--profile', action='append', choices=profiles,
+                        help='Profile to verify (repeatable, default: all)')
+    parser.add_argument('--options', action='append', choices=sorted(OPTION_SETS),
+                        help='Option set to verify (repeatable, default: all)')
+    parser.add_argument('--manifest', type=Path, metavar='FILE',
+                        help='Verify the configurations rendered for a fleet manifest '
+                             'instead of the profile matrix')
+    parser.add_argument('--theme', action='append', help='Theme to verify (repeatable, default: all)')
+    parser.add_argument('--no-themes', action='store_true', help='Skip the per-theme checks')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Checks run at once (default: CPU count)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds a single check may take (default: {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run every check')
+    parser.add_argument('--json', type=Path, metavar='FILE', help='Write results to FILE')
+    args = parser.parse_args()
+
+    if shutil.which(args.vim) is None:
+        print(f"Error: vim executable '{args.vim}' not found", file=sys.stderr)
+        return 1
+
+    cache_path = Path.home() / '.vim' / 'cache' / 'verify_cache.json'
+    verifier = VimVerifier(vim=args.vim, jobs=args.jobs, timeout=args.timeout,
+                           cache_path=None if args.no_cache else cache_path)
+    themes = args.theme or verifier.themes()
+    unknown = set(themes) - set(verifier.themes())
+    if unknown:
+        print(f"Error: unknown theme(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.manifest:
+            jobs = verifier.manifest_jobs(args.manifest)
+        else:
+            jobs = verifier.profile_jobs(args.profile or profiles,
+                                         args.options or list(OPTION_SETS))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not args.no_themes:
+        jobs.extend(verifier.theme_job(theme) for theme in themes)
+
+    start = time.perf_counter()
+    print(f"Verifying {len(jobs)} configuration(s) with {args.vim}")
+    print("=" * 70)
+    results = verifier.verify(jobs)
+    print_results(results)
+
+    failed = [name for name, result in results.items() if not result['ok']]
+    cached = sum(1 for result in results.values() if result['cached'])
+    print("=" * 70)
+    print(f"{len(results) - len(failed)} passed, {len(failed)} failed "
+          f"({len(results) - cached} run, {cached} cached) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=1, sort_keys=True))
+        print(f"Results written to {args.json}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,533 @@
+"""
+Vimrc Model
+
+Parses a vimrc once into a line-indexed model: sections (`" --- Name ---`
+headers), `set` options, `let` variables, key mappings, autocmds, try
+blocks and colorscheme commands. Every entry records the index of the line
+it came from, so edits address a line directly instead of searching the
+whole text again.
+
+Edits replace individual line slots in place; untouched lines are written
+back byte for byte and line indexes stay valid after an edit. Only adding
+a line that did not exist before re-indexes the file.
+
+Compiled themes inlined into the vimrc sit between marker comments and
+are modeled as a single colorscheme entry:
+
+    " BEGIN compiled colorscheme nord (cterm) - managed by select_theme.py
+    hi Normal ctermfg=253 ctermbg=236
+    ...
+    " END compiled colorscheme nord
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+
+INLINE_BEGIN = '" BEGIN compiled colorscheme'
+INLINE_END = '" END compiled colorscheme'
+
+_SECTION_RE = re.compile(r'^"\s*---\s*(.+?)\s*---\s*$')
+_INLINE_BEGIN_RE = re.compile(r'^" BEGIN compiled colorscheme (\w+)(?: \((\w+)\))?')
+_COMMAND_RE = re.compile(r'^([A-Za-z]+)!?(?:\s+(.*))?$')
+_SET_ARG_RE = re.compile(r'(?:[^\s\\]|\\.)+')
+_SET_OPTION_RE = re.compile(r'^(no|inv)?([a-z][a-z0-9_]*)(?:([-+^]?=|:)(.*))?(!|&|&vim|&vi)?$')
+
+_MAP_COMMANDS = {
+    'map', 'nmap', 'vmap', 'xmap', 'smap', 'omap', 'imap', 'lmap', 'cmap', 'tmap',
+    'noremap', 'nnoremap', 'vnoremap', 'xnoremap', 'snoremap', 'onoremap',
+    'inoremap', 'lnoremap', 'cnoremap', 'tnoremap',
+}
+_MAP_ARGS = {'<buffer>', '<nowait>', '<silent>', '<special>', '<script>', '<expr>', '<unique>'}
+
+OptionValue = Union[bool, str]
+
+# Short forms of vim options (`:help option-list`), so that `set ts=2` and
+# `set tabstop=2` address the same setting
+OPTION_ABBREVIATIONS: Dict[str, str] = {
+    'acd': 'autochdir', 'ai': 'autoindent', 'ambw': 'ambiwidth', 'ar': 'autoread',
+    'aw': 'autowrite', 'bdir': 'backupdir', 'bex': 'backupext', 'bg': 'background',
+    'bin': 'binary', 'bk': 'backup', 'bkc': 'backupcopy', 'bo': 'belloff',
+    'bri': 'breakindent', 'bs': 'backspace', 'cb': 'clipboard', 'cc': 'colorcolumn',
+    'cf': 'confirm', 'ch': 'cmdheight', 'cin': 'cindent', 'co': 'columns',
+    'cocu': 'concealcursor', 'cole': 'conceallevel', 'cot': 'completeopt',
+    'cp': 'compatible', 'cpo': 'cpoptions', 'cpt': 'complete', 'cuc': 'cursorcolumn',
+    'cul': 'cursorline', 'culopt': 'cursorlineopt', 'dip': 'diffopt', 'dir': 'directory',
+    'dy': 'display', 'ea': 'equalalways', 'eb': 'errorbells', 'efm': 'errorformat',
+    'enc': 'encoding', 'eol': 'endofline', 'et': 'expandtab', 'ex': 'exrc',
+    'fcs': 'fillchars', 'fdc': 'foldcolumn', 'fdl': 'foldlevel', 'fdm': 'foldmethod',
+    'fdn': 'foldnestmax', 'fen': 'foldenable', 'fenc': 'fileencoding',
+    'fencs': 'fileencodings', 'ff': 'fileformat', 'ffs': 'fileformats',
+    'fixeol': 'fixendofline', 'fo': 'formatoptions', 'fp': 'formatprg', 'ft': 'filetype',
+    'gd': 'gdefault', 'gfn': 'guifont', 'gp': 'grepprg', 'hi': 'history', 'hid': 'hidden',
+    'hls': 'hlsearch', 'ic': 'ignorecase', 'inf': 'infercase', 'is': 'incsearch',
+    'isk': 'iskeyword', 'js': 'joinspaces', 'kp': 'keywordprg', 'lbr': 'linebreak',
+    'lcs': 'listchars', 'ls': 'laststatus', 'lsp': 'linespace', 'lz': 'lazyredraw',
+    'ma': 'modifiable', 'mat': 'matchtime', 'mh': 'mousehide', 'ml': 'modeline',
+    'mls': 'modelines', 'mmp': 'maxmempattern', 'mousem': 'mousemodel', 'mp': 'makeprg',
+    'nf': 'nrformats', 'nu': 'number', 'nuw': 'numberwidth', 'ofu': 'omnifunc',
+    'pa': 'path', 'ph': 'pumheight', 'rdt': 'redrawtime', 're': 'regexpengine',
+    'rnu': 'relativenumber', 'ro': 'readonly', 'ru': 'ruler', 'sb': 'splitbelow',
+    'sbr': 'showbreak', 'sc': 'showcmd', 'scl': 'signcolumn', 'scs': 'smartcase',
+    'sel': 'selection', 'sh': 'shell', 'shm': 'shortmess', 'si': 'smartindent',
+    'siso': 'sidescrolloff', 'sj': 'scrolljump', 'sm': 'showmatch', 'smc': 'synmaxcol',
+    'smd': 'showmode', 'so': 'scrolloff', 'sol': 'startofline', 'spk': 'splitkeep',
+    'spl': 'spelllang', 'spr': 'splitright', 'sr': 'shiftround', 'ss': 'sidescroll',
+    'ssop': 'sessionoptions', 'sta': 'smarttab', 'stal': 'showtabline',
+    'stl': 'statusline', 'sts': 'softtabstop', 'sw': 'shiftwidth', 'swb': 'switchbuf',
+    'swf': 'swapfile', 'syn': 'syntax', 'tc': 'tagcase', 'tf': 'ttyfast',
+    'tgc': 'termguicolors', 'tm': 'timeoutlen', 'to': 'timeout', 'ts': 'tabstop',
+    'ttm': 'ttimeoutlen', 'ttym': 'ttymouse', 'tw': 'textwidth', 'udf': 'undofile',
+    'udir': 'undodir', 'ul': 'undolevels', 'ut': 'updatetime', 'vb': 'visualbell',
+    've': 'virtualedit', 'vi': 'viminfo', 'wb': 'writebackup', 'wh': 'winheight',
+    'wig': 'wildignore', 'wim': 'wildmode', 'wiw': 'winwidth', 'wm': 'wrapmargin',
+    'wmh': 'winminheight', 'wmnu': 'wildmenu', 'wop': 'wildoptions', 'ws': 'wrapscan',
+    'ww': 'whichwrap',
+}
+
+
+@dataclass
+class SetEntry:
+    """One option assignment within a `set` command."""
+
+    index: int
+    name: str                    # Full option name, abbreviations expanded
+    op: str                      # '=', '+=', '-=', '^=', 'on', 'off' or 'toggle'
+    value: Optional[str]
+    span: Tuple[int, int]        # Position of the argument within the line
+
+
+@dataclass
+class TryBlock:
+    """A try/catch/endtry block."""
+
+    start: int
+    catch: Optional[int] = None
+
+
+@dataclass
+class ColorschemeRef:
+    """A colorscheme command, or an inlined compiled colorscheme."""
+
+    index: int
+    theme: str
+    fallback: bool = False       # Inside a catch branch
+    end: Optional[int] = None    # Last line of an inlined block
+    target: Optional[str] = None  # Compile target of an inlined block
+
+    @property
+    def inlined(self) -> bool:
+        """True if the theme is inlined rather than loaded with :colorscheme."""
+        return self.end is not None
+
+
+@dataclass
+class Autocmd:
+    """An autocmd definition."""
+
+    index: int
+    events: str
+    pattern: str
+    command: str
+
+
+class VimrcModel:
+    """Line-indexed model of a vimrc supporting targeted edits."""
+
+    def __init__(self, text: str):
+        """
+        Parse vimrc text.
+
+        Args:
+            text: vimrc contents
+        """
+        self.dirty = False
+        self._load(text)
+
+    def _load(self, text: str):
+        """Index text, replacing any previous state."""
+        self.lines: List[Optional[str]] = text.splitlines(keepends=True)
+        self.settings: Dict[str, List[SetEntry]] = {}
+        self.variables: Dict[str, Tuple[int, str]] = {}
+        self.mappings: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self.autocmds: List[Autocmd] = []
+        self.colorschemes: List[ColorschemeRef] = []
+        self._section_starts: List[Tuple[int, str]] = []
+        self._parse()
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'VimrcModel':
+        """Parse a vimrc file."""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return cls(f.read())
+
+    # -- Parsing -----------------------------------------------------------
+
+    def _parse(self):
+        """Index every line of the file."""
+        open_tries: List[TryBlock] = []
+        index = 0
+        count = len(self.lines)
+
+        while index < count:
+            line = self.lines[index]
+            stripped = line.strip()
+
+            if stripped.startswith(INLINE_BEGIN):
+                index = self._parse_inline(index, open_tries)
+                continue
+
+            # Join continuation lines ('\' at the start of the next line)
+            end = index
+            while end + 1 < count and self.lines[end + 1].lstrip().startswith('\\'):
+                end += 1
+                stripped += ' ' + self.lines[end].lstrip()[1:].strip()
+
+            if stripped.startswith('"'):
+                section = _SECTION_RE.match(stripped)
+                if section:
+                    self._section_starts.append((index, section.group(1)))
+            elif stripped:
+                self._parse_command(index, stripped, open_tries)
+            index = end + 1
+
+    def _parse_inline(self, index: int, open_tries: List[TryBlock]) -> int:
+        """Record an inlined colorscheme block; returns the index after it."""
+        begin = _INLINE_BEGIN_RE.match(self.lines[index].strip())
+        end = index + 1
+        while end < len(self.lines) and not self.lines[end].strip().startswith(INLINE_END):
+            end += 1
+        end = min(end, len(self.lines) - 1)
+        self.colorschemes.append(ColorschemeRef(
+            index=index,
+            theme=begin.group(1) if begin else '',
+            fallback=self._in_catch(open_tries),
+            end=end,
+            target=begin.group(2) if begin else None,
+        ))
+        return end + 1
+
+    def _in_catch(self, open_tries: List[TryBlock]) -> bool:
+        """True while inside the catch branch of any open try block."""
+        return any(block.catch is not None for block in open_tries)
+
+    def _parse_command(self, index: int, text: str, open_tries: List[TryBlock]):
+        """Classify one ex command."""
+        match = _COMMAND_RE.match(_strip_comment(text))
+        if not match:
+            return
+        command, args = match.group(1), (match.group(2) or '').strip()
+
+        if command in ('try',):
+            open_tries.append(TryBlock(start=index))
+        elif command in ('catch', 'cat') and open_tries:
+            if open_tries[-1].catch is None:
+                open_tries[-1].catch = index
+        elif command in ('endtry', 'endt', 'endtr') and open_tries:
+            open_tries.pop()
+        elif command in ('colorscheme', 'colo', 'colors', 'colorsc') and args:
+            self.colorschemes.append(ColorschemeRef(
+                index=index, theme=args.split()[0], fallback=self._in_catch(open_tries)))
+        elif command in ('set', 'se'):
+            self._parse_set(index, self.lines[index])
+        elif command == 'let':
+            name, _, value = args.partition('=')
+            self.variables[name.strip().rstrip('.+-')] = (index, value.strip())
+        elif command in _MAP_COMMANDS:
+            tokens = [t for t in args.split() if t.lower() not in _MAP_ARGS]
+            if tokens:
+                mode = '' if command in ('map', 'noremap') else command[0]
+                self.mappings[(mode, tokens[0])] = (index, ' '.join(tokens[1:]))
+        elif command in ('autocmd', 'au'):
+            parts = args.split(None, 2)
+            if len(parts) == 3:
+                self.autocmds.append(Autocmd(index, parts[0], parts[1], parts[2]))
+
+    def _parse_set(self, index: int, line: str):
+        """Record every option assigned by a `set` line."""
+        start = line.index('se')
+        pos = line.find(' ', start)
+        if pos < 0:
+            return
+        for token in _SET_ARG_RE.finditer(line, pos):
+            arg = token.group(0)
+            if arg.startswith('"'):
+                break
+            option = _SET_OPTION_RE.match(arg)
+            if not option:
+                continue
+            prefix, name, op, value = option.group(1), option.group(2), option.group(3), option.group(4)
+            if op == ':':
+                op = '='
+            if op is None:
+                op = {'no': 'off', 'inv': 'toggle'}.get(prefix or '', 'on')
+                if option.group(5) == '!':
+                    op = 'toggle'
+            elif prefix:
+                name = prefix + name
+            name = OPTION_ABBREVIATIONS.get(name, name)
+            self.settings.setdefault(name, []).append(
+                SetEntry(index, name, op, value, (token.start(), token.end())))
+
+    # -- Queries -----------------------------------------------------------
+
+    def option(self, name: str) -> Optional[OptionValue]:
+        """
+        Return the effective value of an option set in this file.
+
+        Args:
+            name: Option name (abbreviations such as 'bg' are accepted)
+
+        Returns:
+            True/False for boolean options, the value string otherwise, or
+            None if the option is never set
+        """
+        return effective_value(self.settings.get(OPTION_ABBREVIATIONS.get(name, name), []))
+
+    def section_ranges(self) -> List[Tuple[str, int, int]]:
+        """
+        Return the line range of every section.
+
+        Returns:
+            (name, first line index, last line index) per section, in file
+            order; lines before the first header form a section named ''
+        """
+        starts = list(self._section_starts)
+        if not starts or starts[0][0] > 0:
+            starts.insert(0, (0, ''))
+        ranges = []
+        for i, (start, name) in enumerate(starts):
+            end = starts[i + 1][0] - 1 if i + 1 < len(starts) else len(self.lines) - 1
+            ranges.append((name, start, end))
+        return ranges
+
+    def entries(self, start: int = 0, end: Optional[int] = None
+                ) -> Dict[Tuple[str, str], Tuple[int, Union[OptionValue, str]]]:
+        """
+        Return the set, let, map and autocmd entries within a line range.
+
+        Args:
+            start: First line index
+            end: Last line index (defaults to the end of the file)
+
+        Returns:
+            (kind, key) -> (first line index, value). kind is 'set', 'let',
+            'map', 'autocmd' or 'colorscheme' (key 'colorscheme' or
+            'colorscheme fallback').
+            Options carry their effective value over the range; repeated
+            autocmds for one event and pattern, and repeated fallback
+            colorschemes, are joined with newlines.
+        """
+        end = len(self.lines) - 1 if end is None else end
+        found: Dict[Tuple[str, str], Tuple[int, Union[OptionValue, str]]] = {}
+
+        for name, settings in self.settings.items():
+            within = [e for e in settings if start <= e.index <= end]
+            if within:
+                found[('set', name)] = (within[0].index, effective_value(within))
+        for name, (index, value) in self.variables.items():
+            if start <= index <= end:
+                found[('let', name)] = (index, value)
+        for (mode, lhs), (index, rhs) in self.mappings.items():
+            if start <= index <= end:
+                found[('map', f'{mode}map {lhs}')] = (index, rhs)
+        for autocmd in self.autocmds:
+            if start <= autocmd.index <= end:
+                key = ('autocmd', f'{autocmd.events} {autocmd.pattern}')
+                if key in found:
+                    index, command = found[key]
+                    found[key] = (index, f'{command}\n{autocmd.command}')
+                else:
+                    found[key] = (autocmd.index, autocmd.command)
+        for ref in self.colorschemes:
+            if start <= ref.index <= end:
+                key = ('colorscheme', 'colorscheme fallback' if ref.fallback else 'colorscheme')
+                theme = f'{ref.theme} (inlined, {ref.target})' if ref.inlined else ref.theme
+                if key in found:
+                    index, themes = found[key]
+                    found[key] = (index, f'{themes}\n{theme}')
+                else:
+                    found[key] = (ref.index, theme)
+        return found
+
+    def primary_colorscheme(self) -> Optional[ColorschemeRef]:
+        """Return the colorscheme that is loaded unless it fails (not a fallback)."""
+        for ref in self.colorschemes:
+            if not ref.fallback:
+                return ref
+        return None
+
+    def colorscheme(self) -> Optional[str]:
+        """Return the name of the primary colorscheme."""
+        ref = self.primary_colorscheme()
+        return ref.theme if ref is not None else None
+
+    def inlined_commands(self, ref: ColorschemeRef) -> Optional[str]:
+        """Return the compiled commands of an inlined colorscheme, without markers."""
+        if not ref.inlined:
+            return None
+        indent = self._indent(ref.index)
+        body = [line for line in self.lines[ref.index + 1:ref.end] if line is not None]
+        return ''.join(line[len(indent):] if line.startswith(indent) else line.lstrip()
+                       for line in body)
+
+    # -- Edits -------------------------------------------------------------
+
+    def _replace(self, index: int, text: str):
+        """Replace one line slot, keeping its line ending."""
+        old = self.lines[index]
+        ending = old[len(old.rstrip('\r\n')):] if old else '\n'
+        self.lines[index] = text.rstrip('\r\n') + (ending or '\n')
+        self.dirty = True
+
+    def _insert_after(self, index: int, text: str):
+        """Add a new line after a line slot (index -1 inserts at the top) and re-index."""
+        position = sum(1 for line in self.lines[:index + 1] if line is not None)
+        lines = [line for line in self.lines if line is not None]
+        if position and not lines[position - 1].endswith('\n'):
+            lines[position - 1] += '\n'
+        lines.insert(position, text)
+        self._load(''.join(lines))
+        self.dirty = True
+
+    def _indent(self, index: int) -> str:
+        """Return the leading whitespace of a line."""
+        line = self.lines[index] or ''
+        return line[:len(line) - len(line.lstrip(' \t'))]
+
+    def set_colorscheme(self, theme: str, compiled: Optional[str] = None,
+                        target: str = 'both') -> bool:
+        """
+        Point the primary colorscheme at a theme.
+
+        Fallback colorschemes in catch branches are left alone. If the file
+        has no colorscheme command, one is added after the `background`
+        setting (or at the end of the file).
+
+        Args:
+            theme: Theme name
+            compiled: Compiled theme commands to inline instead of a
+                `colorscheme` command
+            target: Compile target recorded in the inline marker
+
+        Returns:
+            True if the file changed
+        """
+        ref = self.primary_colorscheme()
+        if ref is None:
+            background = self.settings.get('background')
+            self._insert_after(background[-1].index if background else len(self.lines) - 1,
+                               f'colorscheme {theme}\n')
+            if compiled is not None:
+                self.set_colorscheme(theme, compiled, target)
+            return True
+
+        indent = self._indent(ref.index)
+        if compiled is None:
+            text = f'{indent}colorscheme {theme}'
+        else:
+            body = ''.join(f'{indent}{line}\n' for line in compiled.splitlines())
+            text = (f'{indent}{INLINE_BEGIN} {theme} ({target}) - managed by select_theme.py\n'
+                    f'{body}{indent}{INLINE_END} {theme}')
+
+        end = ref.end if ref.end is not None else ref.index
+        current = ''.join(line for line in self.lines[ref.index:end + 1] if line is not None)
+        if current.rstrip('\r\n') == text:
+            return False
+        for index in range(ref.index + 1, end + 1):
+            self.lines[index] = None
+        self._replace(ref.index, text)
+        ref.theme = theme
+        ref.end = ref.index if compiled is not None else None
+        ref.target = target if compiled is not None else None
+        return True
+
+    def set_option(self, name: str, value: OptionValue) -> bool:
+        """
+        Change an option where it is set, keeping the rest of the line.
+
+        The last plain assignment of the option is rewritten in place; an
+        option the file does not set yet is added after the last `set` line.
+
+        Args:
+            name: Option name (abbreviations such as 'bg' are accepted)
+            value: True/False for boolean options, otherwise the value
+
+        Returns:
+            True if the file changed
+        """
+        name = OPTION_ABBREVIATIONS.get(name, name)
+        if self.option(name) == (value if isinstance(value, bool) else str(value)):
+            return False
+        arg = (name if value else f'no{name}') if isinstance(value, bool) else f'{name}={value}'
+        entries = [e for e in self.settings.get(name, []) if e.op in ('=', 'on', 'off')]
+
+        if not entries:
+            last = max((e.index for es in self.settings.values() for e in es), default=-1)
+            self._insert_after(last if last >= 0 else len(self.lines) - 1, f'set {arg}\n')
+            return True
+
+        entry = entries[-1]
+        line = self.lines[entry.index]
+        start, end = entry.span
+
+        # Keep a trailing comment in its column when the padding allows it
+        rest = line[end:]
+        padding = len(rest) - len(rest.lstrip(' '))
+        if rest.lstrip(' ').startswith('"'):
+            padding = max(1, padding - (len(arg) - (end - start)))
+            rest = ' ' * padding + rest.lstrip(' ')
+        new_line = line[:start] + arg + rest
+        self._replace(entry.index, new_line)
+
+        shift = len(new_line) - len(line)
+        for entries_for_name in self.settings.values():
+            for other in entries_for_name:
+                if other.index == entry.index and other.span[0] > start:
+                    other.span = (other.span[0] + shift, other.span[1] + shift)
+        entry.span = (start, start + len(arg))
+        entry.op = ('on' if value else 'off') if isinstance(value, bool) else '='
+        entry.value = None if isinstance(value, bool) else str(value)
+        return True
+
+    def text(self) -> str:
+        """Serialize the model back to vimrc text."""
+        return ''.join(line for line in self.lines if line is not None)
+
+
+def effective_value(entries: List[SetEntry]) -> Optional[OptionValue]:
+    """
+    Apply a sequence of assignments to one option.
+
+    Returns:
+        True/False for boolean options, the value string otherwise, or None
+        if there are no assignments
+    """
+    value: Optional[OptionValue] = None
+    for entry in entries:
+        if entry.op == 'on':
+            value = True
+        elif entry.op == 'off':
+            value = False
+        elif entry.op == 'toggle':
+            value = not value
+        elif entry.op == '=':
+            value = entry.value
+        elif entry.op == '+=':
+            value = (value if isinstance(value, str) else '') + entry.value
+        elif entry.op == '^=':
+            value = entry.value + (value if isinstance(value, str) else '')
+        elif entry.op == '-=' and isinstance(value, str):
+            value = value.replace(entry.value, '', 1)
+    return value
+
+
+def _strip_comment(command: str) -> str:
+    """Remove a trailing `" comment` from simple commands like set/colorscheme."""
+    match = re.search(r'\s+"[^"]*$', command)
+    if match and not command.lstrip().startswith(('let', 'autocmd', 'au ')):
+        return command[:match.start()]
+    return command
+
@@ -0,0 +1,227 @@
+"""
+Vimrc Template Engine
+
+Compiles vimrc templates into a cached render plan that is rendered in a
+single pass. Templates are plain vim script with a few explicit markers:
+
+    {{name}}                     replaced by the option value
+    {{?name}}set mouse=a         line kept when the option is true,
+                                 commented out when it is false
+    {{#name}} ... {{/name}}      block kept only when the option is true
+    {{^name}} ... {{/name}}      block kept only when the option is false
+    {{>name}}                    replaced by the partial of that name (the
+                                 overlays of a profile); dropped when there
+                                 is none
+
+Section tags that stand alone on a line are removed together with the
+line. Rendering a template with its default options reproduces a plain,
+valid vimrc.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+# Prefix written in front of lines disabled through a {{?name}} marker
+DISABLED_PREFIX = '" (disabled by setup) '
+
+_TAG_RE = re.compile(r'\{\{([#^/?]?)\s*([A-Za-z_]\w*)\s*\}\}')
+_STANDALONE_RE = re.compile(r'[ \t]*\{\{([#^/])\s*([A-Za-z_]\w*)\s*\}\}[ \t]*\r?\n?')
+_PARTIAL_RE = re.compile(r'^[ \t]*\{\{>\s*([A-Za-z_]\w*)\s*\}\}[ \t]*(?:\r?\n|\Z)', re.MULTILINE)
+
+# Render plan nodes: literal text, or (kind, name, children) for tags.
+# kind is '=' (value), '?' (line toggle), '#' (if true) or '^' (if false).
+Node = Union[str, Tuple[str, str, list]]
+
+
+class TemplateError(Exception):
+    """Raised when a template cannot be compiled or rendered."""
+
+
+class CompiledTemplate:
+    """A template parsed once into a render plan."""
+
+    def __init__(self, source: str, name: str = '<template>',
+                 partials: Optional[Dict[str, str]] = None):
+        """
+        Compile template source.
+
+        Args:
+            source: Template text
+            name: Name used in error messages
+            partials: Template text spliced in for each {{>name}} line
+
+        Raises:
+            TemplateError: If sections are unbalanced
+        """
+        self.name = name
+        self.names: Set[str] = set()
+        self.plan: List[Node] = self._compile(self._splice(source, partials or {}))
+
+    @staticmethod
+    def _splice(source: str, partials: Dict[str, str]) -> str:
+        """Replace standalone {{>name}} lines with the partials' text."""
+        def partial(match) -> str:
+            text = partials.get(match.group(1), '')
+            return text if not text or text.endswith('\n') else text + '\n'
+        return _PARTIAL_RE.sub(partial, source)
+
+    def _compile(self, source: str) -> List[Node]:
+        """Parse template source into a nested render plan."""
+        root: List[Node] = []
+        stack: List[Tuple[str, List[Node]]] = [('', root)]
+
+        for lineno, line in enumerate(source.splitlines(keepends=True), 1):
+            # Section tags that stand alone on a line take the line with them
+            standalone = _STANDALONE_RE.fullmatch(line)
+            if standalone:
+                self._section_tag(standalone.group(1), standalone.group(2), stack, lineno)
+                continue
+
+            target = stack[-1][1]
+            if line.startswith('{{?'):
+                match = _TAG_RE.match(line)
+                if match and match.group(1) == '?':
+                    self.names.add(match.group(2))
+                    children: List[Node] = []
+                    target.append(('?', match.group(2), children))
+                    target = children
+                    line = line[match.end():]
+
+            pos = 0
+            for match in _TAG_RE.finditer(line):
+                kind, name = match.group(1), match.group(2)
+                if kind != '':
+                    raise TemplateError(
+                        f"{self.name}:{lineno}: '{match.group(0)}' must stand alone on its line"
+                        if kind != '?' else
+                        f"{self.name}:{lineno}: line toggle '{name}' must start the line"
+                    )
+                if match.start() > pos:
+                    target.append(line[pos:match.start()])
+                target.append(('=', name, []))
+                self.names.add(name)
+                pos = match.end()
+            if pos < len(line):
+                target.append(line[pos:])
+
+        if len(stack) > 1:
+            raise TemplateError(f"{self.name}: unclosed section '{stack[-1][0]}'")
+        return self._merge_literals(root)
+
+    def _section_tag(self, kind: str, name: str, stack: List[Tuple[str, List[Node]]],
+                     lineno: int):
+        """Open or close a {{#name}}/{{^name}} section."""
+        if kind == '/':
+            if stack[-1][0] != name:
+                raise TemplateError(f"{self.name}:{lineno}: unexpected {{{{/{name}}}}}")
+            stack.pop()
+            return
+
+        self.names.add(name)
+        section: List[Node] = []
+        stack[-1][1].append((kind, name, section))
+        stack.append((name, section))
+
+    def _merge_literals(self, nodes: List[Node]) -> List[Node]:
+        """Join adjacent literal strings so rendering touches fewer nodes."""
+        merged: List[Node] = []
+        for node in nodes:
+            if isinstance(node, str):
+                if merged and isinstance(merged[-1], str):
+                    merged[-1] += node
+                else:
+                    merged.append(node)
+            else:
+                kind, name, children = node
+                merged.append((kind, name, self._merge_literals(children)))
+        return merged
+
+    def render(self, options: Dict[str, Any]) -> str:
+        """
+        Render the template for one set of options.
+
+        Args:
+            options: Option values; every name used in the template must be present
+
+        Returns:
+            Rendered configuration
+
+        Raises:
+            TemplateError: If an option used by the template is missing
+        """
+        missing = self.names.difference(options)
+        if missing:
+            raise TemplateError(f"{self.name}: missing option(s): {', '.join(sorted(missing))}")
+
+        out: List[str] = []
+        self._render_nodes(self.plan, options, out)
+        return ''.join(out)
+
+    def _render_nodes(self, nodes: List[Node], options: Dict[str, Any], out: List[str]):
+        """Append the rendering of a node list to out."""
+        for node in nodes:
+            if isinstance(node, str):
+                out.append(node)
+                continue
+            kind, name, children = node
+            value = options[name]
+            if kind == '=':
+                out.append(str(value))
+            elif kind == '?':
+                if not value:
+                    out.append(DISABLED_PREFIX)
+                self._render_nodes(children, options, out)
+            elif (kind == '#') == bool(value):
+                self._render_nodes(children, options, out)
+
+    def render_many(self, option_sets: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Render the template for many option sets.
+
+        Identical option sets are rendered once and share the result.
+
+        Args:
+            option_sets: Option dictionaries to render
+
+        Returns:
+            Rendered configurations, one per option set
+        """
+        rendered: Dict[Tuple, str] = {}
+        results = []
+        for options in option_sets:
+            key = tuple(sorted((name, options.get(name)) for name in self.names))
+            if key not in rendered:
+                rendered[key] = self.render(options)
+            results.append(rendered[key])
+        return results
+
+
+# Compiled templates keyed by absolute path, validated by stat signature
+_CACHE: Dict[str, Tuple[Tuple[int, int, int], CompiledTemplate]] = {}
+
+
+def load_template(template_path: Path) -> CompiledTemplate:
+    """
+    Return the compiled template for a file, compiling it only if it changed.
+
+    Args:
+        template_path: Template file
+
+    Returns:
+        Compiled template
+    """
+    key = os.path.abspath(template_path)
+    st = os.stat(key)
+    signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    cached: Optional[Tuple[Tuple[int, int, int], CompiledTemplate]] = _CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(key, 'r') as f:
+        compiled = CompiledTemplate(f.read(), name=Path(key).name)
+    _CACHE[key] = (signature, compiled)
+    return compiled
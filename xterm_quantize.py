@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+xterm Color Quantizer
+
+Maps gui hex colors to their nearest xterm palette entries and checks the
+ctermfg/ctermbg values themes write next to guifg/guibg.
+
+Distances are measured in CIELAB (CIE76 delta E), which tracks perceived
+difference far better than RGB distance. A color is matched against the
+xterm-256 cube and gray ramp (16-255) and, separately, against the 16
+basic colors; a theme's existing value decides which one applies (values
+below 16 target the basic colors, which terminals often redefine).
+
+The palette is converted to Lab once and kept as a lookup table. With
+NumPy installed, the unique colors of all themes are converted and matched
+in one batched array operation; without it the same math runs per color.
+
+Audit mode lists every highlight whose cterm value is not the nearest
+palette entry (or is missing); rewrite mode fixes them in place.
+
+Usage:
+    python xterm_quantize.py                     # Audit colors/*.vim
+    python xterm_quantize.py --tolerance 2       # Ignore near misses
+    python xterm_quantize.py --rewrite colors/claude.vim
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fileutil import atomic_write
+
+
+RGB = Tuple[int, int, int]
+
+# xterm's default 16 colors
+ANSI16: List[RGB] = [
+    (0x00, 0x00, 0x00), (0xcd, 0x00, 0x00), (0x00, 0xcd, 0x00), (0xcd, 0xcd, 0x00),
+    (0x00, 0x00, 0xee), (0xcd, 0x00, 0xcd), (0x00, 0xcd, 0xcd), (0xe5, 0xe5, 0xe5),
+    (0x7f, 0x7f, 0x7f), (0xff, 0x00, 0x00), (0x00, 0xff, 0x00), (0xff, 0xff, 0x00),
+    (0x5c, 0x5c, 0xff), (0xff, 0x00, 0xff), (0x00, 0xff, 0xff), (0xff, 0xff, 0xff),
+]
+
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+# The full 256-color palette: basic colors, 6x6x6 cube, 24-step gray ramp
+XTERM_PALETTE: List[RGB] = (
+    ANSI16
+    + [(r, g, b) for r in _CUBE_LEVELS for g in _CUBE_LEVELS for b in _CUBE_LEVELS]
+    + [(8 + 10 * i,) * 3 for i in range(24)]
+)
+
+# Palette ranges a cterm value can target
+RANGE_256 = (16, 256)
+RANGE_16 = (0, 16)
+
+# sRGB (D65) to XYZ, and the D65 reference white
+_SRGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_WHITE = (0.95047, 1.0, 1.08883)
+_EPSILON = (6 / 29) ** 3
+
+_HI_LINE_RE = re.compile(r'^\s*hi(?:g(?:h(?:l(?:i(?:g(?:h(?:t)?)?)?)?)?)?)?!?\s+(.*)$')
+_GUI_HEX_RE = re.compile(r'^#[0-9a-fA-F]{6}$')
+_COLOR_ATTR_RE = re.compile(r"\b((?:gui|cterm)[fb]g)=('[^']*'|\S+)", re.IGNORECASE)
+
+# gui attribute -> cterm attribute it should match
+_PAIRS = (('guifg', 'ctermfg'), ('guibg', 'ctermbg'))
+
+
+def hex_to_rgb(value: str) -> RGB:
+    """Convert '#rrggbb' to an RGB tuple."""
+    return (int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16))
+
+
+def srgb_to_lab(rgb: Sequence[float]) -> Tuple[float, float, float]:
+    """Convert one sRGB color (0-255 per channel) to CIELAB."""
+    linear = []
+    for c in rgb:
+        c /= 255.0
+        linear.append(c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4)
+    f = []
+    for row, white in zip(_SRGB_TO_XYZ, _WHITE):
+        t = sum(m * c for m, c in zip(row, linear)) / white
+        f.append(t ** (1 / 3) if t > _EPSILON else t / (3 * (6 / 29) ** 2) + 4 / 29)
+    return (116 * f[1] - 16, 500 * (f[0] - f[1]), 200 * (f[1] - f[2]))
+
+
+def srgb_to_lab_array(rgb):
+    """Convert an (N, 3) array of sRGB colors (0-255) to CIELAB (requires NumPy)."""
+    np = numpy_module()
+    c = rgb / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    t = linear @ np.array(_SRGB_TO_XYZ).T / np.array(_WHITE)
+    f = np.where(t > _EPSILON, np.cbrt(t), t / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]),
+                     200 * (f[:, 1] - f[:, 2])], axis=1)
+
+
+@lru_cache(maxsize=1)
+def numpy_module():
+    """Return the numpy module, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=1)
+def palette_lab() -> List[Tuple[float, float, float]]:
+    """The xterm palette in CIELAB (the lookup table every match uses)."""
+    return [srgb_to_lab(rgb) for rgb in XTERM_PALETTE]
+
+
+@lru_cache(maxsize=1)
+def _palette_array():
+    """palette_lab() as a (256, 3) array."""
+    return numpy_module().array(palette_lab())
+
+
+@lru_cache(maxsize=65536)
+def delta_e(color: str, index: int) -> float:
+    """CIE76 distance between a '#rrggbb' color and a palette entry."""
+    lab = srgb_to_lab(hex_to_rgb(color))
+    return sum((a - b) ** 2 for a, b in zip(lab, palette_lab()[index])) ** 0.5
+
+
+@lru_cache(maxsize=4096)
+def nearest(color: str, palette_range: Tuple[int, int] = RANGE_256) -> int:
+    """
+    Return the palette index nearest to one '#rrggbb' color.
+
+    Args:
+        color: gui color
+        palette_range: (start, stop) of the palette entries to consider
+    """
+    lab = srgb_to_lab(hex_to_rgb(color))
+    start, stop = palette_range
+    table = palette_lab()
+    return min(range(start, stop),
+               key=lambda i: sum((a - b) ** 2 for a, b in zip(lab, table[i])))
+
+
+def quantize(colors: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Map '#rrggbb' colors to their nearest palette entries in one batch.
+
+    Args:
+        colors: gui colors (duplicates are matched once)
+
+    Returns:
+        Dictionary of lowercase color -> (xterm-256 index, 16-color index)
+    """
+    unique = sorted({color.lower() for color in colors})
+    np = numpy_module()
+    if np is None or len(unique) < 16:
+        return {color: (nearest(color, RANGE_256), nearest(color, RANGE_16))
+                for color in unique}
+
+    rgb = np.array([hex_to_rgb(color) for color in unique], dtype=float)
+    lab = srgb_to_lab_array(rgb)
+    table = _palette_array()
+    distances = ((lab[:, None, :] - table[None, :, :]) ** 2).sum(axis=2)
+    best256 = distances[:, RANGE_256[0]:].argmin(axis=1) + RANGE_256[0]
+    best16 = distances[:, :RANGE_16[1]].argmin(axis=1)
+    return {color: (int(i256), int(i16))
+            for color, i256, i16 in zip(unique, best256.tolist(), best16.tolist())}
+
+
+@dataclass
+class Mismatch:
+    """A cterm value that is not the nearest palette entry for its gui color."""
+
+    theme: str
+    line: int
+    group: str
+    attribute: str
+    gui: str
+    current: Optional[str]
+    expected: int
+    current_delta: Optional[float]
+    expected_delta: float
+
+
+def scan_theme(text: str) -> List[Tuple[int, str, str, str, Optional[str]]]:
+    """
+    List the gui/cterm color pairs of a colorscheme.
+
+    Returns:
+        (line number, group, cterm attribute, gui color, cterm value) for
+        every highlight line that sets a gui color
+    """
+    pairs = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        match = 'gui' in line and _HI_LINE_RE.match(line)
+        if not match:
+            continue
+        tokens = match.group(1).split(None, 2)
+        if tokens and tokens[0] in ('default', 'def'):
+            tokens = tokens[1:]
+        if len(tokens) < 2 or tokens[0] in ('link', 'clear'):
+            continue
+        attrs = {key.lower(): value for key, value in _COLOR_ATTR_RE.findall(line)}
+        for gui_attr, cterm_attr in _PAIRS:
+            gui = attrs.get(gui_attr)
+            if gui and _GUI_HEX_RE.match(gui):
+                pairs.append((lineno, tokens[0], cterm_attr, gui.lower(), attrs.get(cterm_attr)))
+    return pairs
+
+
+def audit_themes(paths: Sequence[Path], tolerance: float = 0.0) -> Dict[str, List[Mismatch]]:
+    """
+    Find cterm values that are not the nearest palette entry.
+
+    All themes are scanned first so the colors of every theme are quantized
+    in a single batch.
+
+    Args:
+        paths: Colorscheme files
+        tolerance: Ignore values whose delta E is within this much of the best
+
+    Returns:
+        Dictionary of theme path -> mismatches (empty list if clean)
+    """
+    scanned = {str(path): scan_theme(Path(path).read_text(encoding='utf-8', errors='replace'))
+               for path in paths}
+    table = quantize([gui for pairs in scanned.values() for _, _, _, gui, _ in pairs])
+
+    results: Dict[str, List[Mismatch]] = {}
+    for path, pairs in scanned.items():
+        mismatches = []
+        theme = Path(path).stem
+        for lineno, group, attribute, gui, current in pairs:
+            if current is not None and not current.isdigit():
+                continue  # color names and NONE are deliberate
+            best256, best16 = table[gui]
+            expected = best16 if current is not None and int(current) < 16 else best256
+            if current is not None and int(current) == expected:
+                continue
+            expected_delta = delta_e(gui, expected)
+            current_delta = delta_e(gui, int(current)) if current is not None \
+                and int(current) < 256 else None
+            if current_delta is not None and current_delta - expected_delta <= tolerance:
+                continue
+            mismatches.append(Mismatch(theme, lineno, group, attribute, gui, current, expected,
+                                       None if current_delta is None else round(current_delta, 2),
+                                       round(expected_delta, 2)))
+        results[path] = mismatches
+    return results
+
+
+def rewrite_text(text: str, mismatches: List[Mismatch]) -> str:
+    """
+    Apply the expected cterm values to colorscheme source.
+
+    Existing values are replaced in place; missing ones are appended to the
+    highlight line.
+    """
+    lines = text.splitlines(keepends=True)
+    for mismatch in mismatches:
+        index = mismatch.line - 1
+        line = lines[index]
+        body = line.rstrip('\r\n')
+        ending = line[len(body):]
+        value = f'{mismatch.attribute}={mismatch.expected}'
+        pattern = re.compile(rf'\b{mismatch.attribute}=\S+', re.IGNORECASE)
+        if pattern.search(body):
+            body = pattern.sub(value, body, count=1)
+        else:
+            body = f'{body} {value}'
+        lines[index] = body + ending
+    return ''.join(lines)
+
+
+def rewrite_themes(results: Dict[str, List[Mismatch]]) -> int:
+    """
+    Fix the mismatches of audit_themes() in the theme files.
+
+    Returns:
+        Number of files rewritten
+    """
+    rewritten = 0
+    for path, mismatches in results.items():
+        if not mismatches:
+            continue
+        text = Path(path).read_text(encoding='utf-8')
+        atomic_write(Path(path), rewrite_text(text, mismatches).encode('utf-8'))
+        rewritten += 1
+    return rewritten
+
+
+def print_audit(results: Dict[str, List[Mismatch]]):
+    """Print the mismatches of each theme."""
+    for path, mismatches in results.items():
+        mark = '✓' if not mismatches else '✗'
+        print(f"  {mark} {Path(path).stem:<20} {len(mismatches)} mismatch(es)")
+        for m in mismatches:
+            current = 'missing' if m.current is None else m.current
+            delta = '' if m.current_delta is None else f' (ΔE {m.current_delta:.1f})'
+            print(f"      line {m.line}: {m.group} {m.gui} {m.attribute}={current}{delta} "
+                  f"-> {m.expected} (ΔE {m.expected_delta:.1f})")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Check theme cterm colors against the nearest xterm palette entries',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                            # Audit every theme in colors/
+  %(prog)s --tolerance 2              # Only report misses worse than ΔE 2
+  %(prog)s --rewrite colors/nord.vim  # Fix a theme in place
+        """
+    )
+    parser.add_argument('themes', nargs='*', type=Path,
+                        help='Colorscheme files (default: colors/*.vim)')
+    parser.add_argument('--tolerance', type=float, default=0.0, metavar='DELTA_E',
+                        help='Accept values within DELTA_E of the nearest entry (default: 0)')
+    parser.add_argument('--rewrite', action='store_true',
+                        help='Write the nearest values into the theme files')
+    parser.add_argument('--json', type=Path, metavar='FILE', help='Write mismatches to FILE')
+    args = parser.parse_args()
+
+    paths = args.themes or sorted((Path(__file__).parent / 'colors').glob('*.vim'))
+    start = time.perf_counter()
+    try:
+        results = audit_themes(paths, args.tolerance)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print_audit(results)
+    total = sum(len(mismatches) for mismatches in results.values())
+    engine = 'numpy' if numpy_module() is not None else 'python'
+    print(f"{len(results)} theme(s), {total} mismatch(es) in {elapsed * 1000:.0f} ms ({engine})")
+
+    if args.json:
+        data: Dict[str, Any] = {path: [asdict(m) for m in mismatches]
+                                for path, mismatches in results.items()}
+        with open(args.json, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"Mismatches written to {args.json}")
+
+    if args.rewrite:
+        rewritten = rewrite_themes(results)
+        print(f"Rewrote {rewritten} theme file(s)")
+        return 0
+    return 1 if total else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())